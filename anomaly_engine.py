@@ -0,0 +1,215 @@
+# anomaly_engine.py
+"""
+Vectorized anomaly detection over resource metrics.
+
+Three detectors run together over every metric column in one NumPy pass:
+
+- rolling z-score against the trailing `window` samples,
+- EWMA residual against an exponentially weighted mean/variance,
+- median absolute deviation (robust z) over the trailing `window` samples.
+
+A sample is flagged when at least `min_votes` detectors agree, and flagged
+samples are merged into time intervals with a severity. The same
+`StreamingAnomalyDetector` serves batch runs (one `update` plus `flush`) and
+incremental runs, where only a short tail of samples and the EWMA state are
+kept between calls.
+"""
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_METRICS = ("cpu_percent", "mem_percent", "disk_percent")
+SEVERITIES = ("low", "medium", "high")
+
+
+class AnomalyInterval(NamedTuple):
+    start: np.datetime64
+    end: np.datetime64
+    metrics: tuple
+    severity: str
+    peak_score: float
+    points: int
+
+
+def _linear_filter(u: np.ndarray, c: float, y0: np.ndarray) -> np.ndarray:
+    """y[t] = c * y[t-1] + u[t] along axis 0, vectorized block by block."""
+    out = np.empty_like(u)
+    # keep c**-block well inside float64 range
+    block = max(1, int(600 / -np.log(c))) if 0.0 < c < 1.0 else 1
+    for s in range(0, len(u), block):
+        ub = u[s:s + block]
+        steps = np.arange(len(ub))
+        decay = c ** (steps + 1)
+        acc = np.cumsum(ub * (c ** -steps)[:, None], axis=0)
+        yb = decay[:, None] * y0 + (decay / c)[:, None] * acc
+        out[s:s + len(ub)] = yb
+        y0 = yb[-1]
+    return out
+
+
+def _rolling_zscore(x: np.ndarray, window: int, min_periods: int, min_std: float) -> np.ndarray:
+    """|x - mean| / std of the trailing window that ends just before each sample."""
+    n = len(x)
+    csum = np.vstack([np.zeros((1, x.shape[1])), np.cumsum(x, axis=0)])
+    csq = np.vstack([np.zeros((1, x.shape[1])), np.cumsum(x * x, axis=0)])
+    idx = np.arange(n)
+    lo = np.maximum(0, idx - window)
+    count = (idx - lo)[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (csum[idx] - csum[lo]) / count
+        var = (csq[idx] - csq[lo]) / count - mean * mean
+    std = np.sqrt(np.maximum(var, 0.0))
+    z = np.abs(x - mean) / np.maximum(std, min_std)
+    z[count[:, 0] < min_periods] = 0.0
+    return np.nan_to_num(z)
+
+
+def _rolling_mad(x: np.ndarray, window: int, min_mad: float, stride: int = 1, offset: int = 0,
+                 chunk: int = 8192) -> np.ndarray:
+    """Robust z-score against the median/MAD of a trailing window.
+
+    Median and MAD are refreshed every `stride` samples (aligned on the global
+    sample index `offset + i`) and reused in between, which keeps the cost at
+    n / stride window sorts.
+    """
+    n, k = x.shape
+    score = np.zeros((n, k))
+    if n <= window:
+        return score
+    views = np.lib.stride_tricks.sliding_window_view(x, window, axis=0)  # views[j] = x[j:j+window]
+    bound = ((np.arange(n) + offset) // stride) * stride - offset
+    ok = bound >= window
+    bounds = np.unique(bound[ok])
+    med = np.empty((len(bounds), k))
+    mad = np.empty((len(bounds), k))
+    half = window // 2
+    for s in range(0, len(bounds), chunk):
+        win = views[bounds[s:s + chunk] - window]
+        m = np.partition(win, half, axis=-1)[..., half]
+        med[s:s + chunk] = m
+        mad[s:s + chunk] = np.partition(np.abs(win - m[..., None]), half, axis=-1)[..., half]
+    pos = np.searchsorted(bounds, bound[ok])
+    score[ok] = 0.6745 * np.abs(x[ok] - med[pos]) / np.maximum(mad[pos], min_mad)
+    return score
+
+
+class StreamingAnomalyDetector:
+    """Rolling z-score + EWMA + MAD detector whose state survives between `update` calls."""
+
+    def __init__(self, metrics: Sequence[str] = DEFAULT_METRICS, window: int = 60,
+                 z_thresh: float = 3.0, mad_thresh: float = 3.5, ewma_alpha: float = 0.1,
+                 ewma_thresh: float = 3.0, min_votes: int = 2, merge_gap: int = 5,
+                 min_periods: int = 10, min_std: float = 0.5, mad_stride: Optional[int] = None):
+        self.metrics = tuple(metrics)
+        self.window = window
+        self.thresholds = np.array([z_thresh, ewma_thresh, mad_thresh])
+        self.alpha = ewma_alpha
+        self.min_votes = min_votes
+        self.mad_stride = mad_stride or max(1, window // 6)
+        self.merge_gap = merge_gap
+        self.min_periods = min_periods
+        self.min_std = min_std
+
+        k = len(self.metrics)
+        self._hist = np.empty((0, k))
+        self._ew_mean: Optional[np.ndarray] = None
+        self._ew_var = np.zeros(k)
+        self._seen = 0
+        self._open: Optional[dict] = None
+
+    # — detectors —
+    def _ewma_scores(self, x: np.ndarray) -> np.ndarray:
+        a = self.alpha
+        if self._ew_mean is None:
+            self._ew_mean = x[0].copy()
+        mean = _linear_filter(a * x, 1.0 - a, self._ew_mean)
+        prev_mean = np.vstack([self._ew_mean[None, :], mean[:-1]])
+        resid = x - prev_mean
+        var = _linear_filter(a * (1.0 - a) * resid * resid, 1.0 - a, self._ew_var)
+        prev_var = np.vstack([self._ew_var[None, :], var[:-1]])
+        score = np.abs(resid) / np.maximum(np.sqrt(prev_var), self.min_std)
+        warm = self._seen + np.arange(len(x)) < self.min_periods
+        score[warm] = 0.0
+        self._ew_mean, self._ew_var = mean[-1], var[-1]
+        return score
+
+    def update(self, timestamps, values) -> list[AnomalyInterval]:
+        """Feed new samples; returns intervals that are now closed."""
+        t = np.asarray(timestamps, dtype="datetime64[ns]")
+        x = np.asarray(values, dtype=float).reshape(len(t), len(self.metrics))
+        if len(t) == 0:
+            return []
+        h = len(self._hist)
+        full = np.vstack([self._hist, x])
+
+        scores = np.stack([
+            _rolling_zscore(full, self.window, self.min_periods, self.min_std)[h:],
+            self._ewma_scores(x),
+            _rolling_mad(full, self.window, self.min_std, self.mad_stride, self._seen - h)[h:],
+        ])  # (detector, n, metric)
+        ratio = scores / self.thresholds[:, None, None]
+        fired = ratio >= 1.0
+        n_fired = fired.sum(axis=0)                      # (n, metric)
+        peak = np.where(fired, ratio, 0.0).max(axis=0)   # (n, metric)
+        # a sample is anomalous when enough detectors agree; a large excursion makes it high
+        rank = np.where(n_fired < self.min_votes, -1,
+                        np.where(peak >= 2.0, 2, np.where(n_fired >= 3, 1, 0)))
+
+        closed = self._merge(t, rank, peak, self._seen)
+        self._hist = full[-(self.window + self.mad_stride):]
+        self._seen += len(t)
+        if self._open is not None and self._seen - 1 - self._open["end_idx"] > self.merge_gap:
+            closed.append(self._close())
+        return closed
+
+    def flush(self) -> list[AnomalyInterval]:
+        """Close the interval that is still open, if any."""
+        return [self._close()] if self._open is not None else []
+
+    # — interval bookkeeping —
+    def _merge(self, t, rank, peak, offset) -> list[AnomalyInterval]:
+        flagged = np.flatnonzero(rank.max(axis=1) >= 0)
+        if len(flagged) == 0:
+            return []
+        breaks = np.flatnonzero(np.diff(flagged) > self.merge_gap) + 1
+        closed = []
+        for group in np.split(flagged, breaks):
+            g_rank, g_peak = rank[group], peak[group]
+            seg = {
+                "start_idx": offset + group[0], "end_idx": offset + group[-1],
+                "start": t[group[0]], "end": t[group[-1]],
+                "metrics": set(np.flatnonzero((g_rank >= 0).any(axis=0)).tolist()),
+                "rank": int(g_rank.max()), "peak": float(g_peak.max()), "points": len(group),
+            }
+            if self._open is not None and seg["start_idx"] - self._open["end_idx"] <= self.merge_gap:
+                o = self._open
+                o["end_idx"], o["end"] = seg["end_idx"], seg["end"]
+                o["metrics"] |= seg["metrics"]
+                o["rank"] = max(o["rank"], seg["rank"])
+                o["peak"] = max(o["peak"], seg["peak"])
+                o["points"] += seg["points"]
+            else:
+                if self._open is not None:
+                    closed.append(self._close())
+                self._open = seg
+        return closed
+
+    def _close(self) -> AnomalyInterval:
+        o, self._open = self._open, None
+        return AnomalyInterval(
+            start=o["start"], end=o["end"],
+            metrics=tuple(self.metrics[i] for i in sorted(o["metrics"])),
+            severity=SEVERITIES[o["rank"]],
+            peak_score=round(o["peak"], 2),
+            points=o["points"],
+        )
+
+
+def detect_anomalies(df, metrics: Sequence[str] = DEFAULT_METRICS, time_col: str = "timestamp",
+                     **params) -> list[AnomalyInterval]:
+    """Batch run over a DataFrame; `params` go to StreamingAnomalyDetector."""
+    metrics = [m for m in metrics if m in df.columns]
+    df = df.sort_values(time_col)
+    detector = StreamingAnomalyDetector(metrics, **params)
+    intervals = detector.update(df[time_col].to_numpy(), df[metrics].to_numpy(dtype=float))
+    return intervals + detector.flush()
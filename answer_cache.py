@@ -0,0 +1,118 @@
+# answer_cache.py
+"""
+Semantic cache of /ask answers.
+
+Entries are scoped to a file_name and matched two ways: the normalized
+question text (skips even the query embedding) and cosine similarity of the
+query embedding against earlier questions on the same file. Entries expire
+after `ttl` seconds, the least recently used ones go once `max_entries` is
+reached, and re-uploading a file drops everything cached for it.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+
+
+class _Entry(NamedTuple):
+    file_name: str
+    text_key: str
+    vector: np.ndarray
+    answer: str
+    created: float
+
+
+def _text_key(query: str) -> str:
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+
+class SemanticAnswerCache:
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, max_entries: int = ANSWER_CACHE_SIZE,
+                 ttl: float = ANSWER_CACHE_TTL):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._by_file: dict[str, set] = {}
+        self._by_text: dict[tuple, int] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._by_file[entry.file_name].discard(entry_id)
+        if not self._by_file[entry.file_name]:
+            del self._by_file[entry.file_name]
+        if self._by_text.get((entry.file_name, entry.text_key)) == entry_id:
+            del self._by_text[(entry.file_name, entry.text_key)]
+
+    def _live(self, entry_id: int, now: float) -> Optional[_Entry]:
+        entry = self._entries[entry_id]
+        if now - entry.created > self.ttl:
+            self._remove(entry_id)
+            return None
+        return entry
+
+    def get(self, file_name: str, query: str, embedding=None) -> Optional[str]:
+        """Cached answer for `query`; without `embedding` only an exact (normalized) repeat matches."""
+        now = time.monotonic()
+        with self._lock:
+            entry_id = self._by_text.get((file_name, _text_key(query)))
+            entry = self._live(entry_id, now) if entry_id is not None else None
+            if entry is None and embedding is not None and self._by_file.get(file_name):
+                ids = [i for i in list(self._by_file[file_name]) if self._live(i, now) is not None]
+                if ids:
+                    q = np.asarray(embedding, dtype=np.float32)
+                    q /= max(float(np.linalg.norm(q)), 1e-12)
+                    sims = np.stack([self._entries[i].vector for i in ids]) @ q
+                    best = int(np.argmax(sims))
+                    if sims[best] >= self.threshold:
+                        entry_id, entry = ids[best], self._entries[ids[best]]
+            if entry is None:
+                if embedding is not None:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return entry.answer
+
+    def put(self, file_name: str, query: str, embedding, answer: str) -> None:
+        v = np.asarray(embedding, dtype=np.float32)
+        v = v / max(float(np.linalg.norm(v)), 1e-12)
+        key = _text_key(query)
+        with self._lock:
+            old = self._by_text.get((file_name, key))
+            if old is not None:
+                self._remove(old)
+            entry_id, self._next_id = self._next_id, self._next_id + 1
+            self._entries[entry_id] = _Entry(file_name, key, v, answer, time.monotonic())
+            self._by_file.setdefault(file_name, set()).add(entry_id)
+            self._by_text[(file_name, key)] = entry_id
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, file_name: str) -> int:
+        """Drop every answer cached for `file_name`; returns how many."""
+        with self._lock:
+            ids = list(self._by_file.get(file_name, ()))
+            for entry_id in ids:
+                self._remove(entry_id)
+            return len(ids)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0, "entries": len(self._entries)}
+
+
+answer_cache = SemanticAnswerCache()
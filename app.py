@@ -7,21 +7,25 @@ import agentops
 agentops.init(default_tags=["crewai"])
 
 import os
-from crewai import LLM, Agent, Task, Crew, Process
+from crewai import Agent, Task, Crew, Process
 from crewai_tools import DirectoryReadTool, FileReadTool
+from tools.log_query_tool import LogQueryTool
+from llm_cache import CachingLLM, get_llm_cache
 
 # 1) Configure your Gemini key in your environment:
 #    export GEMINI_API_KEY="…"
 
-# 2) Instantiate the CrewAI LLM for Gemini
-gemini_llm = LLM(
+# 2) Instantiate the CrewAI LLM for Gemini; completions are replayed while prompts and ./logs/*.log are unchanged
+gemini_llm = CachingLLM(
     api_key="",
-    model="gemini/gemini-2.0-flash"   # or "gemini/gemini-pro", "gemini/gemini-1.5-flash", etc.
+    model="gemini/gemini-2.0-flash",   # or "gemini/gemini-pro", "gemini/gemini-1.5-flash", etc.
+    input_paths=["./logs/*.log"],
 )
 
 # 3) Build your agents exactly as before, but pass `gemini_llm` in:
 directory_reader = DirectoryReadTool()
 file_read_tool   = FileReadTool()
+log_query_tool   = LogQueryTool()
 
 latest_file_agent = Agent(
     role="File Reader Agent",
@@ -39,7 +43,7 @@ log_analyzer_agent = Agent(
     goal="Analyze system logs and surface errors, timings, and exceptions.",
     backstory="15+ years in IT, master’s in CS, log‑analysis guru.",
     memory=True,
-    tools=[file_read_tool],
+    tools=[log_query_tool, file_read_tool],
     allow_delegation=False,
     verbose=True,
     llm=gemini_llm
@@ -54,7 +58,8 @@ find_latest_task = Task(
 
 analyze_logs_task = Task(
     description=(
-        "From the files found, produce markdown tables:\n"
+        "From the files found, produce markdown tables. Query them with the Log Query tool "
+        "(time range, severity, source or text filters) rather than reading whole files:\n"
         "- Import jobs: coverage type, table name, environment, time spent\n"
         "- Microservices: error, exception type, exception message"
     ),
@@ -62,7 +67,7 @@ analyze_logs_task = Task(
     output_file="./report.md",
     agent=log_analyzer_agent,
     context=[find_latest_task],
-    tools=[file_read_tool],
+    tools=[log_query_tool, file_read_tool],
     verbose=True
 )
 
@@ -75,3 +80,4 @@ crew = Crew(
 if __name__ == "__main__":
     result = crew.kickoff({"logs_directory": "./logs"})
     print(result)
+    print(f"LLM cache: {get_llm_cache().stats()}")
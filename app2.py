@@ -1,17 +1,28 @@
 import os
-import time
-import psutil
+import csv
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
+from collections import Counter
 from datetime import datetime
 
-from crewai import LLM, Agent, Task, Crew, Process
+from crewai import Agent, Task, Crew, Process
 from crewai.tools import tool
 from crewai.project import CrewBase, agent, task, crew, before_kickoff
-from crewai_tools import DirectoryReadTool, FileReadTool
+from crewai_tools import FileReadTool
 from dotenv import load_dotenv
 
+from anomaly_engine import DEFAULT_METRICS, SEVERITIES, detect_anomalies
+from event_store import dataset_name, is_store_uri, partition_files, read_frame, write_frame
+from frame_cache import files_signature, frame_cache
+from instrumentation import run_log, span, timed
+from llm_cache import CachingLLM, get_llm_cache
+from log_checkpoint import incremental_aggregate_files
+from log_classifier import classify_directory, classify_file
+from resource_sampler import get_sampler
+from template_miner import mine_files
+from tools.log_query_tool import LogQueryTool
+
 load_dotenv()
 import os
 # ensure the key is set in this process
@@ -24,7 +35,8 @@ agentops.init(default_tags=["crewai"])
 # ——————————————————————————————————————————————
 # 0) LLM: configure your Gemini (or swap in Azure) here
 # ——————————————————————————————————————————————
-gemini_llm = LLM(
+# completions are replayed from .cache/llm_cache.sqlite while prompts and the analyzed logs are unchanged
+gemini_llm = CachingLLM(
     api_key=os.getenv("GOOGLE_API_KEY"),
     model="gemini/gemini-2.0-flash"
 )
@@ -34,10 +46,88 @@ gemini_llm = LLM(
 # ——————————————————————————————————————————————
 # 1) Fixed custom tools with proper @tool syntax
 
+METRICS_WINDOW_SECONDS = float(os.getenv("METRICS_WINDOW_SECONDS", "3600"))
+# the sampler window ends on a multiple of this, so reruns within it see the same metrics (and LLM cache keys)
+METRICS_WINDOW_ALIGN_SECONDS = float(os.getenv("METRICS_WINDOW_ALIGN_SECONDS", "300"))
+# the report prompt carries this placeholder instead of the time, which would change the LLM cache key every run
+REPORT_TIME_PLACEHOLDER = "[REPORT_TIME]"
+# "dag" runs tasks as soon as their context tasks are done (dag_runner.py); "sequential" uses crewai's order
+CREW_PROCESS = os.getenv("CREW_PROCESS", "dag")
+
+def aligned_window(df: pd.DataFrame, seconds: float, align: float) -> pd.DataFrame:
+    """Samples in the `seconds` before the last `align` boundary; the newest window if that is empty."""
+    end = pd.Timestamp.now().floor(pd.Timedelta(seconds=align)) if align > 0 else None
+    if end is not None:
+        aligned = df[(df.timestamp >= end - pd.Timedelta(seconds=seconds)) & (df.timestamp < end)]
+        if not aligned.empty:
+            return aligned.reset_index(drop=True)
+    if df.empty:
+        return df
+    return df[df.timestamp >= df.timestamp.iloc[-1] - pd.Timedelta(seconds=seconds)].reset_index(drop=True)
+
+
+def stamp_report(path: str, when: datetime) -> None:
+    """Put the generation time into a report written from a time-free prompt."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    stamp = when.strftime("%Y-%m-%d %H:%M:%S %Z%z")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text.replace(REPORT_TIME_PLACEHOLDER, stamp))
+
+
+def _read_csv(df_path: str, time_col: str | None, start: str, end: str) -> pd.DataFrame:
+    # the whole file, so every tool's projection can share it; "timestamp" is parsed wherever it exists
+    header = set(pd.read_csv(df_path, nrows=0).columns)
+    time_col = time_col if time_col in header else None
+    parse = [c for c in dict.fromkeys(["timestamp", time_col]) if c in header]
+    df = pd.read_csv(df_path, parse_dates=parse or False)
+    if time_col and start:
+        df = df[df[time_col] >= pd.Timestamp(start)]
+    if time_col and end:
+        df = df[df[time_col] <= pd.Timestamp(end)]
+    return df
+
+
+def load_frame(df_path: str, columns: list[str], time_col: str | None = None,
+               start: str = "", end: str = "") -> pd.DataFrame:
+    """Load `columns` from a CSV path or a store://<dataset> URI, keeping rows with time_col in [start, end].
+    The full frame is cached per file signature and time window and shared by every tool; callers get
+    a projection of the requested columns the source has (callers check for the ones they need)."""
+    columns = list(dict.fromkeys(columns + ([time_col] if time_col else [])))
+    if is_store_uri(df_path):
+        dataset = dataset_name(df_path)
+        window_col = time_col or "timestamp"
+        files = partition_files(dataset, start or None, end or None)
+        loader = lambda: read_frame(dataset, start=start or None, end=end or None, time_col=window_col)
+    else:
+        window_col = time_col if start or end else None
+        files = [df_path]
+        loader = lambda: _read_csv(df_path, window_col, start, end)
+    key = (df_path, files_signature(files), window_col if start or end else None, start, end)
+    df = frame_cache.get_or_load(key, loader)
+    df = df[[c for c in columns if c in df.columns]]
+    if time_col in df.columns and (df[time_col].dtype == object or pd.api.types.is_string_dtype(df[time_col])):
+        try:  # a time column other than "timestamp", left as text in the shared frame
+            df[time_col] = pd.to_datetime(df[time_col])
+        except (ValueError, TypeError):
+            pass
+    return df
+
+
+def _parsable(log_paths: list[str]) -> tuple[list[str], list[str]]:
+    """Split paths into files a log_parser grammar recognizes and the rest."""
+    ok, skipped = [], []
+    for path in log_paths:
+        (ok if os.path.isfile(path) and classify_file(path)["format"] else skipped).append(path)
+    return ok, skipped
+
 
 @tool("resource_metrics")
+@timed("resource_metrics")
 def resource_metrics(metrics_directory: str) -> str:
-    """Collect resource usage metrics from CSV files or live-sample for 60s, then save to CSV."""
+    """Collect resource usage metrics from CSV files or the background sampler's latest window, then save to CSV and to store://metrics."""
     dfs = []
     for fn in os.listdir(metrics_directory):
         if fn.endswith(".csv") and "metrics" in fn:
@@ -47,31 +137,74 @@ def resource_metrics(metrics_directory: str) -> str:
     if dfs:
         combined = pd.concat(dfs).sort_values("timestamp")
     else:
-        samples = []
-        for _ in range(60):
-            samples.append({
-                "timestamp": pd.Timestamp.now(),
-                "cpu_percent": psutil.cpu_percent(),
-                "mem_percent": psutil.virtual_memory().percent,
-                "disk_percent": psutil.disk_usage("/").percent
-            })
-            time.sleep(1)
-        combined = pd.DataFrame(samples)
+        # no blocking sampling loop: the background sampler already holds recent samples
+        sampler = get_sampler()
+        window = sampler.latest()
+        if window.empty:  # nothing sampled recently; the owner's thread (or ours) takes over from here
+            sampler.sample_now()
+            window = sampler.latest()
+        combined = aligned_window(window, METRICS_WINDOW_SECONDS, METRICS_WINDOW_ALIGN_SECONDS)
 
     out_path = os.path.join(metrics_directory, "resource_metrics.csv")
     combined.to_csv(out_path, index=False)
+    write_frame("metrics", combined, replace=True)
     return out_path  # <-- str, JSON‑serializable
 
+@tool("log_event_summary")
+@timed("log_event_summary")
+def log_event_summary(log_paths: list[str], trends_csv: str) -> str:
+    """Parse the given log files (only bytes appended since the last run) and return a compact summary (severity, sources, top errors, time span).
+    Also writes events per hour to trends_csv with columns 'timestamp', 'value' and 'errors', and the parsed
+    events to store://events (columns timestamp, file, host, source, severity, message)."""
+    log_paths, skipped = _parsable(log_paths)
+    agg = incremental_aggregate_files(log_paths, store_dataset="events")
+
+    with open(trends_csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "value", "errors"])
+        for hour in sorted(agg.by_hour):
+            writer.writerow([hour.isoformat(sep=" "), agg.by_hour[hour], agg.errors_by_hour[hour]])
+
+    lines = [
+        f"Files: {', '.join(log_paths)}",
+        f"Records: {agg.total} between {agg.first} and {agg.last}",
+        f"Severity counts: {dict(agg.by_severity)}",
+        f"Top sources: {dict(agg.by_source.most_common(10))}",
+        "Most frequent errors/warnings:",
+    ]
+    lines += [f"- ({n}x) {msg}" for msg, n in agg.problems.most_common(10)]
+    if skipped:
+        lines.append(f"Skipped (no known log format): {', '.join(skipped)}")
+    lines.append(f"Hourly event counts written to {trends_csv}")
+    return "\n".join(lines)
+
+@tool("log_templates")
+@timed("log_templates")
+def log_templates(log_paths: list[str], top: int = 30) -> str:
+    """Mine the given log files into message templates (variable parts shown as <*>) and return a markdown
+    table of the `top` most frequent ones with count, first/last seen and severity. Use this instead of
+    reading raw log lines."""
+    log_paths, skipped = _parsable(log_paths)
+    miner = mine_files(log_paths)
+    table = miner.table(top)
+    note = f"\n\nSkipped (no known log format): {', '.join(skipped)}" if skipped else ""
+    return (f"{miner.records} records -> {len(miner.templates)} templates "
+            f"({miner.raw_chars} message chars summarized in {len(table)}).\n\n{table}{note}")
+
 @tool("seaborn_line_viz")
+@timed("seaborn_line_viz")
 def seaborn_line_viz(
     df_path: str,
     x_col: str,
     y_cols: list[str],
     title: str,
-    out_path: str
+    out_path: str,
+    start: str = "",
+    end: str = ""
 ) -> str:
-    """Generate a Seaborn line chart from CSV at df_path and save PNG to out_path."""
-    df = pd.read_csv(df_path, parse_dates=[x_col])
+    """Generate a Seaborn line chart from a CSV path or store://<dataset> at df_path and save PNG to out_path.
+    Optional ISO start/end restrict the x_col time range."""
+    df = load_frame(df_path, y_cols, time_col=x_col, start=start, end=end)
     plt.figure(figsize=(10, 6))
     for y_col in y_cols:
         sns.lineplot(x=x_col, y=y_col, data=df, label=y_col)
@@ -85,34 +218,59 @@ def seaborn_line_viz(
     return out_path
 
 @tool("anomaly_detection")
+@timed("anomaly_detection")
 def anomaly_detection(
     df_path: str,
     cpu_thresh: float = 85.0,
-    mem_thresh: float = 90.0
+    mem_thresh: float = 90.0,
+    start: str = "",
+    end: str = ""
 ) -> str:
-    """Detect CPU/memory anomalies in CSV at df_path and return a text summary."""
-    df = pd.read_csv(df_path, parse_dates=["timestamp"])
+    """Detect CPU/memory/disk anomalies in a CSV path or store://metrics at df_path and return a text summary:
+    threshold breaches plus anomaly time windows (rolling z-score, EWMA and MAD detectors) with severity."""
+    df = load_frame(df_path, list(DEFAULT_METRICS), time_col="timestamp", start=start, end=end)
+    if "timestamp" not in df.columns:
+        return f"{df_path} has no 'timestamp' column; cannot detect anomalies."
+    metrics = [m for m in DEFAULT_METRICS if m in df.columns]
+    missing = [m for m in DEFAULT_METRICS if m not in df.columns]
     alerts = []
-    high_cpu = df[df.cpu_percent > cpu_thresh]
-    if not high_cpu.empty:
-        alerts.append(f"High CPU (> {cpu_thresh}%) at {len(high_cpu)} timestamps")
-    low_cpu = df[df.cpu_percent < 10.0]
-    if not low_cpu.empty:
-        alerts.append(f"Under‑utilized CPU (< 10%) at {len(low_cpu)} timestamps")
-    high_mem = df[df.mem_percent > mem_thresh]
-    if not high_mem.empty:
-        alerts.append(f"High Memory (> {mem_thresh}%) at {len(high_mem)} timestamps")
-    return "\n".join(alerts) or "No anomalies detected."
+    if "cpu_percent" in df.columns:
+        high_cpu = df[df.cpu_percent > cpu_thresh]
+        if not high_cpu.empty:
+            alerts.append(f"High CPU (> {cpu_thresh}%) at {len(high_cpu)} timestamps")
+        low_cpu = df[df.cpu_percent < 10.0]
+        if not low_cpu.empty:
+            alerts.append(f"Under‑utilized CPU (< 10%) at {len(low_cpu)} timestamps")
+    if "mem_percent" in df.columns:
+        high_mem = df[df.mem_percent > mem_thresh]
+        if not high_mem.empty:
+            alerts.append(f"High Memory (> {mem_thresh}%) at {len(high_mem)} timestamps")
+
+    intervals = detect_anomalies(df[["timestamp"] + metrics].dropna(), metrics=metrics) if metrics else []
+    if intervals:
+        by_severity = Counter(iv.severity for iv in intervals)
+        alerts.append(f"Anomaly windows: {len(intervals)} ({dict(by_severity)})")
+        worst = sorted(intervals, key=lambda iv: (SEVERITIES.index(iv.severity), iv.peak_score), reverse=True)
+        for iv in worst[:10]:
+            alerts.append(f"- [{iv.severity}] {iv.start} → {iv.end} {', '.join(iv.metrics)} "
+                          f"({iv.points} samples, peak {iv.peak_score}x threshold)")
+    lines = alerts or ["No anomalies detected."]
+    if missing:
+        lines.insert(0, f"Skipped (column missing in {df_path}): {', '.join(missing)}")
+    return "\n".join(lines)
 @tool("seaborn_histogram_viz")
+@timed("seaborn_histogram_viz")
 def seaborn_histogram_viz(
     df_path: str,
     column: str,
     bins: int,
     title: str,
-    out_path: str
+    out_path: str,
+    start: str = "",
+    end: str = ""
 ) -> str:
-    """Generate a histogram of `column` from CSV at df_path."""
-    df = pd.read_csv(df_path, parse_dates=["timestamp"])
+    """Generate a histogram of `column` from a CSV path or store://<dataset> at df_path."""
+    df = load_frame(df_path, [column], time_col="timestamp" if start or end else None, start=start, end=end)
     plt.figure(figsize=(8, 6))
     sns.histplot(df[column].dropna(), bins=bins, kde=False)
     plt.title(title)
@@ -123,16 +281,19 @@ def seaborn_histogram_viz(
     return out_path
 
 @tool("seaborn_bar_viz")
+@timed("seaborn_bar_viz")
 def seaborn_bar_viz(
     df_path: str,
     x_col: str,
     y_col: str,
     top_n: int,
     title: str,
-    out_path: str
+    out_path: str,
+    start: str = "",
+    end: str = ""
 ) -> str:
-    """Generate a bar chart of the top N categories in x_col by y_col sum."""
-    df = pd.read_csv(df_path, parse_dates=["timestamp"])
+    """Generate a bar chart of the top N categories in x_col by y_col count (CSV path or store://<dataset>)."""
+    df = load_frame(df_path, [x_col, y_col], time_col="timestamp" if start or end else None, start=start, end=end)
     agg = df.groupby(x_col)[y_col].count().nlargest(top_n)
     plt.figure(figsize=(10, 6))
     sns.barplot(x=agg.values, y=agg.index, orient="h")
@@ -144,21 +305,27 @@ def seaborn_bar_viz(
     return out_path
 
 @tool("seaborn_heatmap_viz")
+@timed("seaborn_heatmap_viz")
 def seaborn_heatmap_viz(
     df_path: str,
     time_col: str,
     category_col: str,
     value_col: str,
     title: str,
-    out_path: str
+    out_path: str,
+    start: str = "",
+    end: str = ""
 ) -> str:
     """
     Generate a heatmap of value_col aggregated by hour of day (from time_col) vs category_col.
-    e.g. errors per hour per service.
+    e.g. errors per hour per service. df_path is a CSV path or store://<dataset>; only partitions
+    between the optional ISO start/end are read.
     """
-    df = pd.read_csv(df_path, parse_dates=[time_col])
-    df["hour"] = df[time_col].dt.hour
+    df = load_frame(df_path, [category_col, value_col], time_col=time_col, start=start, end=end)
+    df = df.assign(hour=df[time_col].dt.hour)  # the loaded frame is shared, don't mutate it
     pivot = df.pivot_table(index="hour", columns=category_col, values=value_col, aggfunc="count", fill_value=0)
+    if pivot.empty:
+        return f"No {value_col} data in {df_path} for the requested window; no heatmap written."
     plt.figure(figsize=(12, 6))
     sns.heatmap(pivot, annot=True, fmt="d", cmap="Blues")
     plt.title(title)
@@ -171,12 +338,20 @@ def seaborn_heatmap_viz(
 
 
 
+class TimedTask(Task):
+    """Task recorded as a span in the active run log (instrumentation.py), in either process mode."""
+
+    def execute_sync(self, *args, **kwargs):
+        with span("task", self.name or self.description[:60]):
+            return super().execute_sync(*args, **kwargs)
+
+
 # ——————————————————————————————————————————————
 # 2) Decorator‑based Crew definition
 # ——————————————————————————————————————————————
 @CrewBase
 class PerformanceAnalysisCrew:
-    """Pipeline: latest‑file → log‑analysis (system & app) → metrics → viz (system & app) → anomaly → final report"""
+    """Pipeline: local log classification → log‑analysis (system & app) → metrics → viz (system & app) → anomaly → final report"""
 
     @before_kickoff
     def prepare_inputs(self, inputs):
@@ -184,22 +359,15 @@ class PerformanceAnalysisCrew:
         inputs.setdefault("metrics_directory", "./logs")
         os.makedirs("./plots", exist_ok=True)  # Ensure the plots directory exists
         os.makedirs("./reports", exist_ok=True) # Ensure the reports directory exists
+        # categorize logs locally by content instead of asking the LLM
+        categories = classify_directory(inputs["logs_directory"])
+        inputs["system_logs"] = ", ".join(categories["system_logs"]) or "none"
+        inputs["application_logs"] = ", ".join(categories["application_logs"]) or "none"
+        inputs["unrecognized_logs"] = ", ".join(categories["unrecognized_logs"]) or "none"
+        gemini_llm.set_inputs(categories["system_logs"] + categories["application_logs"])
         return inputs
 
     # — Agents —
-    @agent
-    def file_reader_agent(self) -> Agent:
-        return Agent(
-            role="Log Categorization Specialist",
-            goal="Identify and categorize log files in the directory as either system logs or application/microservice logs based on their filenames.",
-            backstory="Expert in distinguishing different types of log files.",
-            memory=True,
-            tools=[DirectoryReadTool()],
-            allow_delegation=False,
-            verbose=True,
-            llm=gemini_llm
-        )
-
     @agent
     def system_log_analyzer_agent(self) -> Agent:
         return Agent(
@@ -207,7 +375,7 @@ class PerformanceAnalysisCrew:
             goal="Analyze system logs and surface errors, warnings, and any relevant performance indicators, focusing on data that can be plotted over time.",
             backstory="Deep understanding of operating system logs and their trends.",
             memory=True,
-            tools=[FileReadTool()],
+            tools=[log_event_summary, log_templates, LogQueryTool()],
             allow_delegation=False,
             verbose=True,
             llm=gemini_llm
@@ -220,7 +388,7 @@ class PerformanceAnalysisCrew:
             goal="Analyze application and microservice logs and surface errors, exceptions, performance metrics (like request timings, error rates) that can be plotted over time.",
             backstory="Extensive experience with debugging application logs and identifying performance trends.",
             memory=True,
-            tools=[FileReadTool()],
+            tools=[log_event_summary, log_templates, LogQueryTool()],
             allow_delegation=False,
             verbose=True,
             llm=gemini_llm
@@ -295,44 +463,33 @@ class PerformanceAnalysisCrew:
         )
 
     # — Tasks —
-    @task
-    def categorize_logs_task(self) -> Task:
-        return Task(
-            description="Read file names in {logs_directory} and categorize them into two lists: 'system_logs' and 'application_logs'. Assume system logs might contain keywords like 'system', 'kernel', or 'os', and application logs might contain keywords like 'app', 'service', or the application name. Return these two lists of file paths.",
-            expected_output="Dictionary containing two keys: 'system_logs' (list of system log paths) and 'application_logs' (list of application log paths).",
-            agent=self.file_reader_agent(),
-            tools=[DirectoryReadTool()]
-        )
-
     @task
     def analyze_system_logs_task(self) -> Task:
-        return Task(
+        return TimedTask(
             description=(
-                "Analyze the provided system log files. Identify the date and time format used in the system logs. Extract key observations, potential security events, and any traffic patterns or relevant numerical data that can be plotted over time (e.g., number of errors/warnings per hour). If you find such data, save it to a CSV file named 'system_log_trends.csv' in the './logs' directory with columns 'timestamp' and 'value'. Summarize your findings in './reports/system_report.md'."
+                "Analyze the system log files: {system_logs}. Call the log_event_summary tool once with all system log paths and trends_csv='./logs/system_log_trends.csv'; it parses the files and writes events per hour to that CSV (columns 'timestamp', 'value', 'errors'). Then call log_templates with the same paths for the table of recurring message templates, and use the Log Query tool to drill into specific time ranges, severities or sources instead of reading the files. From the summary and the templates, extract key observations, potential security events, and any traffic patterns. Summarize your findings in './reports/system_report.md'."
             ),
             expected_output="Markdown table summarizing system log analysis.",
             output_file="./reports/system_report.md",
             agent=self.system_log_analyzer_agent(),
-            context=[self.categorize_logs_task()],
-            tools=[FileReadTool()]
+            tools=[log_event_summary, log_templates, LogQueryTool()]
         )
 
     @task
     def analyze_app_logs_task(self) -> Task:
-        return Task(
+        return TimedTask(
             description=(
-                "Analyze the provided application/microservice log files. Identify the date and time format used in the application logs. Extract key observations, potential security events, and any traffic patterns or relevant numerical data that can be plotted over time (e.g., request latency, error rates). If you find such data, save it to a CSV file named 'app_log_trends.csv' in the './logs' directory with columns 'timestamp' and 'value'. Summarize your findings in './reports/app_report.md'."
+                "Analyze the application/microservice log files: {application_logs}. Call the log_event_summary tool once with all application log paths and trends_csv='./logs/app_log_trends.csv'; it parses the files and writes events per hour to that CSV (columns 'timestamp', 'value', 'errors'). Then call log_templates with the same paths for the table of recurring message templates, and use the Log Query tool to drill into specific time ranges, severities or sources instead of reading the files. From the summary and the templates, extract key observations, potential security events, and any traffic patterns (e.g., error rates). Summarize your findings in './reports/app_report.md'."
             ),
             expected_output="Markdown table summarizing application log analysis.",
             output_file="./reports/app_report.md",
             agent=self.app_log_analyzer_agent(),
-            context=[self.categorize_logs_task()],
-            tools=[FileReadTool()]
+            tools=[log_event_summary, log_templates, LogQueryTool()]
         )
 
     @task
     def collect_metrics_task(self) -> Task:
-        return Task(
+        return TimedTask(
             description="Gather resource metrics from {metrics_directory} and save them to a CSV file named 'resource_metrics.csv'.",
             expected_output="Path to the saved metrics CSV file",
             agent=self.metrics_agent(),
@@ -341,15 +498,15 @@ class PerformanceAnalysisCrew:
 
     @task
     def generate_viz_task(self) -> Task:
-        return Task(
+        return TimedTask(
             description=(
                 "Produce Seaborn charts in './plots':\n"
-                "1. 'resource_usage.png' from metrics CSV (cpu, mem, disk).\n"
+                "1. 'resource_usage.png' from df_path 'store://metrics' (cpu_percent, mem_percent, disk_percent over timestamp).\n"
                 "2. 'system_log_trends.png' if './logs/system_log_trends.csv' exists.\n"
                 "3. 'app_log_trends.png' if './logs/app_log_trends.csv' exists (timestamp vs value).\n"
                 "4. 'app_error_histogram.png': histogram of 'value' from app_log_trends.csv.\n"
-                "5. 'app_top_endpoints.png': bar chart of top 10 endpoints by call count from app_log_trends.csv (assuming an 'endpoint' column).\n"
-                "6. 'app_hourly_errors_heatmap.png': heatmap of error counts by hour vs endpoint from app_log_trends.csv."
+                "5. 'app_top_endpoints.png': bar chart of the top 10 sources by event count from df_path 'store://events' (x_col 'source', y_col 'severity').\n"
+                "6. 'app_hourly_errors_heatmap.png': heatmap of event counts by hour vs severity from df_path 'store://events' (time_col 'timestamp', category_col 'severity', value_col 'source')."
             ),
             expected_output="List of paths to generated PNG plots.",
             agent=self.viz_agent(),
@@ -359,7 +516,7 @@ class PerformanceAnalysisCrew:
 
     @task
     def anomaly_task(self) -> Task:
-        return Task(
+        return TimedTask(
             description="Analyze the metrics in the CSV file from the previous step for CPU and memory anomalies and suggest performance tunings.",
             expected_output="Anomaly summary & recommendations",
             agent=self.anomaly_agent(),
@@ -369,11 +526,11 @@ class PerformanceAnalysisCrew:
 
     @task
     def compile_report_task(self) -> Task:
-        current_time = datetime.now(tz=datetime.now().astimezone().tzinfo).strftime("%Y-%m-%d %H:%M:%S %Z%z")
-        return Task(
+        return TimedTask(
             description=(
-                f"Compile a comprehensive Log Analysis Report in './reports/performance_report.md' using the following format:\n\n"
-                f"Log Analysis Report - {current_time}\n\n"
+                "Compile a comprehensive Log Analysis Report in './reports/performance_report.md' using the following format:\n\n"
+                f"Log Analysis Report - {REPORT_TIME_PLACEHOLDER}\n\n"
+                f"(Copy {REPORT_TIME_PLACEHOLDER} verbatim; it is replaced with the generation time afterwards.)\n\n"
                 "Analysis Summary:\n"
                 "Summary: Provide a high-level summary of the findings from both system and application logs, resource metrics, and anomaly detection.\n"
                 "Highest Severity: [Specify the highest severity level found]\n"
@@ -425,10 +582,28 @@ class PerformanceAnalysisCrew:
 # ——————————————————————————————————————————————
 # 3) Kick it off
 # ——————————————————————————————————————————————
-if __name__ == "__main__":
+def run_pipeline(inputs: dict | None = None) -> str:
+    """One full pipeline run; a fresh crew each time, so warm workers (pipeline_worker.py) can call it repeatedly."""
     crew = PerformanceAnalysisCrew().crew()
-    result = crew.kickoff({
+    inputs = inputs or {
         "logs_directory": "./logs",
         "metrics_directory": "./logs"
-    })
-    print(result)
\ No newline at end of file
+    }
+    # wall/CPU/RSS per task, tool and LLM call go to a JSON run log (RUN_LOG_DIR) for /metrics and /plot
+    with run_log("pipeline"):
+        if CREW_PROCESS == "dag":
+            from dag_runner import run_dag  # checks the crewai internals it uses, so only when selected
+            result = run_dag(crew, inputs)
+            print(f"DAG run: {result.wall_seconds:.1f}s wall, critical path {result.critical_seconds:.1f}s")
+            for t in result.timings:
+                print(f"  {t['start']:7.1f}s → {t['end']:7.1f}s  {t['task']}")
+        else:
+            result = crew.kickoff(inputs)
+    now = datetime.now().astimezone()
+    stamp_report("./reports/performance_report.md", now)
+    return str(result).replace(REPORT_TIME_PLACEHOLDER, now.strftime("%Y-%m-%d %H:%M:%S %Z%z"))
+
+
+if __name__ == "__main__":
+    print(run_pipeline())
+    print(f"LLM cache: {get_llm_cache().stats()}")
\ No newline at end of file
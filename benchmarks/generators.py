@@ -0,0 +1,196 @@
+# benchmarks/generators.py
+"""
+Deterministic synthetic inputs for the benchmarks.
+
+Each generator streams lines from a seeded random.Random until the output
+reaches the requested size (always ending on a line boundary), so the same
+format, size and seed always give byte-identical files. Generated files are
+kept in the data directory and reused when their name (format, size, seed,
+GENERATOR_VERSION) matches.
+
+    syslog       Jun 14 15:16:01 combo sshd(pam_unix)[19939]: authentication failure; ...
+    apache       [Thu Jun 09 06:07:05 2005] [error] [client 1.2.3.4] File does not exist: ...
+    windows_tsv  loge.py's export: TimeGenerated, EventID, Source, Type, Category, Message
+    metrics      resource_metrics CSV (timestamp, cpu/mem/disk percent) with injected spikes
+    events       store://events-like CSV (timestamp, file, host, source, severity, message)
+"""
+import os
+import random
+import re
+from datetime import datetime, timedelta
+from typing import Callable, Iterator
+
+GENERATOR_VERSION = 1
+BLOCK_LINES = 4096
+UNITS = {"KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+_HOSTS = ["combo", "web01", "db02", "gateway"]
+
+
+def parse_size(text: str) -> int:
+    """'1MB', '512KB', '10GB' or plain bytes."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]B)?\s*", text.upper())
+    if not m:
+        raise ValueError(f"Bad size: {text!r}")
+    return int(float(m.group(1)) * UNITS.get(m.group(2) or "", 1))
+
+
+def format_size(size: int) -> str:
+    for unit in ("GB", "MB", "KB"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return str(size)
+
+
+def _ip(rng: random.Random) -> str:
+    return f"{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+
+
+def _clock(rng: random.Random, start: datetime) -> Iterator[datetime]:
+    ts = start
+    while True:
+        ts += timedelta(seconds=rng.choice((0, 0, 1, 1, 2, 5, 30)))
+        yield ts
+
+
+# — line generators —
+def syslog_lines(rng: random.Random) -> Iterator[str]:
+    users = ["root", "admin", "test", "guest", "oracle", "cyrus", "news"]
+    templates = [
+        (30, lambda: f"sshd(pam_unix)[{rng.randrange(1000, 32000)}]: authentication failure; logname= uid=0 "
+                     f"euid=0 tty=NODEVssh ruser= rhost={_ip(rng)}" + (f"  user={rng.choice(users)}" if rng.random() < .3 else "")),
+        (15, lambda: f"sshd(pam_unix)[{rng.randrange(1000, 32000)}]: check pass; user unknown"),
+        (15, lambda: f"sshd[{rng.randrange(1000, 32000)}]: Failed password for invalid user {rng.choice(users)} "
+                     f"from {_ip(rng)} port {rng.randrange(1024, 65535)} ssh2"),
+        (10, lambda: f"sshd(pam_unix)[{rng.randrange(1000, 32000)}]: session opened for user {rng.choice(users)} by (uid=0)"),
+        (10, lambda: f"sshd(pam_unix)[{rng.randrange(1000, 32000)}]: session closed for user {rng.choice(users)}"),
+        (8, lambda: f"su(pam_unix)[{rng.randrange(1000, 32000)}]: session opened for user news by (uid=0)"),
+        (5, lambda: f"ftpd[{rng.randrange(1000, 32000)}]: connection from {_ip(rng)} () at "
+                    f"{rng.choice(['Sun', 'Mon', 'Tue'])} Jul 10 03:55:15 2005"),
+        (4, lambda: f"kernel: Out of memory: Killed process {rng.randrange(1000, 32000)} (httpd)."),
+        (3, lambda: f"sshd[{rng.randrange(1000, 32000)}]: Timeout, client not responding from {_ip(rng)}"),
+    ]
+    weights = [w for w, _ in templates]
+    clock = _clock(rng, datetime(2005, 6, 14, 15, 16, 1))
+    while True:
+        ts = next(clock)
+        _, build = rng.choices(templates, weights)[0]
+        yield f"{ts:%b} {ts.day:2d} {ts:%H:%M:%S} {rng.choice(_HOSTS)} {build()}\n"
+
+
+def apache_lines(rng: random.Random) -> Iterator[str]:
+    paths = ["/var/www/html/favicon.ico", "/var/www/html/robots.txt", "/var/www/html/admin/config.php",
+             "/var/www/html/.env", "/var/www/html/wp-login.php"]
+    templates = [
+        (35, "error", lambda: f"[client {_ip(rng)}] File does not exist: {rng.choice(paths)}"),
+        (15, "error", lambda: f"[client {_ip(rng)}] Directory index forbidden by rule: /var/www/html/"),
+        (20, "notice", lambda: f"jk2_init() Found child {rng.randrange(1000, 32000)} in scoreboard slot {rng.randrange(1, 12)}"),
+        (15, "notice", lambda: f"workerEnv.init() ok /etc/httpd/conf/workers2.properties"),
+        (10, "error", lambda: f"mod_jk child workerEnv in error state {rng.randrange(5, 10)}"),
+        (3, "warn", lambda: f"child process {rng.randrange(1000, 32000)} still did not exit, sending a SIGTERM"),
+        (2, "crit", lambda: f"[client {_ip(rng)}] (13)Permission denied: access to /cgi-bin/ denied"),
+    ]
+    weights = [w for w, _, _ in templates]
+    clock = _clock(rng, datetime(2005, 6, 9, 6, 7, 4))
+    while True:
+        ts = next(clock)
+        _, level, build = rng.choices(templates, weights)[0]
+        yield f"[{ts:%a %b %d %H:%M:%S %Y}] [{level}] {build()}\n"
+
+
+def windows_tsv_lines(rng: random.Random) -> Iterator[str]:
+    yield "TimeGenerated\tEventID\tSource\tType\tCategory\tMessage\n"
+    templates = [
+        (30, 7036, "Service Control Manager", 4,
+         lambda: f"The {rng.choice(['Windows Update', 'BITS', 'Print Spooler', 'WinHTTP'])} service entered the "
+                 f"{rng.choice(['running', 'stopped'])} state."),
+        (20, 7040, "Service Control Manager", 4,
+         lambda: "The start type of the Background Intelligent Transfer Service service was changed from "
+                 "auto start to demand start."),
+        (10, 1796, "Microsoft-Windows-TPM-WMI", 1,
+         lambda: f"The Secure Boot update failed to update a Secure Boot variable with error "
+                 f"-{rng.randrange(2147000000, 2147483647)}."),
+        (10, 10016, "Microsoft-Windows-DistributedCOM", 2,
+         lambda: f"The application-specific permission settings do not grant Local Activation permission\n"
+                 f"for the COM Server application with CLSID {{{rng.getrandbits(128):032X}}}\n"
+                 f"to the user NT AUTHORITY\\SYSTEM SID (S-1-5-18)."),
+        (10, 41, "Microsoft-Windows-Kernel-Power", 1,
+         lambda: "The system has rebooted without cleanly shutting down first."),
+        (10, 4624, "Microsoft-Windows-Security-Auditing", 8,
+         lambda: f"An account was successfully logged on. Logon ID 0x{rng.getrandbits(32):X}"),
+        (5, 4625, "Microsoft-Windows-Security-Auditing", 16,
+         lambda: f"An account failed to log on. Source Network Address {_ip(rng)}"),
+        (5, 6013, "EventLog", 4, lambda: f"The system uptime is {rng.randrange(10, 10**7)} seconds."),
+    ]
+    weights = [t[0] for t in templates]
+    clock = _clock(rng, datetime(2025, 4, 6, 4, 22, 43))
+    while True:
+        ts = next(clock)
+        _, event_id, source, etype, build = rng.choices(templates, weights)[0]
+        yield f"{ts:%a %b} {ts.day:2d} {ts:%H:%M:%S %Y}\t{event_id}\t{source}\t{etype}\t0\t{build()}\n"
+
+
+def metrics_lines(rng: random.Random) -> Iterator[str]:
+    yield "timestamp,cpu_percent,mem_percent,disk_percent\n"
+    ts, cpu, mem, disk = datetime(2025, 4, 6), 30.0, 50.0, 60.0
+    spike = 0
+    while True:
+        ts += timedelta(seconds=1)
+        if spike == 0 and rng.random() < 0.001:
+            spike = rng.randrange(30, 300)
+        spike = max(spike - 1, 0)
+        cpu = min(max(cpu + rng.gauss(0, 2) + (0.5 if spike else -0.02 * (cpu - 30)), 0.0), 100.0)
+        mem = min(max(mem + rng.gauss(0, 0.3) + (0.1 if spike else -0.01 * (mem - 50)), 0.0), 100.0)
+        disk = min(disk + rng.random() * 0.0005, 100.0)
+        yield f"{ts:%Y-%m-%d %H:%M:%S},{cpu:.1f},{mem:.1f},{disk:.2f}\n"
+
+
+def events_lines(rng: random.Random) -> Iterator[str]:
+    yield "timestamp,file,host,source,severity,message\n"
+    sources = ["sshd", "sshd(pam_unix)", "su(pam_unix)", "ftpd", "kernel", "httpd", "cron"]
+    severities = ["info"] * 6 + ["warning"] * 2 + ["error"] * 2
+    clock = _clock(rng, datetime(2025, 4, 6))
+    while True:
+        ts = next(clock)
+        yield (f"{ts:%Y-%m-%d %H:%M:%S},service.log,{rng.choice(_HOSTS)},{rng.choice(sources)},"
+               f"{rng.choice(severities)},event {rng.randrange(100)}\n")
+
+
+GENERATORS: dict[str, Callable[[random.Random], Iterator[str]]] = {
+    "syslog": syslog_lines,
+    "apache": apache_lines,
+    "windows_tsv": windows_tsv_lines,
+    "metrics": metrics_lines,
+    "events": events_lines,
+}
+EXTENSIONS = {"metrics": "csv", "events": "csv"}
+
+
+def generate(fmt: str, size: int, path: str, seed: int = 0) -> str:
+    """Write `size` bytes (rounded up to a whole line) of `fmt` to `path`."""
+    rng = random.Random(f"{fmt}:{seed}")
+    lines = GENERATORS[fmt](rng)
+    written = 0
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        while written < size:
+            block = "".join(next(lines) for _ in range(BLOCK_LINES))
+            data = block.encode("utf-8")
+            if written + len(data) > size:
+                # finish on the first line boundary at or past `size`
+                cut = data.find(b"\n", size - written - 1) + 1
+                data = data[:cut or len(data)]
+            f.write(data.decode("utf-8"))
+            written += len(data)
+    os.replace(tmp, path)
+    return path
+
+
+def dataset(fmt: str, size: int, data_dir: str, seed: int = 0) -> str:
+    """Path of the generated `fmt` file of `size` bytes, generating it on first use."""
+    name = f"{fmt}-{format_size(size)}-s{seed}-v{GENERATOR_VERSION}.{EXTENSIONS.get(fmt, 'log')}"
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        generate(fmt, size, path, seed)
+    return path
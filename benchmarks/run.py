@@ -0,0 +1,282 @@
+# benchmarks/run.py
+"""
+Benchmark harness: time the pipeline's hot paths on generated inputs.
+
+Every case runs in its own child process on an input from generators.py,
+so imports and caches start cold and the parent can sample the peak RSS of
+the child and any workers it spawns. Each case has a setup step (imports,
+tool lookup, input sizing) and a run step; only the run is timed, and the
+best of --repeat runs is kept. Children run with telemetry switched off. Results (seconds, MB/s, items/s, peak
+RSS) go to --out. With --save-baseline they also become the baseline. A
+later run fails (exit 1) when a case is slower, or uses more memory, than
+its baseline by more than the thresholds.
+
+    python -m benchmarks.run --sizes 1MB,100MB --save-baseline
+    python -m benchmarks.run --sizes 1MB,100MB             # compare against benchmarks/baseline.json
+    python -m benchmarks.run --cases 'parse/*,aggregate/*' --sizes 10GB --repeat 1
+"""
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+
+import psutil
+
+from benchmarks.generators import dataset, format_size, parse_size
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+DATA_DIR = os.path.join(ROOT, ".cache", "bench")
+RSS_INTERVAL = 0.01
+PIECE = 1 << 20
+# no telemetry handshakes from `import app2` in the children: timings must not depend on the network
+CHILD_ENV = {
+    "AGENTOPS_API_KEY": "",
+    "AGENTOPS_ENABLED": "false",
+    "CREWAI_DISABLE_TELEMETRY": "true",
+    "OTEL_SDK_DISABLED": "true",
+}
+
+
+# ——————————————————————————————————————————————
+# Cases: setup (imports, lookups, input sizing) returns the timed call,
+# which returns the number of items it processed
+# ——————————————————————————————————————————————
+def _app2_tool(name: str) -> Callable:
+    import app2
+    tool = getattr(app2, name)
+    return getattr(tool, "func", tool)  # the plain function behind crewai's @tool
+
+
+def _plot_path(name: str) -> str:
+    return os.path.join(tempfile.mkdtemp(prefix="bench-"), f"{name}.png")
+
+
+def _csv_rows(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(block.count(b"\n") for block in iter(lambda: f.read(PIECE), b"")) - 1
+
+
+def parse(path: str, fmt: str) -> Callable[[], int]:
+    from log_parser import iter_records
+    return lambda: sum(1 for _ in iter_records(path, fmt=fmt))
+
+
+def aggregate(path: str, fmt: str) -> Callable[[], int]:
+    from log_aggregate import aggregate_file
+    return lambda: aggregate_file(path, fmt=fmt).total
+
+
+def _tool_case(name: str, *args) -> Callable[[str], Callable[[], int]]:
+    def setup(path: str) -> Callable[[], int]:
+        fn, rows = _app2_tool(name), _csv_rows(path)
+        tool_args = [_plot_path(a[len("plot:"):]) if isinstance(a, str) and a.startswith("plot:") else a
+                     for a in args]
+
+        def run():
+            fn(path, *tool_args)
+            return rows
+        return run
+    return setup
+
+
+def chunk_text(path: str) -> Callable[[], int]:
+    # chunk_text is a list over iter_chunks; the streaming form keeps 10 GB inputs out of memory
+    from rag import iter_chunks
+
+    def run():
+        with open(path, "r", encoding="utf-8") as f:
+            return sum(1 for _ in iter_chunks(iter(lambda: f.read(PIECE), "")))
+    return run
+
+
+def plot_render(_path: Optional[str] = None, renders: int = 20) -> Callable[[], int]:
+    import main
+
+    def run():
+        for _ in range(renders):
+            asyncio.run(main.view_plot_and_report(None))
+        return renders
+    return run
+
+
+class Case(NamedTuple):
+    setup: Callable[..., Callable[[], int]]
+    input_fmt: Optional[str]  # generated input; None for cases that don't scale with size
+    args: tuple = ()
+
+
+CASES = {
+    **{f"parse/{fmt}": Case(parse, fmt, (fmt,)) for fmt in ("syslog", "apache", "windows_tsv")},
+    **{f"aggregate/{fmt}": Case(aggregate, fmt, (fmt,)) for fmt in ("syslog", "apache", "windows_tsv")},
+    "anomaly_detection": Case(_tool_case("anomaly_detection"), "metrics"),
+    "seaborn_line_viz": Case(_tool_case("seaborn_line_viz", "timestamp", ["cpu_percent", "mem_percent"],
+                                        "bench", "plot:line"), "metrics"),
+    "seaborn_histogram_viz": Case(_tool_case("seaborn_histogram_viz", "cpu_percent", 50, "bench", "plot:histogram"),
+                                  "metrics"),
+    "seaborn_bar_viz": Case(_tool_case("seaborn_bar_viz", "source", "severity", 10, "bench", "plot:bar"), "events"),
+    "seaborn_heatmap_viz": Case(_tool_case("seaborn_heatmap_viz", "timestamp", "source", "severity", "bench",
+                                           "plot:heatmap"), "events"),
+    "chunk_text": Case(chunk_text, "syslog"),
+    "plot_render": Case(plot_render, None),
+}
+
+
+# ——————————————————————————————————————————————
+# Running
+# ——————————————————————————————————————————————
+def _child(name: str, path: str) -> None:
+    case = CASES[name]
+    run = case.setup(path or None, *case.args)  # imports and lookups stay outside the timing
+    t = time.perf_counter()
+    items = run()
+    print(json.dumps({"seconds": time.perf_counter() - t, "items": items}))
+
+
+def _tree_rss(proc: psutil.Process) -> int:
+    total = 0
+    for p in [proc] + proc.children(recursive=True):
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+def run_once(name: str, path: str) -> dict:
+    """Run one case in a child process; returns its timing and peak RSS (child plus its workers)."""
+    env = dict(os.environ, MPLBACKEND="Agg", PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.getenv("PYTHONPATH")])),
+               **CHILD_ENV)
+    proc = subprocess.Popen([sys.executable, "-m", "benchmarks.run", "--child", name, path or ""],
+                            cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    ps, peak = psutil.Process(proc.pid), 0
+    while proc.poll() is None:
+        try:
+            peak = max(peak, _tree_rss(ps))
+        except psutil.Error:
+            pass
+        time.sleep(RSS_INTERVAL)
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        lines = err.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit {proc.returncode}"}
+    result = json.loads(out.strip().splitlines()[-1])
+    result["peak_rss_mb"] = peak / (1 << 20)
+    return result
+
+
+def run_case(name: str, size: Optional[int], data_dir: str, repeat: int, seed: int) -> dict:
+    case = CASES[name]
+    path = dataset(case.input_fmt, size, data_dir, seed) if case.input_fmt else ""
+    runs = [run_once(name, path) for _ in range(max(1, repeat))]
+    errors = [r for r in runs if "error" in r]
+    if errors:
+        return errors[0]
+    best = min(runs, key=lambda r: r["seconds"])
+    seconds = max(best["seconds"], 1e-9)
+    result = {"seconds": seconds, "items": best["items"], "items_per_s": best["items"] / seconds,
+              "peak_rss_mb": max(r["peak_rss_mb"] for r in runs)}
+    if path:
+        result["bytes"] = os.path.getsize(path)
+        result["mb_per_s"] = result["bytes"] / (1 << 20) / seconds
+    return result
+
+
+def compare(results: dict, baseline: dict, threshold: float, rss_threshold: float,
+            min_seconds: float) -> list[str]:
+    """Descriptions of every measurement that regressed past its threshold."""
+    regressions = []
+    for key, base in baseline.items():
+        cur = results.get(key)
+        if cur is None or "error" in base:
+            continue
+        if "error" in cur:
+            regressions.append(f"{key}: failed ({cur['error']})")
+            continue
+        if cur["seconds"] > base["seconds"] * (1 + threshold) and cur["seconds"] - base["seconds"] > min_seconds:
+            regressions.append(f"{key}: {cur['seconds']:.3f}s vs baseline {base['seconds']:.3f}s "
+                               f"(+{cur['seconds'] / base['seconds'] - 1:.0%})")
+        if cur["peak_rss_mb"] > base["peak_rss_mb"] * (1 + rss_threshold):
+            regressions.append(f"{key}: peak RSS {cur['peak_rss_mb']:.0f} MB vs baseline {base['peak_rss_mb']:.0f} MB "
+                               f"(+{cur['peak_rss_mb'] / base['peak_rss_mb'] - 1:.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark parsing, aggregation, tools, chunking and /plot.")
+    parser.add_argument("--cases", default="*", help="comma-separated names or globs (default: all)")
+    parser.add_argument("--sizes", default="1MB,10MB", help="comma-separated input sizes, 1MB .. 10GB")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where generated inputs are kept")
+    parser.add_argument("--out", default=os.path.join(DATA_DIR, "results.json"))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--rss-threshold", type=float, default=0.25, help="allowed peak RSS growth")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="slowdowns smaller than this many seconds are noise")
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(*args.child)
+        return 0
+
+    patterns = [p.strip() for p in args.cases.split(",") if p.strip()]
+    names = [n for n in CASES if any(fnmatch.fnmatch(n, p) for p in patterns)]
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+
+    results = {}
+    for name in names:
+        for size in (sizes if CASES[name].input_fmt else [None]):
+            key = f"{name}@{format_size(size)}" if size else name
+            result = results[key] = run_case(name, size, args.data_dir, args.repeat, args.seed)
+            if "error" in result:
+                print(f"{key:40s} failed: {result['error']}")
+            else:
+                rate = f"{result['mb_per_s']:9.1f} MB/s" if "mb_per_s" in result else " " * 14
+                print(f"{key:40s} {result['seconds']:9.3f}s {rate} {result['items_per_s']:12.0f} items/s "
+                      f"{result['peak_rss_mb']:8.0f} MB peak")
+
+    report = {"created": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+              "machine": platform.machine(), "cpus": os.cpu_count(), "results": results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f).get("results", {})
+        report["results"] = {**baseline, **results}  # cases not run this time keep their old baseline
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold, args.rss_threshold, args.min_seconds)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"No regressions against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# dag_runner.py
+"""
+Run a crew's tasks as a dependency graph instead of one after another.
+
+Every task's `context=[...]` lists the tasks whose outputs it reads; those are
+its only dependencies. Tasks whose dependencies have finished are started on
+a thread pool of at most CREW_MAX_PARALLEL workers, so independent tasks (the
+two log analyses and the metrics collection) overlap and the run takes about
+as long as its critical path. A task gets the raw outputs of its context
+tasks joined the same way Process.sequential joins them; a task without
+`context` gets nothing, unlike the sequential process, which hands it the
+previous task's output. Tasks sharing an agent never run at the same time.
+
+Kickoff's own steps (before/after_kickoff callbacks, input interpolation,
+agent executor setup, usage metrics) are repeated here around the tasks. Some
+of them are crewai internals, so the crewai version is pinned in
+requirements.txt and the calls are checked when this module is imported.
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+
+import crewai
+from crewai import Agent, Crew, Task
+
+MAX_PARALLEL = int(os.getenv("CREW_MAX_PARALLEL", "3"))
+CONTEXT_DIVIDER = "\n\n----------\n\n"
+
+# crewai calls run_dag makes instead of Crew.kickoff
+CREWAI_API = {Crew: ("_interpolate_inputs", "calculate_usage_metrics"), Task: ("execute_sync",),
+              Agent: ("create_agent_executor",)}
+_missing = [f"{cls.__name__}.{name}" for cls, names in CREWAI_API.items() for name in names if not hasattr(cls, name)]
+if _missing:
+    raise ImportError(f"dag_runner needs {', '.join(_missing)}, which crewai {crewai.__version__} does not have; "
+                      f"install the crewai version in requirements.txt or set CREW_PROCESS=sequential")
+
+
+def task_graph(tasks: list) -> list[list[int]]:
+    """Indices of the tasks each task depends on, from its `context`."""
+    index = {id(t): i for i, t in enumerate(tasks)}
+    deps = []
+    for t in tasks:
+        context = t.context if isinstance(t.context, list) else []
+        missing = [c for c in context if id(c) not in index]
+        if missing:
+            raise ValueError(f"Task {t.name or t.description[:40]!r} depends on a task outside the crew")
+        deps.append(list(dict.fromkeys(index[id(c)] for c in context)))  # context order, as crewai joins it
+    return deps
+
+
+def critical_path(deps: list[list[int]], seconds: list[float]) -> float:
+    """Length of the longest dependency chain, given each task's duration."""
+    finish: dict[int, float] = {}
+
+    def visit(i):
+        if i not in finish:
+            finish[i] = seconds[i] + max((visit(d) for d in deps[i]), default=0.0)
+        return finish[i]
+
+    return max((visit(i) for i in range(len(deps))), default=0.0)
+
+
+class DagResult:
+    """Outputs, token usage and timings of one run; str() is the last task's output, like CrewOutput."""
+
+    def __init__(self, tasks_output: list, timings: list[dict], wall_seconds: float, critical_seconds: float,
+                 token_usage=None):
+        self.tasks_output = tasks_output
+        self.timings = timings
+        self.wall_seconds = wall_seconds
+        self.critical_seconds = critical_seconds
+        self.token_usage = token_usage
+
+    @property
+    def raw(self) -> str:
+        return self.tasks_output[-1].raw if self.tasks_output else ""
+
+    def __str__(self) -> str:
+        return self.raw
+
+
+def _label(task) -> str:
+    return task.name or task.description.strip().splitlines()[0][:60]
+
+
+def run_dag(crew, inputs: Optional[dict] = None, max_parallel: int = MAX_PARALLEL) -> DagResult:
+    """Kick off `crew` with its tasks scheduled by dependency rather than list order."""
+    inputs = dict(inputs or {})
+    for callback in getattr(crew, "before_kickoff_callbacks", None) or []:
+        inputs = callback(inputs)
+    crew._interpolate_inputs(inputs)
+    for agent in crew.agents:
+        # as Crew.kickoff does, so tools, callbacks and token counting see the crew
+        agent.crew = crew
+        if not agent.function_calling_llm:
+            agent.function_calling_llm = crew.function_calling_llm
+        if not agent.step_callback:
+            agent.step_callback = crew.step_callback
+        agent.create_agent_executor()
+
+    tasks = crew.tasks
+    deps = task_graph(tasks)
+    agent_locks: dict[int, threading.Lock] = {}
+    for t in tasks:
+        agent_locks.setdefault(id(t.agent), threading.Lock())
+
+    t0 = time.perf_counter()
+    timings: list[Optional[dict]] = [None] * len(tasks)
+
+    def run(i):
+        task = tasks[i]
+        context = CONTEXT_DIVIDER.join(tasks[d].output.raw for d in deps[i])
+        with agent_locks[id(task.agent)]:
+            start = time.perf_counter()
+            output = task.execute_sync(agent=task.agent, context=context or None,
+                                       tools=task.tools or task.agent.tools)
+            end = time.perf_counter()
+        timings[i] = {"task": _label(task), "start": start - t0, "end": end - t0, "seconds": end - start}
+        return output
+
+    outputs: dict[int, object] = {}
+    pending = list(range(len(tasks)))
+    running: dict = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel), thread_name_prefix="crew-task") as pool:
+        while pending or running:
+            ready = [i for i in pending if all(d in outputs for d in deps[i])]
+            for i in ready[:max(1, max_parallel) - len(running)]:
+                pending.remove(i)
+                running[pool.submit(run, i)] = i
+            if not running:
+                raise ValueError(f"Dependency cycle among tasks: {[_label(tasks[i]) for i in pending]}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                outputs[running.pop(future)] = future.result()
+
+    crew.usage_metrics = crew.calculate_usage_metrics()
+    result = DagResult([outputs[i] for i in range(len(tasks))], timings, time.perf_counter() - t0,
+                       critical_path(deps, [t["seconds"] for t in timings]), crew.usage_metrics)
+    for callback in getattr(crew, "after_kickoff_callbacks", None) or []:
+        result = callback(result)
+    return result
@@ -0,0 +1,102 @@
+# embedding_cache.py
+"""
+Persistent embedding cache for rag.py.
+
+Vectors are stored as float32 blobs in a small SQLite file keyed by
+sha256(model name + chunk text), so a re-uploaded or partly edited README
+only sends the chunks the model has not seen before. `embed_texts` wraps any
+LangChain-style embeddings object: it dedupes, serves hits from the cache and
+embeds the misses in batches of `batch_size`.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./.cache/embeddings.sqlite")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+_SQLITE_MAX_VARS = 900
+
+
+def content_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, dim INTEGER, vec BLOB)")
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> dict:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), _SQLITE_MAX_VARS):
+                part = keys[i:i + _SQLITE_MAX_VARS]
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part)
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Iterable[tuple]) -> None:
+        rows = [(key, len(vec), np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0, "entries": entries}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def embed_texts(model, model_name: str, texts: Sequence[str], batch_size: int = EMBED_BATCH_SIZE,
+                cache: Optional[EmbeddingCache] = None) -> list[list[float]]:
+    """Embeddings for `texts` in order; cached vectors skip the model entirely."""
+    keys = [content_key(model_name, t) for t in texts]
+    found = cache.get_many(list(dict.fromkeys(keys))) if cache is not None else {}
+
+    todo = {}  # key -> text, deduped, in first-seen order
+    for key, text in zip(keys, texts):
+        if key not in found:
+            todo.setdefault(key, text)
+    if cache is not None:
+        cache.hits += len(keys) - sum(1 for k in keys if k in todo)
+        cache.misses += len(todo)
+
+    pending = list(todo.items())
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i:i + batch_size]
+        vectors = model.embed_documents([text for _, text in batch])
+        fresh = [(key, np.asarray(vec, dtype=np.float32)) for (key, _), vec in zip(batch, vectors)]
+        found.update(fresh)
+        if cache is not None:
+            cache.put_many(fresh)
+    return [found[k].tolist() for k in keys]
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> EmbeddingCache:
+    """Process-wide cache, opened on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
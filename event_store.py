@@ -0,0 +1,231 @@
+# event_store.py
+"""
+Time-partitioned columnar store for parsed log events and resource metrics.
+
+Datasets live under STORE_DIR as Parquet files partitioned by hour:
+
+    store/<dataset>/date=2025-04-06/hour=04/part-<id>.parquet
+
+Readers prune whole partitions by time range before touching any file and only
+read the columns they ask for. The analysis tools address a dataset as
+`store://<dataset>` wherever they used to take a CSV path.
+"""
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from log_parser import LogRecord
+
+STORE_DIR = os.getenv("LOG_EVENT_STORE", "./store")
+URI_PREFIX = "store://"
+
+EVENT_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("us")),
+    ("file", pa.string()),
+    ("fmt", pa.string()),
+    ("host", pa.string()),
+    ("source", pa.string()),
+    ("pid", pa.int64()),
+    ("event_id", pa.int64()),
+    ("severity", pa.string()),
+    ("message", pa.string()),
+])
+
+METRICS_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("us")),
+    ("cpu_percent", pa.float64()),
+    ("mem_percent", pa.float64()),
+    ("disk_percent", pa.float64()),
+])
+
+SCHEMAS = {"events": EVENT_SCHEMA, "metrics": METRICS_SCHEMA}
+
+TimeBound = Union[datetime, str, None]
+
+
+def is_store_uri(path: str) -> bool:
+    return path.startswith(URI_PREFIX)
+
+
+def dataset_name(uri: str) -> str:
+    return uri[len(URI_PREFIX):]
+
+
+def _partition_dir(dataset: str, hour: Optional[datetime]) -> str:
+    if hour is None:
+        return os.path.join(STORE_DIR, dataset, "date=none")
+    return os.path.join(STORE_DIR, dataset, f"date={hour:%Y-%m-%d}", f"hour={hour:%H}")
+
+
+def _write_part(directory: str, table: pa.Table, replace: bool = False) -> None:
+    if replace and os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory, exist_ok=True)
+    name = f"part-{uuid.uuid4().hex}.parquet"
+    tmp = os.path.join(directory, f".{name}.tmp")
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, os.path.join(directory, name))
+
+
+def _as_datetime(value: TimeBound) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        return pd.Timestamp(value).to_pydatetime()
+    return value
+
+
+# ——————————————————————————————————————————————
+# Writing
+# ——————————————————————————————————————————————
+def write_frame(dataset: str, df: pd.DataFrame, time_col: str = "timestamp", replace: bool = False) -> int:
+    """Write a DataFrame into hourly partitions; `replace` overwrites the hours it touches."""
+    if df.empty:
+        return 0
+    hours = pd.to_datetime(df[time_col]).dt.floor("h")
+    for hour, part in df.groupby(hours, sort=True):
+        table = pa.Table.from_pandas(part, preserve_index=False)
+        _write_part(_partition_dir(dataset, hour.to_pydatetime()), table, replace=replace)
+    return len(df)
+
+
+class EventWriter:
+    """Buffers parsed `LogRecord`s and flushes them to hourly partitions in batches."""
+
+    def __init__(self, dataset: str, file: str, batch_size: int = 100_000):
+        self.dataset = dataset
+        self.file = file
+        self.batch_size = batch_size
+        self._rows: list[LogRecord] = []
+        self.written = 0
+
+    def add(self, rec: LogRecord) -> None:
+        self._rows.append(rec)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        by_hour = {}
+        for rec in self._rows:
+            hour = rec.timestamp.replace(minute=0, second=0, microsecond=0) if rec.timestamp else None
+            by_hour.setdefault(hour, []).append(rec)
+        for hour, recs in by_hour.items():
+            columns = {name: [getattr(r, name) for r in recs] for name in LogRecord._fields}
+            columns["file"] = [self.file] * len(recs)
+            _write_part(_partition_dir(self.dataset, hour), pa.table(columns, schema=EVENT_SCHEMA))
+        self.written += len(self._rows)
+        self._rows = []
+
+    def close(self) -> None:
+        self.flush()
+
+
+def delete_file(dataset: str, file: str) -> int:
+    """Remove every row written for `file` (e.g. before a rotated log is ingested again)."""
+    removed = 0
+    for path in partition_files(dataset):
+        table = pq.read_table(path)
+        if "file" not in table.column_names:
+            continue
+        kept = table.filter(pc.not_equal(table["file"], pa.scalar(file)))
+        if kept.num_rows == table.num_rows:
+            continue
+        removed += table.num_rows - kept.num_rows
+        if kept.num_rows:
+            _write_part(os.path.dirname(path), kept)
+        os.remove(path)
+    return removed
+
+
+def write_records(dataset: str, file: str, records: Iterable[LogRecord]) -> int:
+    writer = EventWriter(dataset, file)
+    for rec in records:
+        writer.add(rec)
+    writer.close()
+    return writer.written
+
+
+# ——————————————————————————————————————————————
+# Reading
+# ——————————————————————————————————————————————
+def partition_files(dataset: str, start: TimeBound = None, end: TimeBound = None) -> list[str]:
+    """Parquet files whose hour partition overlaps [start, end]."""
+    start, end = _as_datetime(start), _as_datetime(end)
+    root = os.path.join(STORE_DIR, dataset)
+    if not os.path.isdir(root):
+        return []
+    files = []
+    for date_dir in sorted(os.listdir(root)):
+        if date_dir == "date=none":
+            if start is None and end is None:
+                hour_dirs = [os.path.join(root, date_dir)]
+            else:
+                continue
+        else:
+            day = datetime.strptime(date_dir[len("date="):], "%Y-%m-%d")
+            hour_dirs = []
+            for hour_dir in sorted(os.listdir(os.path.join(root, date_dir))):
+                hour = day + timedelta(hours=int(hour_dir[len("hour="):]))
+                if start is not None and hour + timedelta(hours=1) <= start:
+                    continue
+                if end is not None and hour > end:
+                    continue
+                hour_dirs.append(os.path.join(root, date_dir, hour_dir))
+        for d in hour_dirs:
+            files += [os.path.join(d, fn) for fn in sorted(os.listdir(d)) if fn.endswith(".parquet")]
+    return files
+
+
+def empty_frame(dataset: str, columns: Optional[list[str]] = None, time_col: str = "timestamp") -> pd.DataFrame:
+    """Zero-row frame with the dataset's dtypes, so `.dt` and string ops still work on it."""
+    schema = SCHEMAS.get(dataset, pa.schema([]))
+    names = columns or schema.names
+    frame = schema.empty_table().to_pandas()
+    return pd.DataFrame({
+        name: frame[name] if name in frame else
+        pd.Series(dtype="datetime64[ns]" if name == time_col else str)
+        for name in names
+    })
+
+
+def read_frame(dataset: str, columns: Optional[list[str]] = None, start: TimeBound = None,
+               end: TimeBound = None, time_col: str = "timestamp") -> pd.DataFrame:
+    """Read a dataset with column projection and partition pruning on [start, end]."""
+    start, end = _as_datetime(start), _as_datetime(end)
+    files = partition_files(dataset, start, end)
+    if not files:
+        return empty_frame(dataset, columns, time_col)
+    dataset_ = ds.dataset(files, format="parquet")
+    if columns is not None:
+        columns = [c for c in columns if c in dataset_.schema.names]
+    filt = None
+    if start is not None:
+        filt = ds.field(time_col) >= pa.scalar(start, type=pa.timestamp("us"))
+    if end is not None:
+        upper = ds.field(time_col) <= pa.scalar(end, type=pa.timestamp("us"))
+        filt = upper if filt is None else filt & upper
+    table = dataset_.to_table(columns=columns, filter=filt)
+    return table.to_pandas()
+
+
+def compact(dataset: str) -> None:
+    """Merge the small part files that incremental appends leave in each partition."""
+    root = os.path.join(STORE_DIR, dataset)
+    for dirpath, _, filenames in os.walk(root):
+        parts = [os.path.join(dirpath, fn) for fn in filenames if fn.endswith(".parquet")]
+        if len(parts) < 2:
+            continue
+        table = pa.concat_tables(pq.read_table(p) for p in parts)
+        _write_part(dirpath, table)
+        for p in parts:
+            os.remove(p)
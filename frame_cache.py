@@ -0,0 +1,77 @@
+# frame_cache.py
+"""
+Process-wide, size-bounded LRU cache of loaded DataFrames.
+
+The viz and anomaly tools read the same metrics/trends data several times per
+crew run. Keys include the (path, mtime, size) of every file behind a frame
+plus the parse options, so an edited file is simply a new key. Cached frames
+are shared between callers and must be treated as read-only.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = int(os.getenv("FRAME_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+
+def files_signature(paths: Iterable[str]) -> tuple:
+    """(path, mtime_ns, size) for each file; part of every cache key."""
+    sig = []
+    for path in paths:
+        st = os.stat(path)
+        sig.append((os.path.abspath(path), st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+class FrameCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[Hashable, tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        df = loader()
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return df
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (df, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+        return df
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+frame_cache = FrameCache()
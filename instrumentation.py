@@ -0,0 +1,295 @@
+# instrumentation.py
+"""
+Local, offline timing of pipeline runs.
+
+While a run is open (`run_log`), every crew task, `@timed` tool call and LLM
+call becomes a span holding its wall time, the CPU time of its thread, the
+peak process RSS seen while it ran and any extra fields (token counts, cache
+hits). Spans know the task they ran under, even when the DAG runner executes
+tasks on several threads. On close the run is written as one JSON file under
+RUN_LOG_DIR. Only the newest KEEP_RUNS files are kept. A small summary.json
+beside them keeps the lifetime run counts by status and the latest run id.
+main.py renders the summary plus the latest run as Prometheus text on
+/metrics, and the run logs as a timing table on /plot.
+
+RSS is process-wide, so tasks that overlap share their peaks.
+"""
+import contextvars
+import functools
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+import psutil
+
+RUN_LOG_DIR = os.getenv("RUN_LOG_DIR", "./.cache/runs")
+RSS_INTERVAL = float(os.getenv("RUN_LOG_RSS_INTERVAL", "0.05"))
+KEEP_RUNS = int(os.getenv("RUN_LOG_KEEP", "200"))
+SUMMARY_NAME = "summary.json"
+
+_current_task: contextvars.ContextVar = contextvars.ContextVar("current_task", default=None)
+
+
+class RunLog:
+    def __init__(self, name: str = "pipeline", directory: str = RUN_LOG_DIR, rss_interval: float = RSS_INTERVAL):
+        self.name = name
+        self.directory = directory
+        self.run_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.started = time.time()
+        self.spans: list[dict] = []
+        self._proc = psutil.Process()
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._peak_rss = self._proc.memory_info().rss
+        self._open: dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, args=(rss_interval,), daemon=True,
+                                         name="run-log-rss")
+        self._watcher.start()
+
+    def _note_rss(self, rss: int) -> None:
+        with self._lock:
+            self._peak_rss = max(self._peak_rss, rss)
+            for rec in self._open.values():
+                rec["peak_rss"] = max(rec["peak_rss"], rss)
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self._note_rss(self._proc.memory_info().rss)
+
+    @contextmanager
+    def span(self, kind: str, name: str, **fields) -> Iterator[dict]:
+        """Time the body; the yielded dict can be given more fields (tokens, cache hit) before it closes."""
+        rec = {"kind": kind, "name": name, "task": _current_task.get(), "start": time.perf_counter() - self._t0,
+               "peak_rss": self._proc.memory_info().rss, **fields}
+        with self._lock:
+            self._open[id(rec)] = rec
+        token = _current_task.set(name) if kind == "task" else None
+        cpu0, t0 = time.thread_time(), time.perf_counter()
+        rec["ok"] = False
+        try:
+            yield rec
+            rec["ok"] = True
+        finally:
+            rec["wall"] = time.perf_counter() - t0
+            rec["cpu"] = time.thread_time() - cpu0
+            self._note_rss(self._proc.memory_info().rss)
+            with self._lock:
+                self._open.pop(id(rec), None)
+                self.spans.append(rec)
+            if token is not None:
+                _current_task.reset(token)
+
+    def to_dict(self, status: str) -> dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+            peak = self._peak_rss
+        return {
+            "run_id": self.run_id, "name": self.name, "status": status,
+            "started": datetime.fromtimestamp(self.started).isoformat(sep=" ", timespec="seconds"),
+            "wall": time.perf_counter() - self._t0, "cpu": time.process_time() - self._cpu0,
+            "peak_rss": peak, "spans": spans,
+        }
+
+    def close(self, status: str = "ok") -> str:
+        """Stop sampling and write the run log; returns its path."""
+        self._stop.set()
+        self._watcher.join()
+        os.makedirs(self.directory, exist_ok=True)
+        with _summary_lock:
+            summary = load_summary(self.directory)  # before this run's file exists, so seeding can't count it
+            path = os.path.join(self.directory, f"{self.run_id}.json")
+            _write_json(path, self.to_dict(status), indent=1)
+            summary["runs_total"][status] = summary["runs_total"].get(status, 0) + 1
+            summary["latest"] = self.run_id
+            _write_json(os.path.join(self.directory, SUMMARY_NAME), summary)
+        for old in run_log_paths(self.directory)[:-KEEP_RUNS]:
+            os.remove(old)
+        return path
+
+
+def _write_json(path: str, data: dict, **kwargs) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp, path)
+
+
+# — active run —
+_active: Optional[RunLog] = None
+_active_lock = threading.Lock()
+_summary_lock = threading.Lock()  # runs in other processes are serialized by main.py's pipeline_lock
+
+
+@contextmanager
+def run_log(name: str = "pipeline", directory: str = RUN_LOG_DIR) -> Iterator[RunLog]:
+    """Record spans opened anywhere in this process until the block exits."""
+    global _active
+    run = RunLog(name, directory)
+    with _active_lock:
+        previous, _active = _active, run
+    status = "error"
+    try:
+        yield run
+        status = "ok"
+    finally:
+        with _active_lock:
+            _active = previous
+        run.close(status)
+
+
+@contextmanager
+def span(kind: str, name: str, **fields) -> Iterator[dict]:
+    """RunLog.span on the active run; outside a run the body just runs."""
+    run = _active
+    if run is None:
+        yield dict(fields)
+        return
+    with run.span(kind, name, **fields) as rec:
+        yield rec
+
+
+def timed(name: str, kind: str = "tool"):
+    """Decorator recording each call of a function as a span. functools.wraps keeps the
+    signature and docstring, so it can sit under crewai's @tool."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# — reading run logs —
+def run_log_paths(directory: str = RUN_LOG_DIR) -> list[str]:
+    """Run logs, oldest first (run ids start with their timestamp)."""
+    return sorted(p for p in glob.glob(os.path.join(directory, "*.json")) if os.path.basename(p) != SUMMARY_NAME)
+
+
+def load_runs(n: Optional[int] = None, directory: str = RUN_LOG_DIR) -> list[dict]:
+    runs = []
+    for path in run_log_paths(directory)[-n if n else 0:]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                runs.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return runs
+
+
+def latest_run(directory: str = RUN_LOG_DIR) -> Optional[dict]:
+    runs = load_runs(1, directory)
+    return runs[-1] if runs else None
+
+
+def load_summary(directory: str = RUN_LOG_DIR) -> dict:
+    """{"runs_total": {status: count}, "latest": run_id}; counts survive the pruning of old run logs.
+    Without a summary yet, it is seeded from the run logs on disk."""
+    try:
+        with open(os.path.join(directory, SUMMARY_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        runs = load_runs(directory=directory)
+        counts: dict = {}
+        for r in runs:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        return {"runs_total": counts, "latest": runs[-1]["run_id"] if runs else None}
+
+
+def task_breakdown(run: dict) -> list[dict]:
+    """One row per task: its own timings plus the tool and LLM calls made under it."""
+    rows, by_task = [], {}
+    for s in run["spans"]:
+        if s["kind"] == "task":
+            row = {"task": s["name"], "start": s["start"], "wall": s["wall"], "cpu": s["cpu"],
+                   "peak_rss": s["peak_rss"], "ok": s["ok"], "tool_calls": 0, "tool_seconds": 0.0,
+                   "llm_calls": 0, "llm_cached": 0, "llm_seconds": 0.0, "prompt_tokens": 0,
+                   "completion_tokens": 0}
+            rows.append(row)
+            by_task[s["name"]] = row
+    for s in run["spans"]:
+        row = by_task.get(s["task"])
+        if row is None:
+            continue
+        if s["kind"] == "tool":
+            row["tool_calls"] += 1
+            row["tool_seconds"] += s["wall"]
+        elif s["kind"] == "llm":
+            row["llm_calls"] += 1
+            row["llm_cached"] += bool(s.get("cached"))
+            row["llm_seconds"] += s["wall"]
+            row["prompt_tokens"] += s.get("prompt_tokens", 0)
+            row["completion_tokens"] += s.get("completion_tokens", 0)
+    return rows
+
+
+def _labels(**labels) -> str:
+    def escape(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def prometheus_text(directory: str = RUN_LOG_DIR) -> str:
+    """Prometheus exposition of the latest run (per task, tool and model) plus lifetime run counts.
+    Reads the summary and one run log, however many runs are on disk."""
+    summary = load_summary(directory)
+    out = []
+
+    def metric(name, kind, help_text, samples):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(f"{name}{_labels(**labels)} {value:.6g}" for labels, value in samples)
+
+    metric("pipeline_runs_total", "counter", "Pipeline runs finished, by status.",
+           [({"status": s}, n) for s, n in sorted(summary["runs_total"].items())])
+    run = None
+    if summary["latest"]:
+        try:
+            with open(os.path.join(directory, f"{summary['latest']}.json"), "r", encoding="utf-8") as f:
+                run = json.load(f)
+        except (OSError, ValueError):
+            run = latest_run(directory)
+    if run is None:
+        return "\n".join(out) + "\n"
+
+    rid = {"run_id": run["run_id"]}
+    metric("pipeline_last_run_seconds", "gauge", "Wall time of the latest run.", [(rid, run["wall"])])
+    metric("pipeline_last_run_cpu_seconds", "gauge", "Process CPU time of the latest run.", [(rid, run["cpu"])])
+    metric("pipeline_last_run_peak_rss_bytes", "gauge", "Peak RSS during the latest run.", [(rid, run["peak_rss"])])
+
+    rows = task_breakdown(run)
+    metric("pipeline_task_seconds", "gauge", "Wall time per task in the latest run.",
+           [({"task": r["task"]}, r["wall"]) for r in rows])
+    metric("pipeline_task_cpu_seconds", "gauge", "CPU time of the task's thread in the latest run.",
+           [({"task": r["task"]}, r["cpu"]) for r in rows])
+    metric("pipeline_task_peak_rss_bytes", "gauge", "Peak process RSS while the task ran.",
+           [({"task": r["task"]}, r["peak_rss"]) for r in rows])
+    metric("pipeline_task_llm_tokens", "gauge", "LLM tokens per task in the latest run.",
+           [({"task": r["task"], "type": t}, r[f"{t}_tokens"]) for r in rows for t in ("prompt", "completion")])
+
+    for kind, label in (("tool", "tool"), ("llm", "model")):
+        calls: dict = {}
+        for s in run["spans"]:
+            if s["kind"] == kind:
+                key = (s["name"], str(bool(s.get("cached"))).lower()) if kind == "llm" else (s["name"],)
+                n, total, cpu = calls.get(key, (0, 0.0, 0.0))
+                calls[key] = (n + 1, total + s["wall"], cpu + s["cpu"])
+        name = f"pipeline_{kind}_call_seconds"
+        out.append(f"# HELP {name} Latency of {kind} calls in the latest run.")
+        out.append(f"# TYPE {name} summary")
+        for key, (n, total, _) in sorted(calls.items()):
+            labels = {label: key[0], "cached": key[1]} if kind == "llm" else {label: key[0]}
+            out.append(f"{name}_sum{_labels(**labels)} {total:.6g}")
+            out.append(f"{name}_count{_labels(**labels)} {n}")
+        if kind == "tool":
+            metric("pipeline_tool_cpu_seconds", "gauge", "CPU time spent in each tool in the latest run.",
+                   [({"tool": key[0]}, cpu) for key, (_, _, cpu) in sorted(calls.items())])
+    return "\n".join(out) + "\n"
@@ -0,0 +1,161 @@
+# job_queue.py
+"""
+Bounded background job queue for the FastAPI endpoints.
+
+`/trigger` and `/upload` used to run the whole pipeline inside the request.
+Now they submit a job and return its id at once; worker threads run the
+jobs, a full queue is rejected instead of piling up, and clients poll
+`/jobs/{id}` for status and result or cancel with DELETE. With the default
+single worker, jobs run strictly in submission order.
+A job's `cleanup` runs exactly once however it ends, including when it is
+cancelled before a worker ever picks it up.
+"""
+import os
+import queue
+import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "16"))
+JOB_HISTORY = 200
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str, fn: Callable[["Job"], Any], cleanup: Optional[Callable[[], None]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.fn = fn
+        self._cleanup = cleanup
+        self._cleanup_lock = threading.Lock()
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._cancel = threading.Event()
+        self._proc: Optional[subprocess.Popen] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def run_subprocess(self, args: list[str], **kwargs) -> subprocess.CompletedProcess:
+        """subprocess.run that the job's cancellation can terminate."""
+        if self.cancelled:
+            raise JobCancelled()
+        self._proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, **kwargs)
+        try:
+            out, _ = self._proc.communicate()
+        finally:
+            proc, self._proc = self._proc, None
+        if self.cancelled:
+            raise JobCancelled()
+        return subprocess.CompletedProcess(args, proc.returncode, out, None)
+
+    def run_cleanup(self) -> None:
+        with self._cleanup_lock:
+            cleanup, self._cleanup = self._cleanup, None
+        if cleanup is not None:
+            cleanup()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    def __init__(self, workers: int = 1, max_queued: int = JOB_MAX_QUEUED):
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=max_queued)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], cleanup: Optional[Callable[[], None]] = None) -> Job:
+        job = Job(kind, fn, cleanup)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise QueueFull(f"{self._queue.maxsize} jobs already queued")
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > JOB_HISTORY:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status in (QUEUED, RUNNING):
+                    break
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel()
+        if job.status == QUEUED:
+            job.status = CANCELLED
+            job.finished = time.time()
+            job.run_cleanup()  # it may sit in the queue for a while yet
+        return job
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job.cancelled:
+                    continue
+                job.status, job.started = RUNNING, time.time()
+                try:
+                    job.result = job.fn(job)
+                    job.status = CANCELLED if job.cancelled else SUCCEEDED
+                except JobCancelled:
+                    job.status = CANCELLED
+                except Exception as e:
+                    if job.cancelled:  # e.g. its cleanup ran while it was starting
+                        job.status = CANCELLED
+                    else:
+                        job.status, job.error = FAILED, f"{type(e).__name__}: {e}"
+                job.finished = time.time()
+            finally:
+                job.run_cleanup()
+                self._queue.task_done()
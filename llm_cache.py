@@ -0,0 +1,194 @@
+# llm_cache.py
+"""
+Persistent, content-addressed cache of LLM completions for the crews.
+
+`CachingLLM` is a drop-in crewai `LLM` whose `call` is keyed on the model
+name, the full message list (rendered task description plus the tool-call
+transcript so far), the tool schemas, and sha256 content hashes of the
+crew's input files. When nothing changed, a rerun replays every completion
+from disk without calling the model. Tasks still run, so their
+`output_file` artifacts are written again from the replayed outputs.
+Entries live in SQLite and the least recently used ones are evicted once the
+cache exceeds LLM_CACHE_MAX_MB.
+"""
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+
+from crewai import LLM
+
+from instrumentation import span
+
+try:
+    from litellm import token_counter
+except ImportError:  # crewai pulls litellm in; fall back to a rough estimate without it
+    token_counter = None
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./.cache/llm_cache.sqlite")
+MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024
+ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+
+_file_hashes: dict = {}  # (path, size, mtime_ns) -> sha256
+_file_hashes_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _file_hashes_lock:
+        digest = _file_hashes.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        with _file_hashes_lock:
+            _file_hashes[key] = digest
+    return digest
+
+
+def count_tokens(model: str, messages=None, text: Optional[str] = None) -> int:
+    if token_counter is not None:
+        try:
+            return token_counter(model=model, messages=messages, text=text)
+        except Exception:
+            pass
+    chars = len(text or "") + sum(len(str(m.get("content", ""))) for m in messages or [] if isinstance(m, dict))
+    return chars // 4
+
+
+def inputs_fingerprint(paths: Iterable[str]) -> str:
+    """One hash over the contents of `paths` (directories are walked, glob patterns expanded)."""
+    files = []
+    for path in paths:
+        if glob.has_magic(path):
+            files += [p for p in glob.glob(path) if os.path.isfile(p)]
+        elif os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, n) for n in names]
+        elif os.path.exists(path):
+            files.append(path)
+    h = hashlib.sha256()
+    for path in sorted(set(os.path.abspath(p) for p in files)):
+        h.update(f"{path}\0{file_digest(path)}\n".encode())
+    return h.hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, model TEXT, "
+                           "response TEXT, size INTEGER, created REAL, last_used REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, messages, tools=None, inputs: str = "") -> str:
+        payload = json.dumps({"model": model, "messages": messages, "tools": tools, "inputs": inputs},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?)",
+                               (key, model, response, len(response.encode("utf-8")), now, now))
+            self._evict()
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM completions ORDER BY last_used"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM completions WHERE key = ?", victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions").fetchone()
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "entries": entries, "bytes": size}
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM completions")
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Process-wide cache, opened on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+class CachingLLM(LLM):
+    """crewai LLM that replays completions for unchanged prompts and inputs."""
+
+    def __init__(self, *args, input_paths: Iterable[str] = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.input_paths = list(input_paths)
+
+    def set_inputs(self, paths: Iterable[str]) -> None:
+        """Files whose contents are part of every cache key (the logs the crew analyzes)."""
+        self.input_paths = list(paths)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        # each call is a span in the active run log: latency, tokens, and whether it was replayed
+        with span("llm", self.model) as rec:
+            response = self._cached_call(messages, tools, callbacks, available_functions, rec, **kwargs)
+        prompt = messages if isinstance(messages, list) else [{"role": "user", "content": messages}]
+        rec["prompt_tokens"] = count_tokens(self.model, messages=prompt)
+        rec["completion_tokens"] = count_tokens(self.model, text=response) if isinstance(response, str) else 0
+        return response
+
+    def _cached_call(self, messages, tools, callbacks, available_functions, rec, **kwargs):
+        rec["cached"] = False
+        if not ENABLED or available_functions:
+            # function calls execute inside LLM.call, so their results are not safe to replay
+            return super().call(messages, tools=tools, callbacks=callbacks,
+                                available_functions=available_functions, **kwargs)
+        cache = get_llm_cache()
+        key = cache.key(self.model, messages, tools, inputs_fingerprint(self.input_paths))
+        cached = cache.get(key)
+        if cached is not None:
+            rec["cached"] = True
+            return cached
+        response = super().call(messages, tools=tools, callbacks=callbacks, **kwargs)
+        if isinstance(response, str) and response:
+            cache.put(key, self.model, response)
+        return response
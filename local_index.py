@@ -0,0 +1,362 @@
+# local_index.py
+"""
+In-process vector index with the subset of the Pinecone Index API rag.py uses.
+
+Vectors live in a memory-mapped float32 file that grows by doubling; ids and
+metadata are an append-only JSONL log replayed on open, so upserts never
+rewrite what is already on disk:
+
+    <path>/index.json      dimension, metric
+    <path>/vectors.f32     row-major float32, one row per slot
+    <path>/records.jsonl   {"id", "row", "metadata"} / {"id", "deleted": true}
+
+`query` scores either every candidate row (mode="exact") or only the rows in
+the `nprobe` closest IVF cells (mode="ivf"); the k-means cells are trained
+once the index is large enough and retrained whenever it has doubled since.
+`filter={"file_name": ...}` is answered from an inverted index before any
+vector is touched.
+"""
+import json
+import os
+import threading
+from typing import Any, Iterable, NamedTuple, Optional
+
+import numpy as np
+
+INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "./store/vectors")
+DEFAULT_MODE = os.getenv("LOCAL_INDEX_MODE", "exact")
+IVF_MIN_ROWS = 4096
+IVF_TRAIN_SAMPLE = 16_384
+INDEXED_FIELDS = ("file_name",)
+
+
+class Match(NamedTuple):
+    id: str
+    score: float
+    metadata: Optional[dict]
+
+
+class QueryResult(NamedTuple):
+    matches: list
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def _kmeans(x: np.ndarray, k: int, iters: int = 8, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit rows; returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        sums = np.zeros_like(centroids)
+        present = np.flatnonzero(counts)
+        sums[present] = np.add.reduceat(x[order], np.concatenate([[0], np.cumsum(counts)[:-1]])[present])
+        empty = counts == 0
+        sums[empty] = x[rng.choice(len(x), size=int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _matches_filter(metadata: dict, flt: dict) -> bool:
+    for key, cond in flt.items():
+        value = metadata.get(key)
+        if isinstance(cond, dict):
+            for op, arg in cond.items():
+                if op == "$eq" and value != arg:
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$nin" and value in arg:
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+class LocalVectorIndex:
+    def __init__(self, path: str, dimension: Optional[int] = None, metric: str = "cosine",
+                 mode: str = DEFAULT_MODE, nlist: Optional[int] = None, nprobe: int = 8):
+        if metric not in ("cosine", "dotproduct"):
+            raise ValueError(f"unsupported metric {metric!r}")
+        if mode not in ("exact", "ivf"):
+            raise ValueError(f"unsupported mode {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, "index.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+            if dimension is not None and dimension != info["dimension"]:
+                raise ValueError(f"index at {path} has dimension {info['dimension']}, not {dimension}")
+            self.dimension, self.metric = info["dimension"], info["metric"]
+        else:
+            if dimension is None:
+                raise ValueError(f"no index at {path}; a dimension is needed to create one")
+            self.dimension, self.metric = dimension, metric
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dimension": dimension, "metric": metric}, f)
+
+        self._vec_path = os.path.join(path, "vectors.f32")
+        self._log_path = os.path.join(path, "records.jsonl")
+        self._ids: list[Optional[str]] = []        # row -> id (None once deleted)
+        self._meta: list[Optional[dict]] = []
+        self._rows: dict[str, int] = {}            # id -> row
+        self._free: list[int] = []
+        self._postings: dict[str, dict[Any, set]] = {f: {} for f in INDEXED_FIELDS}
+        self._vectors = self._open_vectors()
+        self._replay()
+        self._log = open(self._log_path, "a", encoding="utf-8")
+        self._centroids: Optional[np.ndarray] = None
+        self._assign: Optional[np.ndarray] = None
+        self._trained_rows = 0
+
+    # — storage —
+    def _open_vectors(self, capacity: int = 0) -> np.memmap:
+        row_bytes = self.dimension * 4
+        size = os.path.getsize(self._vec_path) if os.path.exists(self._vec_path) else 0
+        capacity = max(capacity, size // row_bytes, 1024)
+        if size < capacity * row_bytes:
+            with open(self._vec_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        return np.memmap(self._vec_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows > len(self._vectors):
+            self._vectors.flush()
+            self._vectors = self._open_vectors(max(rows, 2 * len(self._vectors)))
+
+    def _replay(self) -> None:
+        if not os.path.exists(self._log_path):
+            return
+        with open(self._log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash
+                if rec.get("deleted"):
+                    self._drop(rec["id"])
+                else:
+                    self._place(rec["id"], rec["row"], rec.get("metadata") or {})
+        self._free = [r for r, i in enumerate(self._ids) if i is None]
+
+    def _place(self, vid: str, row: int, metadata: dict) -> None:
+        old = self._rows.get(vid)
+        if old is not None and old != row:
+            self._drop(vid)
+        while len(self._ids) <= row:
+            self._ids.append(None)
+            self._meta.append(None)
+        self._unpost(row)
+        self._ids[row], self._meta[row] = vid, metadata
+        self._rows[vid] = row
+        for field in INDEXED_FIELDS:
+            if field in metadata:
+                self._postings[field].setdefault(metadata[field], set()).add(row)
+
+    def _unpost(self, row: int) -> None:
+        meta = self._meta[row]
+        if not meta:
+            return
+        for field in INDEXED_FIELDS:
+            rows = self._postings[field].get(meta.get(field))
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._postings[field][meta.get(field)]
+
+    def _drop(self, vid: str) -> Optional[int]:
+        row = self._rows.pop(vid, None)
+        if row is not None:
+            self._unpost(row)
+            self._ids[row], self._meta[row] = None, None
+            if getattr(self, "_assign", None) is not None and row < len(self._assign):
+                self._assign[row] = -1
+        return row
+
+    # — Pinecone-compatible API —
+    def upsert(self, vectors: Iterable, namespace: Optional[str] = None) -> dict:
+        """Insert or overwrite vectors given as (id, values[, metadata]) tuples or dicts."""
+        items = []
+        for v in vectors:
+            if isinstance(v, dict):
+                items.append((v["id"], v["values"], v.get("metadata") or {}))
+            else:
+                items.append((v[0], v[1], v[2] if len(v) > 2 else {}))
+        # an id repeated within the batch keeps its last vector, like sequential upserts would
+        items = list({vid: (vid, values, metadata) for vid, values, metadata in items}.values())
+        if not items:
+            return {"upserted_count": 0}
+        values = np.asarray([values for _, values, _ in items], dtype=np.float32)
+        if values.shape[1] != self.dimension:
+            raise ValueError(f"vector dimension {values.shape[1]} does not match index dimension {self.dimension}")
+        if self.metric == "cosine":
+            values = _normalize(values)
+
+        with self._lock:
+            rows = []
+            for vid, _, _ in items:
+                row = self._rows.get(vid)
+                if row is None:
+                    row = self._free.pop() if self._free else len(self._ids)
+                    if row == len(self._ids):
+                        self._ids.append(None)
+                        self._meta.append(None)
+                rows.append(row)
+            self._ensure_capacity(len(self._ids))
+            self._vectors[rows] = values
+            self._vectors.flush()  # vectors before the log line that makes them visible on reopen
+            lines = []
+            for (vid, _, metadata), row in zip(items, rows):
+                self._place(vid, row, metadata)
+                lines.append(json.dumps({"id": vid, "row": row, "metadata": metadata}))
+            self._log.write("\n".join(lines) + "\n")
+            self._log.flush()
+            if self._assign is not None:
+                self._assign_rows(np.asarray(rows))
+        return {"upserted_count": len(items)}
+
+    def delete(self, ids: Optional[Iterable[str]] = None, filter: Optional[dict] = None,
+               delete_all: bool = False, namespace: Optional[str] = None) -> dict:
+        with self._lock:
+            if delete_all:
+                targets = list(self._rows)
+            elif filter is not None:
+                targets = [self._ids[r] for r in self._candidates(filter)]
+            else:
+                targets = list(ids or ())
+            lines = []
+            for vid in targets:
+                row = self._drop(vid)
+                if row is not None:
+                    self._free.append(row)
+                    lines.append(json.dumps({"id": vid, "deleted": True}))
+            if lines:
+                self._log.write("\n".join(lines) + "\n")
+                self._log.flush()
+        return {}
+
+    def fetch(self, ids: Iterable[str], namespace: Optional[str] = None) -> dict:
+        with self._lock:
+            out = {}
+            for vid in ids:
+                row = self._rows.get(vid)
+                if row is not None:
+                    out[vid] = {"id": vid, "values": self._vectors[row].tolist(), "metadata": self._meta[row]}
+            return {"vectors": out}
+
+    def describe_index_stats(self) -> dict:
+        with self._lock:
+            return {"dimension": self.dimension, "total_vector_count": len(self._rows),
+                    "metric": self.metric, "mode": self.mode,
+                    "ivf_cells": 0 if self._centroids is None else len(self._centroids)}
+
+    def query(self, vector, top_k: int = 10, include_metadata: bool = False, include_values: bool = False,
+              filter: Optional[dict] = None, namespace: Optional[str] = None) -> QueryResult:
+        q = np.asarray(vector, dtype=np.float32)
+        if self.metric == "cosine":
+            q = _normalize(q)
+        with self._lock:
+            if not self._rows:
+                return QueryResult(matches=[])
+            rows = self._candidates(filter) if filter else None
+            if rows is not None:
+                rows = np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+            if self.mode == "ivf":
+                rows = self._probe(q, rows)
+            if rows is None:
+                scores = self._vectors[:len(self._ids)] @ q
+                live = np.fromiter((i is not None for i in self._ids), dtype=bool, count=len(self._ids))
+                scores[~live] = -np.inf
+                rows = np.arange(len(self._ids))
+            else:
+                if len(rows) == 0:
+                    return QueryResult(matches=[])
+                scores = self._vectors[rows] @ q
+            k = min(top_k, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            matches = []
+            for i in top:
+                if not np.isfinite(scores[i]):
+                    continue
+                row = int(rows[i])
+                metadata = self._meta[row] if include_metadata else None
+                matches.append(Match(id=self._ids[row], score=float(scores[i]), metadata=metadata))
+            return QueryResult(matches=matches)
+
+    # — filtering / IVF —
+    def _candidates(self, flt: dict) -> set:
+        rows = None
+        rest = {}
+        for key, cond in flt.items():
+            if key in self._postings and not isinstance(cond, dict):
+                hit = self._postings[key].get(cond, set())
+            elif key in self._postings and set(cond) <= {"$eq", "$in"}:
+                values = [cond["$eq"]] if "$eq" in cond else cond["$in"]
+                hit = set().union(*(self._postings[key].get(v, set()) for v in values))
+            else:
+                rest[key] = cond
+                continue
+            rows = set(hit) if rows is None else rows & hit
+        if rows is None:
+            rows = set(self._rows.values())
+        if rest:
+            rows = {r for r in rows if _matches_filter(self._meta[r], rest)}
+        return rows
+
+    def _assign_rows(self, rows: np.ndarray) -> None:
+        if len(self._assign) < len(self._vectors):
+            grow = np.full(len(self._vectors) - len(self._assign), -1, dtype=np.int32)
+            self._assign = np.concatenate([self._assign, grow])
+        self._assign[rows] = np.argmax(self._vectors[rows] @ self._centroids.T, axis=1)
+
+    def _train(self) -> None:
+        live = np.asarray(sorted(self._rows.values()), dtype=np.int64)
+        nlist = self.nlist or max(16, int(np.sqrt(len(live))))
+        rng = np.random.default_rng(0)
+        sample = live if len(live) <= IVF_TRAIN_SAMPLE else rng.choice(live, IVF_TRAIN_SAMPLE, replace=False)
+        self._centroids = _kmeans(_normalize(np.asarray(self._vectors[np.sort(sample)])), min(nlist, len(sample)))
+        self._assign = np.full(len(self._vectors), -1, dtype=np.int32)
+        self._assign_rows(live)
+        self._trained_rows = len(live)
+
+    def _probe(self, q: np.ndarray, rows: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        n = len(self._rows)
+        if n < IVF_MIN_ROWS or (rows is not None and len(rows) < IVF_MIN_ROWS):
+            return rows  # small (or already narrowed) sets are cheaper to scan exactly
+        if self._centroids is None or n >= 2 * self._trained_rows:
+            self._train()
+        cells = np.argsort(-(self._centroids @ q))[:self.nprobe]
+        picked = np.flatnonzero(np.isin(self._assign[:len(self._ids)], cells))  # deleted rows are -1
+        return picked if rows is None else np.intersect1d(picked, rows, assume_unique=True)
+
+    def close(self) -> None:
+        with self._lock:
+            self._vectors.flush()
+            self._log.close()
+
+
+_indexes: dict[str, LocalVectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_local_index(name: str, dimension: Optional[int] = None, **kwargs) -> LocalVectorIndex:
+    """Process-wide handle for INDEX_DIR/<name>, created on first use."""
+    with _indexes_lock:
+        index = _indexes.get(name)
+        if index is None:
+            index = _indexes[name] = LocalVectorIndex(os.path.join(INDEX_DIR, name), dimension, **kwargs)
+        return index
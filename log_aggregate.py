@@ -0,0 +1,202 @@
+# log_aggregate.py
+"""
+Mergeable per-file aggregates and a multi-core sharded ingest path.
+
+A file is split into newline-aligned byte ranges; each range is parsed in a
+worker process into a `LogAggregate` (events per hour, per source, per
+severity) and the partial aggregates are merged into one result.
+"""
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterable, Optional
+
+from log_parser import LogRecord, iter_records, sniff_file
+
+# files smaller than this are parsed in-process; a pool costs more than it saves
+MIN_PARALLEL_BYTES = 32 * 1024 * 1024
+MAX_TRACKED_MESSAGES = 2000
+PROBLEM_SEVERITIES = ("error", "warning", "audit_failure", "crit", "alert", "emerg")
+
+
+def default_workers() -> int:
+    """Worker count from LOG_ANALYZER_WORKERS, falling back to the CPU count."""
+    env = os.getenv("LOG_ANALYZER_WORKERS")
+    if env:
+        return max(1, int(env))
+    return os.cpu_count() or 1
+
+
+class LogAggregate:
+    """Counters over a stream of records that can be merged with `+=`."""
+
+    def __init__(self):
+        self.total = 0
+        self.by_hour = Counter()
+        self.errors_by_hour = Counter()
+        self.by_source = Counter()
+        self.by_severity = Counter()
+        self.problems = Counter()  # first line of error/warning messages
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+
+    def add(self, rec: LogRecord) -> None:
+        self.total += 1
+        self.by_source[rec.source] += 1
+        self.by_severity[rec.severity] += 1
+        if rec.severity in PROBLEM_SEVERITIES:
+            self.problems[rec.message.split("\n", 1)[0][:160]] += 1
+            if len(self.problems) > MAX_TRACKED_MESSAGES:
+                self.problems = Counter(dict(self.problems.most_common(MAX_TRACKED_MESSAGES // 2)))
+        ts = rec.timestamp
+        if ts is not None:
+            hour = ts.replace(minute=0, second=0)
+            self.by_hour[hour] += 1
+            if rec.severity == "error":
+                self.errors_by_hour[hour] += 1
+            if self.first is None or ts < self.first:
+                self.first = ts
+            if self.last is None or ts > self.last:
+                self.last = ts
+
+    def update(self, records: Iterable[LogRecord]) -> "LogAggregate":
+        for rec in records:
+            self.add(rec)
+        return self
+
+    def __iadd__(self, other: "LogAggregate") -> "LogAggregate":
+        self.total += other.total
+        self.by_hour.update(other.by_hour)
+        self.errors_by_hour.update(other.errors_by_hour)
+        self.by_source.update(other.by_source)
+        self.by_severity.update(other.by_severity)
+        self.problems.update(other.problems)
+        for ts in (other.first, other.last):
+            if ts is None:
+                continue
+            if self.first is None or ts < self.first:
+                self.first = ts
+            if self.last is None or ts > self.last:
+                self.last = ts
+        return self
+
+    def to_dict(self) -> dict:
+        """JSON-friendly form, used by log_checkpoint to persist aggregates."""
+        def hours(counter):
+            return {h.isoformat(): n for h, n in counter.items()}
+        return {
+            "total": self.total,
+            "by_hour": hours(self.by_hour),
+            "errors_by_hour": hours(self.errors_by_hour),
+            "by_source": dict(self.by_source),
+            "by_severity": dict(self.by_severity),
+            "problems": dict(self.problems),
+            "first": self.first.isoformat() if self.first else None,
+            "last": self.last.isoformat() if self.last else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LogAggregate":
+        def hours(d):
+            return Counter({datetime.fromisoformat(h): n for h, n in d.items()})
+        agg = cls()
+        agg.total = data["total"]
+        agg.by_hour = hours(data["by_hour"])
+        agg.errors_by_hour = hours(data["errors_by_hour"])
+        agg.by_source = Counter(data["by_source"])
+        agg.by_severity = Counter(data["by_severity"])
+        agg.problems = Counter(data["problems"])
+        agg.first = datetime.fromisoformat(data["first"]) if data["first"] else None
+        agg.last = datetime.fromisoformat(data["last"]) if data["last"] else None
+        return agg
+
+
+def split_ranges(path: str, parts: int, start: int = 0, end: Optional[int] = None) -> list[tuple[int, int]]:
+    """Split [start, end) of a file into up to `parts` byte ranges that each start on a line."""
+    end = os.path.getsize(path) if end is None else end
+    if parts <= 1 or end <= start:
+        return [(start, end)]
+    step = (end - start) // parts
+    bounds = [start]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(start + i * step, bounds[-1]))
+            f.readline()  # move to the start of the next line
+            pos = f.tell()
+            if pos >= end:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def aggregate_range(path: str, fmt: str, year: int, start: int, end: int,
+                    store_dataset: Optional[str] = None) -> LogAggregate:
+    """Parse one byte range of a file (runs inside a worker process).
+
+    A multi-line record that straddles the range start is still counted once,
+    by the shard that holds its first line. With `store_dataset` the parsed
+    events are also written to the event store in the same pass.
+    """
+    records = iter_records(path, fmt, year, start, end)
+    if store_dataset is None:
+        return LogAggregate().update(records)
+
+    from event_store import EventWriter
+
+    agg, writer = LogAggregate(), EventWriter(store_dataset, os.path.abspath(path))
+    for rec in records:
+        agg.add(rec)
+        writer.add(rec)
+    writer.close()
+    return agg
+
+
+def aggregate_file(path: str, workers: Optional[int] = None, fmt: Optional[str] = None,
+                   year: Optional[int] = None, start: int = 0, end: Optional[int] = None,
+                   store_dataset: Optional[str] = None) -> LogAggregate:
+    """Aggregate a log file (or the byte range [start, end) of it), fanning out
+    over `workers` processes for large inputs."""
+    fmt = fmt or sniff_file(path)
+    if fmt is None:
+        raise ValueError(f"Unrecognized log format: {path}")
+    year = year or datetime.now().year
+    workers = workers or default_workers()
+    end = os.path.getsize(path) if end is None else end
+    if workers <= 1 or end - start < MIN_PARALLEL_BYTES:
+        return aggregate_range(path, fmt, year, start, end, store_dataset)
+
+    ranges = split_ranges(path, workers * 4, start, end)  # a few shards per worker evens out stragglers
+    result = LogAggregate()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(aggregate_range, path, fmt, year, start, end, store_dataset)
+                   for start, end in ranges]
+        for fut in futures:
+            result += fut.result()
+    return result
+
+
+def aggregate_files(paths: Iterable[str], workers: Optional[int] = None) -> LogAggregate:
+    result = LogAggregate()
+    for path in paths:
+        result += aggregate_file(path, workers=workers)
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Aggregate log files in parallel.")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    agg = aggregate_files(args.paths, workers=args.workers)
+    elapsed = time.perf_counter() - t0
+    print(f"{agg.total} records in {elapsed:.2f}s")
+    print(f"severity: {dict(agg.by_severity)}")
+    print(f"top sources: {dict(agg.by_source.most_common(5))}")
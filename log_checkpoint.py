@@ -0,0 +1,151 @@
+# log_checkpoint.py
+"""
+Incremental tail-and-checkpoint ingestion.
+
+For every log file we remember its inode, how far we have parsed (always a
+line boundary), a fingerprint of the head of the file and the aggregate so
+far. A rerun only parses the bytes appended since then and folds them into the
+stored aggregate. A changed inode, a shrunk file or a different head means the
+file was rotated or truncated, so it is parsed again from byte zero.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Iterable, Optional
+
+from log_aggregate import LogAggregate, aggregate_file
+from log_parser import sniff_file
+
+CHECKPOINT_PATH = os.getenv("LOG_CHECKPOINT_PATH", "./.cache/checkpoints.json")
+HEAD_BYTES = 4096
+
+_save_lock = threading.Lock()  # stores for the same file may be saved from concurrent crew tasks
+
+
+def head_fingerprint(path: str, length: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def last_line_end(path: str, size: int) -> int:
+    """Offset just past the last newline; bytes after it are an unfinished line."""
+    if size == 0:
+        return 0
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0:
+            step = min(65536, pos)
+            f.seek(pos - step)
+            nl = f.read(step).rfind(b"\n")
+            if nl >= 0:
+                return pos - step + nl + 1
+            pos -= step
+    return 0
+
+
+class CheckpointStore:
+    """JSON-backed checkpoints keyed by absolute path."""
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty: set = set()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, log_path: str) -> Optional[dict]:
+        with self._lock:
+            return self._entries.get(os.path.abspath(log_path))
+
+    def put(self, log_path: str, entry: dict) -> None:
+        with self._lock:
+            key = os.path.abspath(log_path)
+            self._entries[key] = entry
+            self._dirty.add(key)
+
+    def save(self) -> None:
+        """Write the entries put since loading, merged over what is on disk now."""
+        with _save_lock, self._lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    merged = json.load(f)
+            except (OSError, ValueError):
+                merged = {}
+            merged.update({key: self._entries[key] for key in self._dirty})
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(merged, f)
+            os.replace(tmp, self.path)
+            self._entries = merged
+            self._dirty.clear()
+
+
+def checkpoint_valid(path: str, st: os.stat_result, cp: Optional[dict]) -> bool:
+    """Whether `cp` still describes the file: same inode, not shrunk, same head. Otherwise it was
+    rotated or truncated and must be parsed again from byte zero."""
+    if not cp or cp["inode"] != st.st_ino or st.st_size < cp["offset"]:
+        return False
+    return head_fingerprint(path, cp["head_len"]) == cp["head"]
+
+
+def checkpoint_entry(path: str, st: os.stat_result, offset: int, fmt: str, year: int) -> dict:
+    """Checkpoint for a file parsed up to the line boundary `offset`."""
+    head_len = min(HEAD_BYTES, offset)
+    return {"inode": st.st_ino, "offset": offset, "head_len": head_len, "head": head_fingerprint(path, head_len),
+            "fmt": fmt, "year": year}
+
+
+def incremental_aggregate(path: str, store: CheckpointStore, workers: Optional[int] = None,
+                          store_dataset: Optional[str] = None) -> LogAggregate:
+    """Aggregate a log file, parsing only what was appended since the last checkpoint.
+
+    Only complete lines are checkpointed; an unterminated last line is counted
+    in the returned aggregate but parsed again on the next run. Newly parsed
+    complete lines are appended to the event store when `store_dataset` is set,
+    so a tail line is stored once it has been terminated. When the file was
+    rotated or replaced, its earlier events are removed from the store before
+    it is parsed again from byte zero.
+    """
+    st = os.stat(path)
+    cp = store.get(path)
+    if checkpoint_valid(path, st, cp):
+        fmt, year, offset = cp["fmt"], cp["year"], cp["offset"]
+        committed = LogAggregate.from_dict(cp["aggregate"])
+    else:
+        fmt, year, offset = sniff_file(path), datetime.now().year, 0
+        committed = LogAggregate()
+        if fmt is None:
+            raise ValueError(f"Unrecognized log format: {path}")
+        if store_dataset is not None:
+            from event_store import delete_file
+            delete_file(store_dataset, os.path.abspath(path))
+
+    complete = last_line_end(path, st.st_size)
+    if complete > offset:
+        committed += aggregate_file(path, workers=workers, fmt=fmt, year=year, start=offset, end=complete,
+                                    store_dataset=store_dataset)
+        store.put(path, {**checkpoint_entry(path, st, complete, fmt, year), "aggregate": committed.to_dict()})
+
+    if st.st_size == complete:
+        return committed
+    result = LogAggregate()
+    result += committed
+    result += aggregate_file(path, workers=1, fmt=fmt, year=year, start=complete, end=st.st_size)
+    return result
+
+
+def incremental_aggregate_files(paths: Iterable[str], workers: Optional[int] = None,
+                                store: Optional[CheckpointStore] = None,
+                                store_dataset: Optional[str] = None) -> LogAggregate:
+    store = store or CheckpointStore()
+    result = LogAggregate()
+    for path in paths:
+        result += incremental_aggregate(path, store, workers=workers, store_dataset=store_dataset)
+    store.save()
+    return result
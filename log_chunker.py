@@ -0,0 +1,159 @@
+# log_chunker.py
+"""
+Record-aware chunking of log text for RAG ingestion.
+
+Plain `chunk_text` cuts logs every ~1000 characters, splitting records and
+embedding thousands of near-identical lines one by one. Here the text is
+parsed with the log_parser grammars, records that differ only in their
+variable parts (numbers, ids, key=value values) are collapsed into one
+representative line with a count and time range, and those lines are packed
+into chunks without ever splitting one. Lines the grammar doesn't match (and
+can't fold into a multi-line record) are kept as raw records, collapsed and
+packed the same way, so a file that only partly matches loses nothing.
+
+    Jun 14 15:16:01 combo sshd(pam_unix) [error] authentication failure; ... rhost=218.188.2.4 (x312, until Jun 14 15:20:45)
+
+The line carries the earliest time of its records and "until" the latest,
+whatever order they arrive in (loge.py exports newest first).
+"""
+import re
+from datetime import datetime
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from log_parser import GRAMMARS, LogRecord
+
+MAX_GROUPS = 10_000   # distinct records held before the groups are flushed as chunks
+MAX_LINE_CHARS = 600  # one rendered record never takes more than this
+
+_VARIABLE = re.compile(r"(?<==)[^\s;,]+|\b0x[0-9a-f]+\b|\b[0-9a-f]{8,}\b|\d+(?:[.:]\d+)*", re.IGNORECASE)
+
+
+class LogChunk(NamedTuple):
+    text: str
+    records: int                 # raw records behind the chunk
+    start: Optional[datetime]
+    end: Optional[datetime]
+
+
+def mask_message(message: str) -> str:
+    """Message with its variable parts replaced by <*>; records with equal masks are collapsed."""
+    return _VARIABLE.sub("<*>", message)
+
+
+def detect_log_format(sample: str, min_ratio: float = 0.5) -> Optional[str]:
+    """Grammar most lines of `sample` match, if at least `min_ratio` of them do."""
+    lines = [line for line in sample.splitlines()[:200] if line.strip()]
+    if len(lines) > 1 and not sample.endswith("\n"):
+        lines = lines[:-1]  # probably cut off
+    if not lines:
+        return None
+    best, hits = None, 0
+    for name, grammar in GRAMMARS.items():
+        n = sum(1 for line in lines if grammar.pattern.match(line))
+        if n > hits:
+            best, hits = name, n
+    return best if hits >= min_ratio * len(lines) else None
+
+
+def iter_lines(pieces: Iterable[str]) -> Iterator[str]:
+    """Lines of text that arrives in arbitrary pieces."""
+    carry = ""
+    for piece in pieces:
+        lines = (carry + piece).split("\n")
+        carry = lines.pop()
+        yield from lines
+    if carry:
+        yield carry
+
+
+def parse_lines_keeping_raw(lines: Iterable[str], fmt: str, year: Optional[int] = None) -> Iterator[LogRecord]:
+    """log_parser.parse_lines, except that unmatched lines become records of format "raw"
+    instead of being dropped."""
+    grammar = GRAMMARS[fmt]
+    match, build = grammar.pattern.match, grammar.build
+    year = year or datetime.now().year
+    pending = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        m = match(line)
+        if m:
+            if pending is not None:
+                yield pending
+            pending = build(m, year)
+        elif grammar.multiline and pending is not None and line:
+            pending = pending._replace(message=pending.message + "\n" + line)
+        elif line.strip() and not (grammar.header and line.startswith(grammar.header)):
+            if pending is not None:
+                yield pending
+                pending = None
+            yield LogRecord(None, "raw", "", "", None, None, "", line)
+    if pending is not None:
+        yield pending
+
+
+def _clock(ts: Optional[datetime]) -> str:
+    return ts.strftime("%b %d %H:%M:%S") if ts else "-"
+
+
+def _render(group: dict) -> str:
+    rec = group["first"]
+    if rec.fmt == "raw":
+        line = rec.message
+    else:
+        head = " ".join(part for part in (_clock(group["min_ts"]), rec.host, rec.source) if part)
+        line = f"{head} [{rec.severity}] {rec.message}".replace("\n", " ")
+    if len(line) > MAX_LINE_CHARS:
+        line = line[:MAX_LINE_CHARS - 3] + "..."
+    if group["count"] > 1:
+        line += f" (x{group['count']}, until {_clock(group['max_ts'])})" if group["max_ts"] else f" (x{group['count']})"
+    return line
+
+
+def _pack(groups: Iterable[dict], chunk_size: int) -> Iterator[LogChunk]:
+    lines, records, start, end, size = [], 0, None, None, 0
+    for group in groups:
+        line = _render(group)
+        if lines and size + len(line) + 1 > chunk_size:
+            yield LogChunk("\n".join(lines), records, start, end)
+            lines, records, start, end, size = [], 0, None, None, 0
+        lines.append(line)
+        size += len(line) + 1
+        records += group["count"]
+        if group["min_ts"] is not None:
+            start = group["min_ts"] if start is None else min(start, group["min_ts"])
+            end = group["max_ts"] if end is None else max(end, group["max_ts"])
+    if lines:
+        yield LogChunk("\n".join(lines), records, start, end)
+
+
+def chunk_log_records(records: Iterable[LogRecord], chunk_size: int = 1000,
+                      max_groups: int = MAX_GROUPS) -> Iterator[LogChunk]:
+    """Collapse repeated records and pack the survivors into chunks of about `chunk_size` chars.
+
+    Groups are emitted in order of first appearance; at most `max_groups` are
+    held, after which they are flushed and collapsing starts over.
+    """
+    groups: dict = {}
+    for rec in records:
+        key = (rec.source, rec.severity, rec.event_id, mask_message(rec.message))
+        group = groups.get(key)
+        if group is None:
+            if len(groups) >= max_groups:
+                yield from _pack(groups.values(), chunk_size)
+                groups = {}
+            groups[key] = {"first": rec, "min_ts": rec.timestamp, "max_ts": rec.timestamp, "count": 1}
+        else:
+            group["count"] += 1
+            ts = rec.timestamp
+            if ts is not None:
+                if group["min_ts"] is None or ts < group["min_ts"]:
+                    group["min_ts"] = ts
+                if group["max_ts"] is None or ts > group["max_ts"]:
+                    group["max_ts"] = ts
+    yield from _pack(groups.values(), chunk_size)
+
+
+def iter_log_chunks(pieces: Iterable[str], fmt: str, year: Optional[int] = None,
+                    chunk_size: int = 1000) -> Iterator[LogChunk]:
+    """chunk_log_records over log text arriving in pieces; unparsed lines are kept as raw records."""
+    return chunk_log_records(parse_lines_keeping_raw(iter_lines(pieces), fmt, year), chunk_size)
@@ -0,0 +1,109 @@
+# log_classifier.py
+"""
+Local replacement for the categorize_logs_task LLM round-trip.
+
+Each file in the logs directory is classified by sniffing its first few KB
+with the log_parser grammars. Results are cached on (path, size, mtime) in a
+small JSON file so repeated kickoffs only re-sniff files that changed.
+"""
+import json
+import os
+import re
+import threading
+
+from log_parser import GRAMMARS, detect_format
+
+CACHE_PATH = os.getenv("LOG_CLASSIFIER_CACHE", "./.cache/log_classes.json")
+SAMPLE_BYTES = 8192
+LOG_EXTENSIONS = (".log", ".txt", "")
+SYSTEM_NAME_HINTS = ("system", "syslog", "kernel", "os", "auth", "secure", "messages")
+
+_cache = None
+_cache_dirty = False
+_lock = threading.Lock()
+
+
+def _load_cache() -> dict:
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_PATH, "r", encoding="utf-8") as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def save_cache() -> None:
+    """Persist the classification cache if anything changed."""
+    global _cache_dirty
+    with _lock:
+        if not _cache_dirty:
+            return
+        os.makedirs(os.path.dirname(CACHE_PATH) or ".", exist_ok=True)
+        tmp = CACHE_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_cache, f)
+        os.replace(tmp, CACHE_PATH)
+        _cache_dirty = False
+
+
+def _sniff(path: str) -> str:
+    with open(path, "rb") as f:
+        head = f.read(SAMPLE_BYTES)
+    lines = head.decode("utf-8", errors="replace").splitlines()
+    if len(head) == SAMPLE_BYTES and len(lines) > 1:
+        lines = lines[:-1]  # last line is probably cut off
+    return detect_format(lines)
+
+
+def _category_from_name(path: str) -> str:
+    # whole tokens only: "os" must not match "hosts" or "postgres"
+    tokens = set(re.split(r"[^a-z0-9]+", os.path.basename(path).lower()))
+    return "system" if tokens.intersection(SYSTEM_NAME_HINTS) else "application"
+
+
+def classify_file(path: str) -> dict:
+    """Return {'format': ..., 'category': 'system'|'application'} for one log file."""
+    global _cache_dirty
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    with _lock:
+        cached = _load_cache().get(key)
+    if cached and cached["size"] == st.st_size and cached["mtime"] == st.st_mtime_ns:
+        return {"format": cached["format"], "category": cached["category"]}
+
+    fmt = _sniff(path)
+    category = GRAMMARS[fmt].category if fmt else _category_from_name(path)
+    with _lock:
+        _load_cache()[key] = {"size": st.st_size, "mtime": st.st_mtime_ns, "format": fmt, "category": category}
+        _cache_dirty = True
+    return {"format": fmt, "category": category}
+
+
+def classify_directory(logs_directory: str) -> dict:
+    """Split the log files in a directory into system and application logs.
+
+    Files no grammar recognizes go to 'unrecognized_logs' instead: the
+    parsing tools cannot read them.
+    """
+    result = {"system_logs": [], "application_logs": [], "unrecognized_logs": []}
+    for fn in sorted(os.listdir(logs_directory)):
+        path = os.path.join(logs_directory, fn)
+        if fn.startswith(".") or not os.path.isfile(path):
+            continue
+        if os.path.splitext(fn)[1].lower() not in LOG_EXTENSIONS:
+            continue
+        info = classify_file(path)
+        if info["format"] is None:
+            result["unrecognized_logs"].append(path)
+        else:
+            result[f"{info['category']}_logs"].append(path)
+    save_cache()
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+
+    print(json.dumps(classify_directory(sys.argv[1] if len(sys.argv) > 1 else "./logs"), indent=2))
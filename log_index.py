@@ -0,0 +1,182 @@
+# log_index.py
+"""
+SQLite index over parsed log events for targeted agent queries.
+
+Files are parsed with log_parser and their events stored in one table with
+indexes on time, severity and source. Queries filter by time range,
+severity, source and substring, and return counts, the top messages and a
+page of matching lines, never whole files. The parquet event store serves
+the pandas tools column by column; these ad-hoc filtered, grouped and paged
+lookups need row indexes, hence SQLite.
+
+Syncing uses log_checkpoint's checkpoints: only complete lines appended since
+the last sync are parsed, and a rotated or truncated file is re-indexed from
+zero. The checkpoint lives in the `files` table rather than the JSON
+CheckpointStore so that it commits in the same transaction as the rows it
+covers. Each file syncs in one BEGIN IMMEDIATE transaction: an interrupted
+sync leaves nothing behind, and concurrent syncs (every Log Query call opens
+its own LogIndex) wait for each other instead of inserting the same lines twice.
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+from log_checkpoint import checkpoint_entry, checkpoint_valid, last_line_end
+from log_chunker import mask_message
+from log_parser import iter_records, sniff_file
+
+INDEX_PATH = os.getenv("LOG_INDEX_PATH", "./.cache/log_index.sqlite")
+INSERT_BATCH = 5000
+LOCK_TIMEOUT = float(os.getenv("LOG_INDEX_LOCK_TIMEOUT", "300"))  # seconds to wait for another sync
+_CHECKPOINT_COLUMNS = ("inode", "offset", "head_len", "head", "fmt", "year")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, inode INTEGER, offset INTEGER, head_len INTEGER, head TEXT, fmt TEXT, year INTEGER
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY, file TEXT, ts TEXT, severity TEXT, source TEXT, host TEXT, pattern TEXT, message TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_severity_ts ON events (severity, ts);
+CREATE INDEX IF NOT EXISTS events_source_ts ON events (source, ts);
+CREATE INDEX IF NOT EXISTS events_file ON events (file);
+"""
+
+
+def _as_text(value) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value).replace("T", " ")
+
+
+def _split(value) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return [str(v) for v in value]
+
+
+class LogIndex:
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # autocommit mode: transactions are opened explicitly, with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    # — ingestion —
+    def sync(self, paths: Iterable[str]) -> int:
+        """Index whatever is new in `paths`; returns the number of events added."""
+        added = 0
+        for path in paths:
+            added += self._sync_file(os.path.abspath(path))
+        return added
+
+    def _sync_file(self, path: str) -> int:
+        with self._lock:
+            # the database write lock, held from reading the checkpoint until the rows and it are committed
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = self._sync_in_transaction(path)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return added
+
+    def _sync_in_transaction(self, path: str) -> int:
+        st = os.stat(path)
+        row = self._conn.execute(
+            f"SELECT {', '.join(_CHECKPOINT_COLUMNS)} FROM files WHERE path = ?", (path,)).fetchone()
+        cp = dict(zip(_CHECKPOINT_COLUMNS, row)) if row else None
+        if checkpoint_valid(path, st, cp):
+            offset, fmt, year = cp["offset"], cp["fmt"], cp["year"]
+        else:
+            offset, fmt, year = 0, sniff_file(path), datetime.now().year
+            if fmt is None:
+                raise ValueError(f"Unrecognized log format: {path}")
+            self._conn.execute("DELETE FROM events WHERE file = ?", (path,))
+
+        complete = last_line_end(path, st.st_size)
+        if complete <= offset:
+            return 0
+        added, batch = 0, []
+        for rec in iter_records(path, fmt=fmt, year=year, start=offset, end=complete):
+            batch.append((path, _as_text(rec.timestamp), rec.severity, rec.source, rec.host,
+                          mask_message(rec.message), rec.message))
+            if len(batch) >= INSERT_BATCH:
+                added += self._insert(batch)
+                batch = []
+        added += self._insert(batch)
+        cp = checkpoint_entry(path, st, complete, fmt, year)
+        self._conn.execute(f"INSERT OR REPLACE INTO files VALUES (?, {', '.join('?' * len(_CHECKPOINT_COLUMNS))})",
+                           (path, *(cp[c] for c in _CHECKPOINT_COLUMNS)))
+        return added
+
+    def _insert(self, rows: list) -> int:
+        if rows:
+            self._conn.executemany(
+                "INSERT INTO events (file, ts, severity, source, host, pattern, message) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    # — queries —
+    def _where(self, files: Sequence[str], start, end, severity, source, contains) -> tuple[str, list]:
+        clauses, args = [], []
+
+        def any_of(column, values):
+            clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+            args.extend(values)
+
+        if files:
+            any_of("file", [os.path.abspath(f) for f in files])
+        if _as_text(start):
+            clauses.append("ts >= ?")
+            args.append(_as_text(start))
+        if _as_text(end):
+            clauses.append("ts < ?")
+            args.append(_as_text(end))
+        if _split(severity):
+            any_of("severity", _split(severity))
+        if _split(source):
+            any_of("source", _split(source))
+        if contains:
+            clauses.append("instr(lower(message), ?) > 0")
+            args.append(contains.lower())
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def query(self, files: Sequence[str] = (), start=None, end=None, severity=None, source=None,
+              contains: Optional[str] = None, top: int = 10, page: int = 1, page_size: int = 20) -> dict:
+        where, args = self._where(files, start, end, severity, source, contains)
+        page, page_size = max(1, page), max(1, min(page_size, 200))
+        with self._lock:
+            total, first, last = self._conn.execute(
+                f"SELECT COUNT(*), MIN(ts), MAX(ts) FROM events{where}", args).fetchone()
+            by_severity = dict(self._conn.execute(
+                f"SELECT severity, COUNT(*) FROM events{where} GROUP BY severity ORDER BY 2 DESC", args))
+            top_messages = self._conn.execute(
+                f"SELECT COUNT(*), MIN(ts), MAX(ts), MIN(message) FROM events{where} "
+                f"GROUP BY source, pattern ORDER BY 1 DESC LIMIT ?", args + [top]).fetchall()
+            lines = self._conn.execute(
+                f"SELECT ts, severity, source, host, message FROM events{where} "
+                f"ORDER BY ts, id LIMIT ? OFFSET ?", args + [page_size, (page - 1) * page_size]).fetchall()
+        return {
+            "total": total, "first": first, "last": last, "by_severity": by_severity,
+            "top_messages": [{"count": n, "first": lo, "last": hi, "message": msg}
+                             for n, lo, hi, msg in top_messages],
+            "page": page, "pages": max(1, -(-total // page_size)),
+            "lines": [{"ts": ts, "severity": sev, "source": src, "host": host, "message": msg}
+                      for ts, sev, src, host, msg in lines],
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
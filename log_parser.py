@@ -0,0 +1,287 @@
+# log_parser.py
+"""
+Streaming parser for the log formats we ship in ./logs.
+
+Each format is a compiled-regex grammar; `iter_records` scans a memory-mapped
+file and yields `LogRecord` tuples, so resident memory stays flat no matter how
+big the file is and no agent ever has to read the raw text. The bytes grammars
+run directly over the mapped buffer and only the captured fields get decoded.
+"""
+import mmap
+import os
+import re
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+
+class LogRecord(NamedTuple):
+    timestamp: Optional[datetime]
+    fmt: str
+    host: str
+    source: str
+    pid: Optional[int]
+    event_id: Optional[int]
+    severity: str
+    message: str
+
+
+_MONTHS = {m: i for i, m in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)}
+_MONTHS.update({m.encode(): i for m, i in _MONTHS.items()})
+
+# Windows EventType values as written by loge.py
+_WINDOWS_TYPES = {
+    "0": "info",
+    "1": "error",
+    "2": "warning",
+    "4": "info",
+    "8": "audit_success",
+    "16": "audit_failure",
+}
+
+# syslog lines carry no level, so infer one from the message text
+_SYSLOG_ERROR_HINT = re.compile(r"fail|error|denied|invalid|refused", re.IGNORECASE)
+_SYSLOG_WARNING_HINT = re.compile(r"warn|unknown|timeout|timed out", re.IGNORECASE)
+
+
+def _text(value):
+    """Decode a captured group when matching over bytes."""
+    if value.__class__ is bytes:
+        return value.decode("utf-8", errors="replace")
+    return value
+
+
+def _clock(mon, day, clock, year: int) -> Optional[datetime]:
+    month = _MONTHS.get(mon)
+    if month is None:
+        return None
+    try:
+        return datetime(year, month, int(day), int(clock[0:2]), int(clock[3:5]), int(clock[6:8]))
+    except ValueError:
+        return None
+
+
+def _syslog_severity(message: str) -> str:
+    if _SYSLOG_ERROR_HINT.search(message):
+        return "error"
+    if _SYSLOG_WARNING_HINT.search(message):
+        return "warning"
+    return "info"
+
+
+# ——————————————————————————————————————————————
+# Grammars
+# ——————————————————————————————————————————————
+class Grammar(NamedTuple):
+    name: str
+    category: str            # "system" or "application"
+    pattern: "re.Pattern[str]"
+    build: Callable[["re.Match", int], LogRecord]
+    multiline: bool = False  # non-matching lines continue the previous record
+    header: Optional[str] = None
+
+    @property
+    def bytes_pattern(self) -> "re.Pattern[bytes]":
+        """Same grammar compiled for bytes, anchored per line, for scanning an mmap."""
+        return _bytes_pattern(self.pattern)
+
+
+_BYTES_PATTERNS = {}
+
+
+def _bytes_pattern(pattern):
+    compiled = _BYTES_PATTERNS.get(pattern)
+    if compiled is None:
+        compiled = _BYTES_PATTERNS[pattern] = re.compile(pattern.pattern.encode(), re.MULTILINE)
+    return compiled
+
+
+# The bytes forms are matched across a whole mmap region, so no part of a grammar may match a line
+# break: negated classes exclude \r and \n, or one malformed line swallows the next record.
+
+# Jun 14 15:16:01 combo sshd(pam_unix)[19939]: authentication failure; ...
+SYSLOG_RE = re.compile(
+    r"^(?P<mon>[A-Z][a-z]{2}) +(?P<day>\d{1,2}) (?P<clock>\d\d:\d\d:\d\d) "
+    r"(?P<host>\S+) (?P<source>[^\s\[:]+?)(?:\[(?P<pid>\d+)\])?: ?(?P<message>[^\r\n]*)\r?$"
+)
+
+# [Thu Jun 09 06:07:05 2005] [error] [client 1.2.3.4] File does not exist: ...
+APACHE_RE = re.compile(
+    r"^\[[A-Z][a-z]{2} (?P<mon>[A-Z][a-z]{2}) +(?P<day>\d{1,2}) (?P<clock>\d\d:\d\d:\d\d) (?P<year>\d{4})\] "
+    r"\[(?P<severity>[a-z]+)\](?: \[client (?P<client>[^\]\r\n]+)\])? ?(?P<message>[^\r\n]*)\r?$"
+)
+
+# Sun Apr  6 04:22:43 2025<TAB>1796<TAB>Source<TAB>1<TAB>0<TAB>Message
+WINDOWS_TSV_RE = re.compile(
+    r"^[A-Z][a-z]{2} (?P<mon>[A-Z][a-z]{2}) +(?P<day>\d{1,2}) (?P<clock>\d\d:\d\d:\d\d) (?P<year>\d{4})"
+    r"\t(?P<event_id>\d+)\t(?P<source>[^\t\r\n]*)\t(?P<type>\d+)\t(?P<category>\d+)\t(?P<message>[^\r\n]*)\r?$"
+)
+
+
+def _build_syslog(m, year):
+    message = _text(m.group("message"))
+    pid = m.group("pid")
+    return LogRecord(
+        timestamp=_clock(m.group("mon"), m.group("day"), m.group("clock"), year),
+        fmt="syslog",
+        host=_text(m.group("host")),
+        source=_text(m.group("source")),
+        pid=int(pid) if pid else None,
+        event_id=None,
+        severity=_syslog_severity(message),
+        message=message,
+    )
+
+
+def _build_apache(m, year):
+    return LogRecord(
+        timestamp=_clock(m.group("mon"), m.group("day"), m.group("clock"), int(m.group("year"))),
+        fmt="apache",
+        host=_text(m.group("client") or ""),
+        source="httpd",
+        pid=None,
+        event_id=None,
+        severity=_text(m.group("severity")),
+        message=_text(m.group("message")),
+    )
+
+
+def _build_windows(m, year):
+    return LogRecord(
+        timestamp=_clock(m.group("mon"), m.group("day"), m.group("clock"), int(m.group("year"))),
+        fmt="windows_tsv",
+        host="",
+        source=_text(m.group("source")),
+        pid=None,
+        event_id=int(m.group("event_id")),
+        severity=_WINDOWS_TYPES.get(_text(m.group("type")), "info"),
+        message=_text(m.group("message")),
+    )
+
+
+GRAMMARS = {
+    "syslog": Grammar("syslog", "system", SYSLOG_RE, _build_syslog),
+    "apache": Grammar("apache", "application", APACHE_RE, _build_apache),
+    "windows_tsv": Grammar("windows_tsv", "system", WINDOWS_TSV_RE, _build_windows,
+                           multiline=True, header="TimeGenerated\tEventID\t"),
+}
+
+
+# ——————————————————————————————————————————————
+# Parsing
+# ——————————————————————————————————————————————
+def detect_format(lines: Iterable[str]) -> Optional[str]:
+    """Return the grammar name that matches most of the sample lines, or None."""
+    scores = dict.fromkeys(GRAMMARS, 0)
+    for line in lines:
+        line = line.rstrip("\r\n")
+        for name, grammar in GRAMMARS.items():
+            if grammar.pattern.match(line):
+                scores[name] += 1
+    best = max(scores, key=scores.get)
+    return best if scores[best] else None
+
+
+def parse_lines(lines: Iterable[str], fmt: str, year: Optional[int] = None) -> Iterator[LogRecord]:
+    """Yield records for `lines` using the grammar `fmt`.
+
+    Lines that don't match are folded into the previous record for multi-line
+    formats and dropped otherwise. `year` fills in formats without one (syslog).
+    """
+    grammar = GRAMMARS[fmt]
+    match, build = grammar.pattern.match, grammar.build
+    year = year or datetime.now().year
+    pending = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        m = match(line)
+        if m:
+            if pending is not None:
+                yield pending
+            pending = build(m, year)
+        elif grammar.multiline and pending is not None and line:
+            pending = pending._replace(message=pending.message + "\n" + line)
+    if pending is not None:
+        yield pending
+
+
+def sniff_file(path: str, max_lines: int = 50) -> Optional[str]:
+    """Detect the grammar of a file from its first few lines."""
+    sample = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            sample.append(line)
+            if len(sample) >= max_lines:
+                break
+    return detect_format(sample)
+
+
+def _iter_mmap_lines(mm, start: int, end: int) -> Iterator[bytes]:
+    find = mm.find
+    pos = start
+    while pos < end:
+        nl = find(b"\n", pos, end)
+        if nl < 0:
+            nl = end
+        yield mm[pos:nl]
+        pos = nl + 1
+
+
+def _scan(mm, grammar: Grammar, year: int, start: int, end: int) -> Iterator[LogRecord]:
+    build = grammar.build
+    if not grammar.multiline:
+        # match straight over the mapped buffer; nothing is copied except captured groups
+        it = m = None
+        try:
+            it = grammar.bytes_pattern.finditer(mm, start, end)
+            for m in it:
+                yield build(m, year)
+        finally:
+            it = m = None  # release buffer exports so the mmap can close
+        return
+
+    match = grammar.bytes_pattern.match
+    pending = None
+    for line in _iter_mmap_lines(mm, start, end):
+        m = match(line)
+        if m:
+            if pending is not None:
+                yield pending
+            pending = build(m, year)
+        elif pending is not None and line.strip():
+            pending = pending._replace(message=pending.message + "\n" + _text(line.rstrip(b"\r")))
+    if pending is not None:
+        yield pending
+
+
+def iter_records(path: str, fmt: Optional[str] = None, year: Optional[int] = None,
+                 start: int = 0, end: Optional[int] = None) -> Iterator[LogRecord]:
+    """Stream `LogRecord`s out of the log file at `path`, optionally only a byte range of it.
+
+    `start` must sit on a line boundary (see log_aggregate.split_ranges).
+    """
+    fmt = fmt or sniff_file(path)
+    if fmt is None:
+        raise ValueError(f"Unrecognized log format: {path}")
+    year = year or datetime.now().year
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        end = size if end is None else min(end, size)
+        if start >= end:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            yield from _scan(mm, GRAMMARS[fmt], year, start, end)
+
+
+if __name__ == "__main__":
+    import sys
+    from collections import Counter
+
+    for p in sys.argv[1:]:
+        n, levels = 0, Counter()
+        for rec in iter_records(p):
+            n += 1
+            levels[rec.severity] += 1
+        print(f"{p}: {n} records {dict(levels)}")
@@ -1,8 +1,9 @@
 # app.py
 from fastapi import FastAPI, Request, UploadFile, File
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-import subprocess, shutil, os
+from starlette.concurrency import run_in_threadpool
+import shutil, os, threading, uuid
 
 # Markdown → HTML + syntax highlighting
 import markdown2
@@ -11,8 +12,38 @@ from pygments.formatters import HtmlFormatter
 # Jinja2 for templating
 from jinja2 import Environment, DictLoader
 
+from instrumentation import latest_run, prometheus_text, task_breakdown
+from job_queue import JobCancelled, JobQueue, QueueFull
+from pipeline_worker import WARM_WORKERS, WarmWorkerPool, WorkerDied, WorkerSpawnError
+from resource_sampler import get_sampler
+
 app = FastAPI()
 
+
+@app.on_event("startup")
+async def start_resource_sampler():
+    # keeps cpu/mem/disk samples flowing into the ring buffer that app2.py's resource_metrics reads
+    get_sampler()
+
+
+@app.on_event("startup")
+async def start_warm_workers():
+    global warm_pool
+    if WARM_WORKERS > 0:
+        warm_pool = WarmWorkerPool(size=WARM_WORKERS)
+
+
+@app.on_event("shutdown")
+async def stop_resource_sampler():
+    get_sampler().stop()
+
+
+@app.on_event("shutdown")
+async def stop_warm_workers():
+    if warm_pool is not None:
+        warm_pool.close()
+
+
 # 1) Mount static directories
 app.mount("/plots", StaticFiles(directory="plots"), name="plots")
 
@@ -153,6 +184,22 @@ template_str = """
       color: #721c24;
     }
 
+    .timing-bar {
+      position: relative;
+      height: 14px;
+      min-width: 160px;
+      background: #eef1f4;
+      border-radius: 3px;
+    }
+
+    .timing-bar span {
+      position: absolute;
+      top: 0;
+      bottom: 0;
+      background: #3498db;
+      border-radius: 3px;
+    }
+
     @media (max-width: 768px) {
       .markdown-body {
         padding: 15px;
@@ -183,6 +230,49 @@ template_str = """
       </div>
     </div>
 
+    {% if run %}
+    <div class="row justify-content-center mb-5">
+      <div class="col-lg-10">
+        <div class="report-box">
+          <h4 class="mb-3">Last Run Timing</h4>
+          <p class="text-muted">
+            Run {{ run.run_id }} ({{ run.status }}) started {{ run.started }}:
+            {{ "%.1f" | format(run.wall) }}s wall, {{ "%.1f" | format(run.cpu) }}s CPU,
+            peak RSS {{ "%.0f" | format(run.peak_rss / 1048576) }} MB
+          </p>
+          <table class="table table-sm align-middle">
+            <thead>
+              <tr>
+                <th>Task</th><th>Timeline</th><th class="text-end">Wall (s)</th><th class="text-end">CPU (s)</th>
+                <th class="text-end">Peak RSS (MB)</th><th class="text-end">Tools (calls / s)</th>
+                <th class="text-end">LLM (calls / cached / s)</th><th class="text-end">Tokens (in / out)</th>
+              </tr>
+            </thead>
+            <tbody>
+              {% for t in timings %}
+              <tr{% if not t.ok %} class="table-danger"{% endif %}>
+                <td>{{ t.task }}</td>
+                <td>
+                  <div class="timing-bar">
+                    <span style="left: {{ '%.2f' | format(100 * t.start / run.wall) }}%;
+                                 width: {{ '%.2f' | format([100 * t.wall / run.wall, 0.5] | max) }}%"></span>
+                  </div>
+                </td>
+                <td class="text-end">{{ "%.1f" | format(t.wall) }}</td>
+                <td class="text-end">{{ "%.1f" | format(t.cpu) }}</td>
+                <td class="text-end">{{ "%.0f" | format(t.peak_rss / 1048576) }}</td>
+                <td class="text-end">{{ t.tool_calls }} / {{ "%.1f" | format(t.tool_seconds) }}</td>
+                <td class="text-end">{{ t.llm_calls }} / {{ t.llm_cached }} / {{ "%.1f" | format(t.llm_seconds) }}</td>
+                <td class="text-end">{{ t.prompt_tokens }} / {{ t.completion_tokens }}</td>
+              </tr>
+              {% endfor %}
+            </tbody>
+          </table>
+        </div>
+      </div>
+    </div>
+    {% endif %}
+
     <div class="row g-4">
       <div class="col-lg-6">
         <div class="report-box">
@@ -257,18 +347,103 @@ async def home():
     </html>
     """
 
+# 4) Pipeline runs go through a bounded job queue so requests return at once.
+# Every job holds pipeline_lock, so one job thread loses nothing, and it keeps uploads in submission
+# order: two threads waiting on the lock could take it in either order and leave an older upload in place.
+jobs = JobQueue(workers=1)
+# PIPELINE_WARM_WORKERS > 0 keeps app2 imported in a worker process instead of spawning `python app2.py`;
+# runs hold pipeline_lock, so one warm worker is all that is ever used
+warm_pool = None
+pipeline_lock = threading.Lock()  # one pipeline at a time owns logs/service.log, reports and plots
+
+
+def _job_accepted(job):
+    return JSONResponse({"message": f"{job.kind} job queued.", "job_id": job.id,
+                         "status_url": f"/jobs/{job.id}"}, status_code=202)
+
+
+def _queue_full(e):
+    return JSONResponse({"message": f"Too many pending jobs: {e}"}, status_code=429)
+
+
+def _job_output(proc):
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(proc.args)} exited with {proc.returncode}: {proc.stdout[-2000:]}")
+    return {"returncode": proc.returncode, "output": proc.stdout[-2000:]}
+
+
+def _run_export(job):
+    # loge.py writes syslog.log to its hardcoded output_path, the logs directory the pipeline reads;
+    # the lock keeps a run from reading it half-written
+    with pipeline_lock:
+        return _job_output(job.run_subprocess(["python", "loge.py"]))
+
+
+def _remove_upload(upload_path):
+    def cleanup():
+        try:
+            os.remove(upload_path)
+        except FileNotFoundError:
+            pass  # already swapped into logs/service.log
+    return cleanup
+
+
+def _run_pipeline(upload_path):
+    def run(job):
+        with pipeline_lock:
+            if job.cancelled:
+                raise JobCancelled()
+            os.replace(upload_path, "logs/service.log")
+            if warm_pool is not None:
+                try:
+                    return {"returncode": 0, "output": warm_pool.run(cancelled=lambda: job.cancelled)[-2000:]}
+                except (WorkerSpawnError, WorkerDied, TimeoutError):
+                    pass  # no warm worker could start, or it died mid-run; run it the cold way
+            return _job_output(job.run_subprocess(["python", "app2.py"]))
+    return run
+
+
 @app.post("/trigger")
 async def run_sys_py():
-    subprocess.run(["python", "loge.py"], check=False)
-    return JSONResponse({"message": "System logs collected and report generated."})
+    try:
+        job = jobs.submit("export", _run_export)
+    except QueueFull as e:
+        return _queue_full(e)
+    return _job_accepted(job)
 
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
-    os.makedirs("logs", exist_ok=True)
-    with open("logs/service.log", "wb") as buf:
-        shutil.copyfileobj(file.file, buf)
-    subprocess.run(["python", "app2.py"], check=False)
-    return JSONResponse({"message": "File uploaded and report generated."})
+    # each upload gets its own file; the job swaps it into logs/service.log once it holds the pipeline lock
+    os.makedirs("logs/incoming", exist_ok=True)
+    upload_path = os.path.join("logs/incoming", f"{uuid.uuid4().hex}.log")
+    with open(upload_path, "wb") as buf:
+        # stream in 1 MiB blocks; the parser mmaps the file afterwards, so it is never held in memory
+        await run_in_threadpool(shutil.copyfileobj, file.file, buf, 1 << 20)
+    try:
+        # the incoming file is removed however the job ends, even if it is cancelled while queued
+        job = jobs.submit("pipeline", _run_pipeline(upload_path), cleanup=_remove_upload(upload_path))
+    except QueueFull as e:
+        os.remove(upload_path)
+        return _queue_full(e)
+    return _job_accepted(job)
+
+@app.get("/jobs")
+async def list_jobs():
+    return JSONResponse({"queued": jobs.depth(), "jobs": [j.to_dict() for j in jobs.list()]})
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"message": "Unknown job."}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return JSONResponse({"message": "Unknown job."}, status_code=404)
+    return JSONResponse(job.to_dict())
 
 @app.get("/plot", response_class=HTMLResponse)
 async def view_plot_and_report(request: Request):
@@ -286,6 +461,11 @@ async def view_plot_and_report(request: Request):
     # Generate Pygments CSS
     pygments_css = HtmlFormatter().get_style_defs(".highlight")
 
+    # Per-task timing of the latest pipeline run (instrumentation.py run log)
+    run = latest_run()
+    if run is not None:
+        run["wall"] = max(run["wall"], 1e-9)
+
     # Render template
     tpl = jinja_env.get_template("reports.html")
     html = tpl.render(
@@ -295,5 +475,14 @@ async def view_plot_and_report(request: Request):
         sys_report=sys_html,
         micro_report=micro_html,
         pygments_css=pygments_css,
+        run=run,
+        timings=task_breakdown(run) if run else [],
     )
-    return HTMLResponse(html)
\ No newline at end of file
+    return HTMLResponse(html)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus text format, built from the run logs the pipeline writes
+    text = await run_in_threadpool(prometheus_text)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
\ No newline at end of file
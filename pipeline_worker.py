@@ -0,0 +1,242 @@
+# pipeline_worker.py
+"""
+Warm, pre-imported worker processes for the analysis pipeline.
+
+Spawning `python app2.py` per upload re-imports pandas, seaborn, matplotlib and
+crewai, re-runs agentops.init and rebuilds the Gemini client every time. A
+warm worker pays that once: it imports app2 at start, then takes runs over a
+multiprocessing Pipe and calls app2.run_pipeline. Workers are recycled after
+`max_jobs` runs, with the replacement warmed up in the background. If no
+worker can be started, runs raise WorkerSpawnError at once rather than
+waiting for one, and a worker that dies mid-run raises WorkerDied and is
+replaced; main.py falls back to `python app2.py` in both cases.
+
+    python pipeline_worker.py --bench   # cold-start vs warm-worker timing
+"""
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+from job_queue import JobCancelled
+
+# main.py runs one pipeline at a time (pipeline_lock), so a second warm worker would only hold memory
+WARM_WORKERS = min(int(os.getenv("PIPELINE_WARM_WORKERS", "0")), 1)
+MAX_JOBS_PER_WORKER = int(os.getenv("PIPELINE_WORKER_MAX_JOBS", "20"))
+READY_TIMEOUT = 300.0
+
+
+class WorkerSpawnError(RuntimeError):
+    pass
+
+
+class WorkerDied(RuntimeError):
+    pass
+
+
+def _worker_main(conn, max_jobs: int) -> None:
+    t0 = time.perf_counter()
+    import app2  # the expensive part: pandas, seaborn, crewai, agentops, LLM client
+
+    conn.send(("ready", os.getpid(), time.perf_counter() - t0))
+    for _ in range(max_jobs):
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        if msg is None:
+            return
+        kind, payload = msg
+        try:
+            if kind == "run":
+                result = app2.run_pipeline(payload)
+            elif kind == "build":
+                # everything a run does before the first model call
+                t = time.perf_counter()
+                app2.PerformanceAnalysisCrew().crew()
+                result = time.perf_counter() - t
+            else:
+                raise ValueError(f"unknown message {kind!r}")
+            conn.send(("ok", result))
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+
+
+class _Worker:
+    def __init__(self, ctx, max_jobs: int):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(child, max_jobs), daemon=True)
+        self.proc.start()
+        child.close()
+        self.jobs = 0
+        self.import_seconds: Optional[float] = None
+
+    def wait_ready(self, timeout: float) -> None:
+        if not self.conn.poll(timeout):
+            raise TimeoutError("pipeline worker did not start in time")
+        try:
+            _, _, self.import_seconds = self.conn.recv()
+        except EOFError:
+            self.proc.join(5)
+            raise RuntimeError(f"pipeline worker exited with code {self.proc.exitcode} while importing app2") from None
+
+    def kill(self) -> None:
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.proc.join(5)
+        self.conn.close()
+
+
+class WarmWorkerPool:
+    def __init__(self, size: int = 1, max_jobs: int = MAX_JOBS_PER_WORKER):
+        self.max_jobs = max_jobs
+        self._ctx = mp.get_context("spawn")
+        self._idle: "queue.Queue[Optional[_Worker]]" = queue.Queue()  # None wakes a caller after a failed spawn
+        self._closed = False
+        self._lock = threading.Lock()
+        self._live = 0       # ready workers, idle or busy
+        self._spawning = 0
+        self._spawn_error: Optional[str] = None
+        for _ in range(size):
+            self._spawn_async()
+
+    def _spawn(self) -> None:
+        try:
+            worker = _Worker(self._ctx, self.max_jobs)
+            try:
+                worker.wait_ready(READY_TIMEOUT)
+            except Exception:
+                worker.kill()
+                raise
+        except Exception as e:
+            with self._lock:
+                self._spawning -= 1
+                self._spawn_error = f"{type(e).__name__}: {e}"
+            self._idle.put(None)
+            return
+        with self._lock:
+            self._spawning -= 1
+            self._spawn_error = None
+            if not self._closed:
+                self._live += 1
+        if self._closed:
+            worker.kill()
+        else:
+            self._idle.put(worker)
+
+    def _spawn_async(self) -> None:
+        with self._lock:
+            self._spawning += 1
+        threading.Thread(target=self._spawn, name="pipeline-worker-spawn", daemon=True).start()
+
+    def _retire(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            self._live -= 1
+        self._spawn_async()
+
+    def _acquire(self, timeout: float = READY_TIMEOUT) -> _Worker:
+        """An idle worker; raises WorkerSpawnError at once when none exists or is starting."""
+        while True:
+            with self._lock:
+                error = self._spawn_error if not self._live and not self._spawning else None
+            if error is not None:
+                self._spawn_async()  # try again for the next run
+                raise WorkerSpawnError(f"no pipeline worker could be started: {error}")
+            try:
+                worker = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("no pipeline worker became ready in time") from None
+            if worker is not None:
+                return worker
+
+    def _call(self, kind: str, payload, cancelled: Callable[[], bool] = lambda: False):
+        worker = self._acquire()
+        try:
+            worker.conn.send((kind, payload))
+            while not worker.conn.poll(0.5):
+                if cancelled():
+                    self._retire(worker)
+                    raise JobCancelled()
+                if not worker.proc.is_alive():
+                    raise EOFError()
+            status, result = worker.conn.recv()  # poll() is also true at EOF, when the worker has died
+        except (EOFError, OSError):
+            self._retire(worker)
+            raise WorkerDied(f"pipeline worker {worker.proc.pid} died (exit code {worker.proc.exitcode})") from None
+        worker.jobs += 1
+        if worker.jobs >= self.max_jobs:
+            self._retire(worker)  # the worker exits on its own; start its replacement now
+        else:
+            self._idle.put(worker)
+        if status == "error":
+            raise RuntimeError(result)
+        return result
+
+    def wait_ready(self, timeout: float = READY_TIMEOUT) -> None:
+        """Block until at least one worker has finished importing."""
+        worker = self._acquire(timeout)
+        self._idle.put(worker)
+
+    def run(self, inputs: Optional[dict] = None, cancelled: Callable[[], bool] = lambda: False) -> str:
+        """Run the pipeline in a warm worker; `cancelled` is polled and kills the run when true."""
+        return self._call("run", inputs, cancelled)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is None:
+                continue
+            worker.conn.send(None)
+            worker.kill()
+
+
+def benchmark(runs: int = 3) -> dict:
+    """Time a cold `python -c 'import app2; build crew'` against the same build in a warm worker."""
+    import subprocess
+    import sys
+
+    code = "import app2; app2.PerformanceAnalysisCrew().crew()"
+    cold = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+        cold.append(time.perf_counter() - t)
+
+    pool = WarmWorkerPool(size=1, max_jobs=runs + 1)
+    warm = []
+    try:
+        pool.wait_ready()
+        for _ in range(runs):
+            t = time.perf_counter()
+            pool._call("build", None)
+            warm.append(time.perf_counter() - t)
+    finally:
+        pool.close()
+    return {"cold_seconds": cold, "warm_seconds": warm,
+            "speedup": (sum(cold) / len(cold)) / max(sum(warm) / len(warm), 1e-9)}
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Warm pipeline workers.")
+    parser.add_argument("--bench", action="store_true", help="compare cold and warm startup")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    if args.bench:
+        print(json.dumps(benchmark(args.runs), indent=2))
+    else:
+        pool = WarmWorkerPool(size=1)
+        try:
+            print(pool.run())
+        finally:
+            pool.close()
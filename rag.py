@@ -2,12 +2,16 @@
 
 from fastapi import FastAPI, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from dotenv import load_dotenv
-import os, tempfile, uuid
-from pinecone import Pinecone
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import io, itertools, json, os, threading, time, uuid
 import google.generativeai as genai
+from embedding_cache import EMBED_BATCH_SIZE, embed_texts, get_cache
+from local_index import get_local_index
+from vector_upsert import upsert_records
+from answer_cache import answer_cache
+from log_chunker import detect_log_format, iter_log_chunks
 
 load_dotenv()
 
@@ -25,30 +29,109 @@ app.add_middleware(
 pinecone_client = None
 index_name = "index1"
 index_dimensions = 1024
+# "pinecone" (default) or "local": an on-disk LocalVectorIndex under LOCAL_INDEX_DIR, no network needed
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
 
 # Models
-embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-roberta-large-v1")
+# The embedding model (and torch behind it) loads in a background thread started at
+# startup, so the server answers `/` and `/ready` at once; endpoints that embed wait for it.
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-roberta-large-v1")
+EMBEDDING_PRELOAD = os.getenv("EMBEDDING_PRELOAD", "1") != "0"
+EMBEDDING_LOAD_TIMEOUT = float(os.getenv("EMBEDDING_LOAD_TIMEOUT", "600"))
+
+embedding_model = None
+_model_ready = threading.Event()
+_model_lock = threading.Lock()
+_model_thread = None
+_model_error = None
+_model_load_seconds = None
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# "gemini" (default) or "fake": a local stand-in that streams words from the retrieved context
+ASK_MODEL_BACKEND = os.getenv("ASK_MODEL_BACKEND", "gemini")
+FAKE_MODEL_DELAY = float(os.getenv("FAKE_MODEL_DELAY", "0.02"))
 
-def chunk_text(text, chunk_size=1000, overlap=200):
-    chunks, start, text_length = [], 0, len(text)
-    while start < text_length:
-        end = min(start + chunk_size, text_length)
-        last_period = text.rfind('.', start, end)
-        last_newline = text.rfind('\n', start, end)
+def _load_embedding_model():
+    global embedding_model, _model_error, _model_load_seconds
+    try:
+        t0 = time.perf_counter()
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME,
+                                      encode_kwargs={"batch_size": EMBED_BATCH_SIZE})
+        model.embed_query("warmup")  # first forward pass allocates buffers; keep it off the first request
+        with _model_lock:
+            # /ready reads both under the lock, so it never sees the model without its load time
+            _model_load_seconds = time.perf_counter() - t0
+            embedding_model = model
+    except Exception as e:
+        with _model_lock:
+            _model_error = f"{type(e).__name__}: {e}"
+    finally:
+        _model_ready.set()
+
+def start_model_loading():
+    """Start loading the model unless it is loaded or loading; a failed load is retried."""
+    global _model_thread, _model_error
+    with _model_lock:
+        if _model_thread is not None and _model_error is not None and not _model_thread.is_alive():
+            _model_error = None
+            _model_ready.clear()
+            _model_thread = None
+        if _model_thread is None:
+            _model_thread = threading.Thread(target=_load_embedding_model, name="embedding-model-loader", daemon=True)
+            _model_thread.start()
+
+def get_embedding_model(timeout=EMBEDDING_LOAD_TIMEOUT):
+    """Block until the embedding model is loaded, starting the load if nothing has yet."""
+    start_model_loading()
+    if not _model_ready.wait(timeout):
+        raise TimeoutError("Embedding model is still loading")
+    if embedding_model is None:
+        raise RuntimeError(f"Embedding model failed to load: {_model_error}")
+    return embedding_model
+
+@app.on_event("startup")
+async def preload_embedding_model():
+    if EMBEDDING_PRELOAD:
+        start_model_loading()
+
+UPLOAD_READ_BLOCK = 64 * 1024
+
+def iter_chunks(pieces, chunk_size=1000, overlap=200):
+    """chunk_text over text that arrives in pieces; only the unfinished tail is buffered."""
+    buf, base, start, eof = "", 0, 0, False  # buf holds the text from offset `base` on
+    pieces = iter(pieces)
+    while True:
+        # a chunk can be cut once a full chunk_size (plus one char, to know it is not the end) is buffered
+        while not eof and base + len(buf) <= start + chunk_size:
+            piece = next(pieces, None)
+            if piece is None:
+                eof = True
+            else:
+                buf = buf[start - base:] + piece
+                base = start
+        text_length = base + len(buf) if eof else None
+        if eof and start >= text_length:
+            return
+        end = min(start + chunk_size, text_length) if eof else start + chunk_size
+        last_period = buf.rfind('.', start - base, end - base) + base
+        last_newline = buf.rfind('\n', start - base, end - base) + base
         if last_period > start + chunk_size // 2:
             end = last_period + 1
         elif last_newline > start + chunk_size // 2:
             end = last_newline + 1
-        chunks.append(text[start:end])
-        start = end - overlap if end < text_length else text_length
-    return chunks
+        yield buf[start - base:end - base]
+        start = end - overlap if not eof or end < text_length else text_length
 
-def embed_chunks(chunks):
-    return [embedding_model.embed_documents([chunk])[0] for chunk in chunks]
+def chunk_text(text, chunk_size=1000, overlap=200):
+    return list(iter_chunks([text], chunk_size, overlap))
+
+def embed_chunks(chunks, batch_size=EMBED_BATCH_SIZE):
+    # batched through the model, with unchanged chunks served from the on-disk cache
+    return embed_texts(get_embedding_model(), EMBEDDING_MODEL_NAME, chunks, batch_size, cache=get_cache())
 
 def init_pinecone():
     global pinecone_client
+    from pinecone import Pinecone
     api_key = os.getenv("PINECONE_API_KEY")
     if not api_key:
         raise ValueError("Missing Pinecone API Key")
@@ -57,33 +140,77 @@ def init_pinecone():
         raise ValueError(f"Index '{index_name}' not found")
     return pinecone_client.Index(index_name)
 
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """Index handle, created once per process and reused by every request."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            if VECTOR_BACKEND == "local":
+                _index = get_local_index(index_name, index_dimensions)
+            else:
+                _index = init_pinecone()
+        return _index
+
+def ingest_file(f, file_name, index):
+    """Decode, chunk, embed and upsert a binary file object without ever holding all of it."""
+    text = io.TextIOWrapper(f, encoding="utf-8")  # incremental utf-8 + universal newlines, like open(..., "r")
+    try:
+        pieces = iter(lambda: text.read(UPLOAD_READ_BLOCK), "")
+        first = next(pieces, "")
+        pieces = itertools.chain([first], pieces)
+        fmt = detect_log_format(first)
+        if fmt:
+            # logs: whole records, with repeats collapsed into one line carrying a count and time range
+            records = ((f"{file_name}-{uuid.uuid4()}", chunk.text,
+                        {"text": chunk.text, "file_name": file_name, "chunk_id": j, "log_records": chunk.records})
+                       for j, chunk in enumerate(iter_log_chunks(pieces, fmt)))
+        else:
+            records = ((f"{file_name}-{uuid.uuid4()}", chunk, {"text": chunk, "file_name": file_name, "chunk_id": j})
+                       for j, chunk in enumerate(iter_chunks(pieces)))
+        # embedding of the next batch overlaps the upserts of the previous ones
+        return upsert_records(index, records, embed_chunks)
+    finally:
+        text.detach()  # leave the upload's file open for starlette to close
+
 @app.post("/upload")
 async def upload_readme(file: UploadFile = File(...)):
-    temp_path = tempfile.mktemp(suffix=".md")
-    with open(temp_path, "wb") as f:
-        f.write(await file.read())
-    with open(temp_path, "r", encoding="utf-8") as f:
-        text = f.read()
-    os.unlink(temp_path)
-
-    chunks = chunk_text(text)
-    embeddings = embed_chunks(chunks)
-    index = init_pinecone()
-
-    for i in range(0, len(chunks), 100):
-        i_end = min(i + 100, len(chunks))
-        ids = [f"{file.filename}-{uuid.uuid4()}" for _ in range(i, i_end)]
-        metadata = [{"text": chunks[j], "file_name": file.filename, "chunk_id": j} for j in range(i, i_end)]
-        vectors = [(ids[j-i], embeddings[j], metadata[j-i]) for j in range(i, i_end)]
-        index.upsert(vectors=vectors)
+    index = await run_in_threadpool(get_index)
+    await file.seek(0)
+    await run_in_threadpool(ingest_file, file.file, file.filename, index)
+    answer_cache.invalidate(file.filename)  # answers about the old contents are stale now
 
     return JSONResponse(content={"message": f"Successfully processed {file.filename}"})
 
-@app.post("/ask")
-async def ask_question(query: str = Form(...), file_name: str = Form(...)):
-    index = init_pinecone()
-    query_embedding = embedding_model.embed_query(query)
-    matches = index.query(vector=query_embedding, top_k=3, include_metadata=True, filter={"file_name": file_name})
+def generate_stream(prompt, context=""):
+    """Yield the answer text piece by piece as the model produces it."""
+    if ASK_MODEL_BACKEND == "fake":
+        words = (context or prompt).split()[:120]
+        yield "**Answer (fake model)**\n\n"
+        for word in words:
+            time.sleep(FAKE_MODEL_DELAY)
+            yield word + " "
+        return
+    model = genai.GenerativeModel("gemini-2.0-flash")
+    for chunk in model.generate_content(prompt, generation_config={"temperature": 0.7}, stream=True):
+        if chunk.text:
+            yield chunk.text
+
+async def _retrieve(query, file_name):
+    """(cached answer, None, None) on a cache hit, else (None, query embedding, (prompt, context))."""
+    cached = answer_cache.get(file_name, query)
+    if cached is not None:
+        return cached, None, None
+    index = await run_in_threadpool(get_index)
+    model = await run_in_threadpool(get_embedding_model)
+    query_embedding = await run_in_threadpool(model.embed_query, query)
+    cached = answer_cache.get(file_name, query, query_embedding)
+    if cached is not None:
+        return cached, None, None
+    matches = await run_in_threadpool(index.query, vector=query_embedding, top_k=3, include_metadata=True,
+                                      filter={"file_name": file_name})
     context = "\n\n".join([match.metadata["text"] for match in matches.matches])
     prompt = f"""
     Context:
@@ -92,9 +219,52 @@ async def ask_question(query: str = Form(...), file_name: str = Form(...)):
     Question: {query}
     Provide a concise and helpful answer in well-formatted Markdown.
     """
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt, generation_config={"temperature": 0.7})
-    return JSONResponse(content={"response": response.text})
+    return None, query_embedding, (prompt, context)
+
+@app.post("/ask")
+async def ask_question(query: str = Form(...), file_name: str = Form(...)):
+    cached, query_embedding, prompt_context = await _retrieve(query, file_name)
+    if cached is not None:
+        return JSONResponse(content={"response": cached, "cached": True})
+    answer = await run_in_threadpool(lambda: "".join(generate_stream(*prompt_context)))
+    answer_cache.put(file_name, query, query_embedding, answer)
+    return JSONResponse(content={"response": answer})
+
+def _sse(data, event=None):
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_question_stream(query: str = Form(...), file_name: str = Form(...)):
+    """Same as /ask, but the answer arrives as server-sent `data: {"delta": ...}` events."""
+    async def events():
+        try:
+            cached, query_embedding, prompt_context = await _retrieve(query, file_name)
+            if cached is not None:
+                yield _sse({"delta": cached})
+                yield _sse({"cached": True}, event="done")
+                return
+            parts = []
+            async for piece in iterate_in_threadpool(generate_stream(*prompt_context)):
+                parts.append(piece)
+                yield _sse({"delta": piece})
+            answer_cache.put(file_name, query, query_embedding, "".join(parts))
+            yield _sse({"cached": False}, event="done")
+        except Exception as e:
+            yield _sse({"error": f"{type(e).__name__}: {e}"}, event="error")
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/ready")
+def ready():
+    with _model_lock:
+        model, load_seconds, error = embedding_model, _model_load_seconds, _model_error
+    if model is not None:
+        return {"ready": True, "model": EMBEDDING_MODEL_NAME, "load_seconds": round(load_seconds, 2)}
+    if error is not None:
+        return JSONResponse(status_code=503, content={"ready": False, "status": "error", "error": error})
+    status = "loading" if _model_thread is not None else "not_started"
+    return JSONResponse(status_code=503, content={"ready": False, "status": status})
 
 @app.get("/")
 def ui():
@@ -337,19 +507,45 @@ def ui():
                 formData.append('file_name', fileName);
 
                 try {
-                    const response = await fetch('/ask', {
+                    const response = await fetch('/ask/stream', {
                         method: 'POST',
                         body: formData
                     });
-                    const data = await response.json();
-                    const botResponse = data.response;
+                    if (!response.ok || !response.body) throw new Error(`HTTP ${response.status}`);
 
                     const botMessageDiv = document.createElement('div');
                     botMessageDiv.classList.add('chat-message', 'bot-message');
-                    botMessageDiv.innerHTML = marked.parse(botResponse); // Render Markdown
-
                     chatContainer.appendChild(botMessageDiv);
-                    chatContainer.scrollTop = chatContainer.scrollHeight; // Scroll to bottom
+
+                    // Render the Markdown as server-sent deltas arrive, at most once per frame
+                    let botResponse = '';
+                    let pending = false;
+                    const render = () => {
+                        pending = false;
+                        botMessageDiv.innerHTML = marked.parse(botResponse);
+                        chatContainer.scrollTop = chatContainer.scrollHeight; // Scroll to bottom
+                    };
+                    const reader = response.body.getReader();
+                    const decoder = new TextDecoder();
+                    let buffer = '';
+                    while (true) {
+                        const { value, done } = await reader.read();
+                        if (done) break;
+                        buffer += decoder.decode(value, { stream: true });
+                        let sep;
+                        while ((sep = buffer.indexOf('\n\n')) !== -1) {
+                            const frame = buffer.slice(0, sep);
+                            buffer = buffer.slice(sep + 2);
+                            const event = (frame.match(/^event: (.*)$/m) || [])[1] || 'message';
+                            const data = JSON.parse((frame.match(/^data: (.*)$/m) || [])[1] || '{}');
+                            if (event === 'error') throw new Error(data.error);
+                            if (data.delta) {
+                                botResponse += data.delta;
+                                if (!pending) { pending = true; requestAnimationFrame(render); }
+                            }
+                        }
+                    }
+                    render();
                 } catch (error) {
                     const errorMessageDiv = document.createElement('div');
                     errorMessageDiv.classList.add('bot-message');
@@ -0,0 +1,249 @@
+# resource_sampler.py
+"""
+Background cpu/mem/disk sampler backed by a fixed-size ring buffer.
+
+The ring buffer lives in a memory-mapped file (a small header plus 20 bytes
+per sample) shared by every process on the machine. Exactly one process owns
+it: the first to take SAMPLER_PATH.lock (normally the FastAPI server). The
+owner runs a daemon thread that samples psutil into the ring; app2 runs and
+warm workers open the same file read-only and see each sample as soon as it
+is written. If the owner exits, the next reader to look takes over. A new
+owner keeps the history already in the file. `latest()` returns the most
+recent window immediately, or an empty frame when the newest sample is stale.
+"""
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import psutil
+
+SAMPLE_DTYPE = np.dtype([
+    ("ts", "<f8"),     # unix time, seconds
+    ("cpu", "<f4"),
+    ("mem", "<f4"),
+    ("disk", "<f4"),
+])
+HEADER_DTYPE = np.dtype([
+    ("next", "<i8"),      # slot the next sample goes to
+    ("count", "<i8"),     # valid samples, <= capacity
+    ("capacity", "<i8"),
+    ("owner", "<i8"),     # pid of the sampling process
+])
+
+SAMPLER_PATH = os.getenv("RESOURCE_SAMPLER_PATH", "./.cache/resource_samples.ring")
+SAMPLE_INTERVAL = float(os.getenv("RESOURCE_SAMPLE_INTERVAL", "1.0"))
+CAPACITY = int(os.getenv("RESOURCE_SAMPLER_CAPACITY", str(24 * 3600)))
+
+
+def _pid_alive(pid: int) -> bool:
+    return pid > 0 and psutil.pid_exists(pid)
+
+
+class ResourceSampler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL, capacity: int = CAPACITY,
+                 path: Optional[str] = SAMPLER_PATH, persist_every: float = 30.0, disk_path: str = "/"):
+        self.interval = interval
+        self.capacity = capacity
+        self.path = path
+        self.persist_every = persist_every
+        self.disk_path = disk_path
+        # a sample older than this means nobody is sampling (two intervals, to allow for timer jitter)
+        self.stale_after = 2 * interval
+        self.owner = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._header: Optional[np.ndarray] = None
+        self._buf: Optional[np.ndarray] = None
+        if path is None:
+            # private, in-memory ring
+            self.owner = True
+            self._header = np.zeros(1, dtype=HEADER_DTYPE)
+            self._header["capacity"] = capacity
+            self._buf = np.zeros(capacity, dtype=SAMPLE_DTYPE)
+        else:
+            self._claim()
+
+    # — ownership —
+    @property
+    def _lock_path(self) -> str:
+        return self.path + ".lock"
+
+    def _take_lock(self) -> bool:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self._lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    with open(self._lock_path, "r") as f:
+                        pid = int(f.read().strip() or 0)
+                except (OSError, ValueError):
+                    pid = 0
+                if _pid_alive(pid) and pid != os.getpid():
+                    return False
+                try:
+                    os.remove(self._lock_path)  # left behind by a dead owner
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def _release_lock(self) -> None:
+        if self.owner and self.path:
+            try:
+                with open(self._lock_path, "r") as f:
+                    mine = f.read().strip() == str(os.getpid())
+                if mine:
+                    os.remove(self._lock_path)
+            except OSError:
+                pass
+
+    def _claim(self) -> None:
+        """Become the owner if nobody is, else map the owner's ring read-only."""
+        if self._take_lock():
+            self.owner = True
+            self._map(writable=True)
+            self._header["owner"] = os.getpid()
+            atexit.register(self._release_lock)
+        else:
+            self.owner = False
+            self._map(writable=False)
+
+    def _map(self, writable: bool) -> None:
+        size = HEADER_DTYPE.itemsize + self.capacity * SAMPLE_DTYPE.itemsize
+        if writable:
+            existing = None
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= HEADER_DTYPE.itemsize:
+                existing = np.fromfile(self.path, dtype=HEADER_DTYPE, count=1)[0]
+            if existing is None or existing["capacity"] != self.capacity or os.path.getsize(self.path) != size:
+                with open(self.path, "wb") as f:
+                    f.truncate(size)  # new (or resized) ring; zeroed header means empty
+            mode = "r+"
+        else:
+            if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER_DTYPE.itemsize:
+                return  # the owner has not created it yet
+            capacity = int(np.fromfile(self.path, dtype=HEADER_DTYPE, count=1)[0]["capacity"])
+            if capacity <= 0:
+                return
+            self.capacity, mode = capacity, "r"
+        self._header = np.memmap(self.path, dtype=HEADER_DTYPE, mode=mode, shape=(1,))
+        if writable:
+            self._header["capacity"] = self.capacity
+        self._buf = np.memmap(self.path, dtype=SAMPLE_DTYPE, mode=mode, offset=HEADER_DTYPE.itemsize,
+                              shape=(self.capacity,))
+
+    def _check_owner(self) -> None:
+        """A reader whose owner has gone takes over sampling."""
+        if self.owner or self.path is None:
+            return
+        owner = int(self._header["owner"][0]) if self._header is not None else 0
+        if owner and _pid_alive(owner):
+            return
+        if self._take_lock():
+            self.owner = True
+            self._map(writable=True)
+            self._header["owner"] = os.getpid()
+            atexit.register(self._release_lock)
+            self.start()
+        elif self._header is None:
+            self._map(writable=False)
+
+    # — ring buffer —
+    def _append(self, rows: np.ndarray) -> None:
+        rows = rows[-self.capacity:]
+        with self._lock:
+            nxt, count = int(self._header["next"][0]), int(self._header["count"][0])
+            self._buf[(nxt + np.arange(len(rows))) % self.capacity] = rows
+            # samples first, then the header that makes them visible to readers
+            self._header["next"] = (nxt + len(rows)) % self.capacity
+            self._header["count"] = min(count + len(rows), self.capacity)
+
+    def snapshot(self) -> np.ndarray:
+        """Copy of the valid samples, oldest first."""
+        self._check_owner()
+        if self._header is None:
+            return np.zeros(0, dtype=SAMPLE_DTYPE)
+        with self._lock:
+            nxt, count = int(self._header["next"][0]), int(self._header["count"][0])
+            if count < self.capacity:
+                return np.array(self._buf[:count])
+            return np.concatenate([self._buf[nxt:], self._buf[:nxt]])
+
+    def sample_now(self) -> None:
+        self._check_owner()
+        if not self.owner:
+            return  # the owning process is sampling
+        row = np.array([(time.time(), psutil.cpu_percent(interval=None),
+                         psutil.virtual_memory().percent, psutil.disk_usage(self.disk_path).percent)],
+                       dtype=SAMPLE_DTYPE)
+        self._append(row)
+
+    # — persistence —
+    def persist(self) -> None:
+        """Flush the mapped ring to disk (readers already see it through the page cache)."""
+        if self.owner and isinstance(self._buf, np.memmap):
+            self._header.flush()
+            self._buf.flush()
+
+    # — thread —
+    def _run(self) -> None:
+        psutil.cpu_percent(interval=None)  # first call only primes the counter
+        last_persist = time.monotonic()
+        while not self._stop.wait(self.interval):
+            self.sample_now()
+            if time.monotonic() - last_persist >= self.persist_every:
+                self.persist()
+                last_persist = time.monotonic()
+
+    def start(self) -> "ResourceSampler":
+        if self.owner and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.persist()
+        self._release_lock()
+
+    def latest(self, seconds: Optional[float] = None) -> pd.DataFrame:
+        """Samples from the last `seconds` (all buffered samples if None) as a DataFrame;
+        empty when the newest sample is stale, since it would not describe the present."""
+        rows = self.snapshot()
+        if len(rows) and time.time() - rows["ts"][-1] > self.stale_after:
+            rows = rows[:0]
+        if seconds is not None and len(rows):
+            rows = rows[rows["ts"] >= rows["ts"][-1] - seconds]
+        local_tz = datetime.now().astimezone().tzinfo
+        return pd.DataFrame({
+            # naive local time, like the pd.Timestamp.now() samples this replaces
+            "timestamp": pd.to_datetime(rows["ts"], unit="s", utc=True).tz_convert(local_tz).tz_localize(None),
+            "cpu_percent": rows["cpu"].astype(float),
+            "mem_percent": rows["mem"].astype(float),
+            "disk_percent": rows["disk"].astype(float),
+        })
+
+
+_sampler: Optional[ResourceSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> ResourceSampler:
+    """Process-wide sampler; it samples only if this process owns the shared ring."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = ResourceSampler().start()
+        return _sampler
@@ -0,0 +1,172 @@
+# template_miner.py
+"""
+Online log template mining (Drain-style fixed-depth parse tree).
+
+Every record's message is reduced to a template id plus its parameters:
+
+    sshd(pam_unix): authentication failure; logname= uid=<*> euid=<*> tty=NODEVssh ruser= rhost=<*>
+    params: ['uid=0', 'euid=0', 'rhost=218.188.2.4']
+
+Messages are routed through a tree keyed on token count and then on the
+first `depth - 2` tokens (tokens holding variables go to a shared <*>
+branch), and are compared only against the few templates in the leaf they
+land in. A message joins the most similar template in that leaf if enough
+of their tokens match; positions that differ become <*>. Each template
+keeps its count, first/last-seen time and severities, so a handful of table
+rows stand in for the raw lines.
+
+    python template_miner.py logs/service.log logs/apache.log
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional
+
+from log_chunker import mask_message
+from log_parser import LogRecord, iter_records
+
+WILDCARD = "<*>"
+
+
+class LogTemplate:
+    __slots__ = ("id", "tokens", "count", "first_seen", "last_seen", "severities")
+
+    def __init__(self, template_id: int, tokens: list[str]):
+        self.id = template_id
+        self.tokens = tokens
+        self.count = 0
+        self.first_seen: Optional[datetime] = None
+        self.last_seen: Optional[datetime] = None
+        self.severities: Counter = Counter()
+
+    @property
+    def template(self) -> str:
+        head, *rest = self.tokens
+        return f"{head}: {' '.join(rest)}"
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "template": self.template,
+            "count": self.count,
+            "first_seen": self.first_seen.isoformat(sep=" ") if self.first_seen else None,
+            "last_seen": self.last_seen.isoformat(sep=" ") if self.last_seen else None,
+            "severities": dict(self.severities),
+        }
+
+
+class _Node:
+    __slots__ = ("children", "templates")
+
+    def __init__(self):
+        self.children: dict = {}
+        self.templates: list[LogTemplate] = []
+
+
+class TemplateMiner:
+    def __init__(self, depth: int = 4, sim_threshold: float = 0.4, max_children: int = 100):
+        self.depth = max(depth, 3)
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.templates: list[LogTemplate] = []
+        self.records = 0
+        self.raw_chars = 0
+        self._root: dict[int, _Node] = {}
+
+    # — tree —
+    def _leaf(self, tokens: list[str]) -> _Node:
+        node = self._root.setdefault(len(tokens), _Node())
+        for token in tokens[:self.depth - 2]:
+            key = WILDCARD if WILDCARD in token else token
+            child = node.children.get(key)
+            if child is None:
+                if len(node.children) >= self.max_children:
+                    key = WILDCARD
+                    child = node.children.get(key)
+                if child is None:
+                    child = node.children[key] = _Node()
+            node = child
+        return node
+
+    @staticmethod
+    def _similarity(template: list[str], tokens: list[str]) -> tuple[float, int]:
+        same = wild = 0
+        for t, tok in zip(template, tokens):
+            if t == WILDCARD:
+                wild += 1
+            elif t == tok:
+                same += 1
+        return (same / len(tokens) if tokens else 1.0), wild
+
+    def add(self, message: str, source: str = "", timestamp: Optional[datetime] = None,
+            severity: str = "") -> tuple[int, list[str]]:
+        """Assign `message` to a template; returns (template id, parameters)."""
+        raw = [source or "-"] + message.split()
+        tokens = [raw[0]] + mask_message(message).split()
+        self.records += 1
+        self.raw_chars += len(message) + len(source) + 1
+
+        leaf = self._leaf(tokens)
+        best, best_key = None, (-1.0, -1)
+        for tpl in leaf.templates:
+            key = self._similarity(tpl.tokens, tokens)
+            if key > best_key:
+                best, best_key = tpl, key
+        if best is None or best_key[0] < self.sim_threshold:
+            best = LogTemplate(len(self.templates), tokens)
+            self.templates.append(best)
+            leaf.templates.append(best)
+        else:
+            best.tokens = [t if t == tok else WILDCARD for t, tok in zip(best.tokens, tokens)]
+
+        best.count += 1
+        if severity:
+            best.severities[severity] += 1
+        if timestamp is not None:
+            if best.first_seen is None or timestamp < best.first_seen:
+                best.first_seen = timestamp
+            if best.last_seen is None or timestamp > best.last_seen:
+                best.last_seen = timestamp
+        params = [r for r, t in zip(raw, best.tokens) if WILDCARD in t]
+        return best.id, params
+
+    def add_record(self, rec: LogRecord) -> tuple[int, list[str]]:
+        return self.add(rec.message.replace("\n", " "), rec.source, rec.timestamp, rec.severity)
+
+    def update(self, records: Iterable[LogRecord]) -> "TemplateMiner":
+        for rec in records:
+            self.add_record(rec)
+        return self
+
+    # — output —
+    def top(self, n: Optional[int] = None) -> list[LogTemplate]:
+        return sorted(self.templates, key=lambda t: -t.count)[:n]
+
+    def table(self, n: Optional[int] = 30) -> str:
+        """Markdown table of the `n` most frequent templates."""
+        def clock(ts):
+            return ts.strftime("%Y-%m-%d %H:%M:%S") if ts else "-"
+
+        rows = ["| id | count | first seen | last seen | severity | template |",
+                "|---|---|---|---|---|---|"]
+        for t in self.top(n):
+            severity = ", ".join(f"{s} {c}" for s, c in t.severities.most_common(2))
+            template = t.template.replace("|", "\\|")
+            rows.append(f"| T{t.id} | {t.count} | {clock(t.first_seen)} | {clock(t.last_seen)} | {severity} | {template} |")
+        return "\n".join(rows)
+
+
+def mine_files(paths: Iterable[str], miner: Optional[TemplateMiner] = None) -> TemplateMiner:
+    miner = miner or TemplateMiner()
+    for path in paths:
+        miner.update(iter_records(path))
+    return miner
+
+
+if __name__ == "__main__":
+    import sys
+
+    m = mine_files(sys.argv[1:])
+    table = m.table()
+    print(table)
+    print(f"\n{m.records} records -> {len(m.templates)} templates; "
+          f"{m.raw_chars} message chars -> {len(table)} table chars")
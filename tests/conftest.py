@@ -0,0 +1,15 @@
+import pytest
+
+from local_index import LocalVectorIndex
+
+
+@pytest.fixture
+def index_dimension():
+    return 16
+
+
+@pytest.fixture
+def index(tmp_path, index_dimension):
+    idx = LocalVectorIndex(str(tmp_path / "idx"), dimension=index_dimension)
+    yield idx
+    idx.close()
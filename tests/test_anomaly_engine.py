@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomaly_engine import StreamingAnomalyDetector, detect_anomalies
+
+
+def _metrics(n=3000, seed=7):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2025-04-06", periods=n, freq="s"),
+        "cpu_percent": 30 + rng.normal(0, 2, n),
+        "mem_percent": 55 + rng.normal(0, 1, n),
+        "disk_percent": np.full(n, 70.0),
+    })
+    df.loc[1000:1004, "cpu_percent"] += 40   # short cpu spike
+    df.loc[2000:2030, "mem_percent"] += 15   # sustained memory step
+    df.loc[2500, "disk_percent"] = 95.0      # one disk outlier
+    return df
+
+
+def test_injected_events_are_the_high_intervals():
+    high = [(str(iv.start), iv.metrics, iv.points) for iv in detect_anomalies(_metrics()) if iv.severity == "high"]
+    assert high == [
+        ("2025-04-06T00:16:40.000000000", ("cpu_percent",), 5),
+        ("2025-04-06T00:33:20.000000000", ("mem_percent",), 6),  # until the window has absorbed the step
+        ("2025-04-06T00:41:40.000000000", ("disk_percent",), 1),
+    ]
+
+
+@pytest.mark.parametrize("batch", [7, 250, 1001])
+def test_streaming_matches_batch(batch):
+    df = _metrics()
+    metrics = ["cpu_percent", "mem_percent", "disk_percent"]
+    expected = detect_anomalies(df)
+
+    detector = StreamingAnomalyDetector(metrics)
+    got = []
+    for s in range(0, len(df), batch):
+        part = df.iloc[s:s + batch]
+        got += detector.update(part["timestamp"].to_numpy(), part[metrics].to_numpy(dtype=float))
+    got += detector.flush()
+
+    assert [iv._replace(peak_score=0) for iv in got] == [iv._replace(peak_score=0) for iv in expected]
+    assert [iv.peak_score for iv in got] == pytest.approx([iv.peak_score for iv in expected], abs=0.02)
+
+
+def test_missing_metric_columns_are_skipped():
+    df = _metrics().drop(columns=["disk_percent"])
+    assert all("disk_percent" not in iv.metrics for iv in detect_anomalies(df))
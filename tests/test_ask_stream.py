@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("google.generativeai")
+from fastapi.testclient import TestClient
+
+import rag
+from answer_cache import answer_cache
+from local_index import LocalVectorIndex
+
+DIM = 16
+
+
+class _FakeEmbeddings:
+    def embed_query(self, text):
+        rng = np.random.default_rng(abs(hash(text)) % (1 << 32))
+        return rng.normal(size=DIM).astype(np.float32).tolist()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    index = LocalVectorIndex(str(tmp_path / "idx"), dimension=DIM)
+    model = _FakeEmbeddings()
+    index.upsert([("notes-0", model.embed_query("disk"), {"text": "disk usage peaked at 97 percent",
+                                                         "file_name": "notes.log", "chunk_id": 0})])
+    monkeypatch.setattr(rag, "ASK_MODEL_BACKEND", "fake")
+    monkeypatch.setattr(rag, "FAKE_MODEL_DELAY", 0.0)
+    monkeypatch.setattr(rag, "get_index", lambda: index)
+    monkeypatch.setattr(rag, "get_embedding_model", lambda: model)
+    answer_cache.invalidate("notes.log")
+    yield TestClient(rag.app)
+    answer_cache.invalidate("notes.log")
+    index.close()
+
+
+def _events(body):
+    """(event, data) pairs of a text/event-stream body."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+def test_stream_deltas_then_done(client):
+    res = client.post("/ask/stream", data={"query": "disk", "file_name": "notes.log"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+
+    events = _events(res.text)
+    assert events[-1] == ("done", {"cached": False})
+    answer = "".join(data["delta"] for kind, data in events[:-1])
+    assert all(kind == "message" for kind, _ in events[:-1])
+    assert answer.startswith("**Answer (fake model)**")
+    assert "disk usage peaked at 97 percent" in answer
+
+
+def test_repeated_question_streams_cached_answer(client):
+    first = _events(client.post("/ask/stream", data={"query": "disk", "file_name": "notes.log"}).text)
+    second = _events(client.post("/ask/stream", data={"query": "disk", "file_name": "notes.log"}).text)
+    assert second == [("message", {"delta": "".join(d["delta"] for _, d in first[:-1])}), ("done", {"cached": True})]
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import event_store
+from event_store import compact, partition_files, read_frame
+from log_checkpoint import CheckpointStore, incremental_aggregate_files
+
+LINES = [
+    "Jun 14 15:16:01 combo sshd(pam_unix)[19939]: authentication failure; rhost=1.2.3.4",
+    "Jun 14 16:02:44 combo su(pam_unix)[21416]: session opened for user cyrus",
+    "Jun 14 16:59:59 combo kernel: request timed out",
+    "Jun 15 04:06:18 combo logrotate: ALERT exited abnormally with [1]",
+]
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(event_store, "STORE_DIR", str(tmp_path / "store"))
+    return tmp_path / "store"
+
+
+def _ingest(tmp_path, *paths):
+    store = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    return incremental_aggregate_files([str(p) for p in paths], workers=1, store=store, store_dataset="events")
+
+
+def _rows(path):
+    df = read_frame("events", columns=["file", "message"])
+    return sorted(df.loc[df["file"] == os.path.abspath(path), "message"])
+
+
+def test_reingestion_never_duplicates_rows(tmp_path, store_dir):
+    log, other = tmp_path / "syslog.log", tmp_path / "other.log"
+    log.write_text("\n".join(LINES[:2]) + "\n" + LINES[2])  # last line unterminated
+    other.write_text(LINES[3] + "\n")
+    _ingest(tmp_path, log, other)
+    _ingest(tmp_path, log, other)
+    assert len(_rows(log)) == 2
+
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("\n" + LINES[3] + "\n")
+    _ingest(tmp_path, log, other)
+    assert len(_rows(log)) == 4
+
+    os.remove(log)  # rotated: the old rows go, the other file's stay
+    log.write_text(LINES[0] + "\n")
+    _ingest(tmp_path, log, other)
+    assert _rows(log) == ["authentication failure; rhost=1.2.3.4"]
+    assert len(_rows(other)) == 1
+
+
+def test_read_frame_prunes_hours_and_compacts(tmp_path, store_dir):
+    log = tmp_path / "syslog.log"
+    log.write_text("\n".join(LINES) + "\n")
+    agg = _ingest(tmp_path, log)
+    year = agg.first.year
+
+    assert len(partition_files("events")) == 3
+    assert len(partition_files("events", start=f"{year}-06-14 16:00", end=f"{year}-06-14 16:30")) == 1
+    window = read_frame("events", columns=["message"], start=f"{year}-06-14 16:00", end=f"{year}-06-14 16:30")
+    assert list(window["message"]) == ["session opened for user cyrus"]
+
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(LINES[1].replace("16:02:44", "16:30:00") + "\n")
+    _ingest(tmp_path, log)
+    compact("events")
+    assert len(partition_files("events")) == 3
+    assert len(read_frame("events")) == 5
+
+
+def test_empty_dataset_reads_typed_frame(store_dir):
+    df = read_frame("events", columns=["timestamp", "severity"])
+    assert df.empty and list(df.columns) == ["timestamp", "severity"]
+    assert df["timestamp"].dt.hour.empty
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from local_index import IVF_MIN_ROWS, LocalVectorIndex
+
+
+def _vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_upsert_query_fetch_delete(index):
+    vecs = _vectors(50)
+    index.upsert([(f"v{i}", v.tolist(), {"file_name": "a.log" if i % 2 else "b.log"}) for i, v in enumerate(vecs)])
+    assert index.describe_index_stats()["total_vector_count"] == 50
+
+    res = index.query(vecs[7].tolist(), top_k=3, include_metadata=True)
+    assert res.matches[0].id == "v7"
+    assert res.matches[0].score == pytest.approx(1.0, abs=1e-5)
+
+    res = index.query(vecs[7].tolist(), top_k=5, filter={"file_name": "b.log"})
+    assert all(int(m.id[1:]) % 2 == 0 for m in res.matches)
+
+    index.delete(ids=["v7"])
+    assert "v7" not in index.fetch(["v7"])["vectors"]
+    assert all(m.id != "v7" for m in index.query(vecs[7].tolist(), top_k=5).matches)
+
+
+def test_overwrite_keeps_one_row(index):
+    a, b = _vectors(2)
+    index.upsert([("x", a.tolist())])
+    index.upsert([("x", b.tolist(), {"file_name": "new.log"})])
+    assert index.describe_index_stats()["total_vector_count"] == 1
+    assert index.query(b.tolist(), top_k=1, include_metadata=True).matches[0].metadata == {"file_name": "new.log"}
+
+
+def test_reopen_replays_log(tmp_path):
+    path = str(tmp_path / "idx")
+    vecs = _vectors(10)
+    idx = LocalVectorIndex(path, dimension=16)
+    idx.upsert([(f"v{i}", v.tolist()) for i, v in enumerate(vecs)])
+    idx.delete(ids=["v3"])
+    idx.close()
+
+    idx = LocalVectorIndex(path)
+    try:
+        assert idx.describe_index_stats()["total_vector_count"] == 9
+        assert idx.query(vecs[5].tolist(), top_k=1).matches[0].id == "v5"
+    finally:
+        idx.close()
+
+
+def test_ivf_finds_exact_neighbour(tmp_path):
+    idx = LocalVectorIndex(str(tmp_path / "idx"), dimension=16, mode="ivf", nprobe=64)
+    try:
+        vecs = _vectors(IVF_MIN_ROWS + 500)
+        idx.upsert([(f"v{i}", v.tolist()) for i, v in enumerate(vecs)])
+        assert idx.query(vecs[123].tolist(), top_k=1).matches[0].id == "v123"
+        assert idx.describe_index_stats()["ivf_cells"] > 0
+    finally:
+        idx.close()
+
+
+def test_duplicate_new_ids_in_one_batch_after_ivf_training(tmp_path):
+    idx = LocalVectorIndex(str(tmp_path / "idx"), dimension=16, mode="ivf", nprobe=64)
+    try:
+        vecs = _vectors(IVF_MIN_ROWS + 500)
+        idx.upsert([(f"v{i}", v.tolist()) for i, v in enumerate(vecs)])
+        idx.query(vecs[0].tolist(), top_k=1)  # trains the IVF cells
+
+        first, last = _vectors(2, seed=1)
+        fresh = _vectors(5000, seed=2)  # grows the vector file past the trained assignment array
+        batch = [("dup", first.tolist())] + [(f"f{i}", v.tolist()) for i, v in enumerate(fresh)]
+        batch.append(("dup", last.tolist(), {"file_name": "last.log"}))
+        assert idx.upsert(batch)["upserted_count"] == len(fresh) + 1
+
+        assert idx.describe_index_stats()["total_vector_count"] == len(vecs) + len(fresh) + 1
+        hit = idx.query(last.tolist(), top_k=1, include_metadata=True).matches[0]
+        assert (hit.id, hit.metadata) == ("dup", {"file_name": "last.log"})
+    finally:
+        idx.close()
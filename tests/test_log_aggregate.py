@@ -0,0 +1,50 @@
+import pytest
+
+import log_aggregate
+from log_aggregate import LogAggregate, aggregate_file, split_ranges
+
+SYSLOG = [
+    "Jun 14 15:16:01 combo sshd(pam_unix)[19939]: authentication failure; rhost=1.2.3.4",
+    "Jun 14 16:02:44 combo su(pam_unix)[21416]: session opened for user cyrus",
+    "Jun 14 16:59:59 combo kernel: request timed out",
+    "Jun 15 04:06:18 combo logrotate: ALERT exited abnormally with [1]",
+]
+WINDOWS = [
+    "TimeGenerated\tEventID\tSource\tType\tCategory\tMessage",
+    "Sun Apr  6 04:22:43 2025\t1796\tMicrosoft-Windows-TPM-WMI\t1\t0\tThe Secure Boot update failed",
+    "  continued on a second line",
+    "  and a third",
+    "Sun Apr  6 05:10:00 2025\t7036\tService Control Manager\t4\t0\tThe BITS service entered the running state.",
+    "Sun Apr  6 05:11:00 2025\t10016\tDistributedCOM\t2\t0\tApplication-specific permission settings",
+]
+
+
+# multi-line windows records straddle shard boundaries and must still be counted once
+@pytest.mark.parametrize("lines, total", [(SYSLOG * 500, 2000), (WINDOWS[:1] + WINDOWS[1:] * 400, 1200)])
+def test_sharded_aggregate_matches_single_process(tmp_path, monkeypatch, lines, total):
+    path = tmp_path / "big.log"
+    path.write_text("\n".join(lines) + "\n")
+    monkeypatch.setattr(log_aggregate, "MIN_PARALLEL_BYTES", 0)
+
+    single = aggregate_file(str(path), workers=1, year=2005)
+    sharded = aggregate_file(str(path), workers=3, year=2005)
+    assert sharded.to_dict() == single.to_dict()
+    assert single.total == total
+
+
+def test_split_ranges_start_on_lines(tmp_path):
+    path = tmp_path / "sys.log"
+    data = ("\n".join(SYSLOG * 50) + "\n").encode()
+    path.write_bytes(data)
+    ranges = split_ranges(str(path), 7)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(data[start - 1:start] == b"\n" for start, _ in ranges[1:])
+
+
+def test_aggregate_round_trips_through_dict(tmp_path):
+    path = tmp_path / "sys.log"
+    path.write_text("\n".join(SYSLOG) + "\n")
+    agg = aggregate_file(str(path), workers=1, year=2005)
+    assert LogAggregate.from_dict(agg.to_dict()).to_dict() == agg.to_dict()
+    assert agg.errors_by_hour and agg.problems
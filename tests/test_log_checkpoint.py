@@ -0,0 +1,84 @@
+import os
+
+import log_checkpoint
+from log_aggregate import aggregate_file
+from log_checkpoint import CheckpointStore, incremental_aggregate, incremental_aggregate_files
+
+LINES = [
+    "Jun 14 15:16:01 combo sshd(pam_unix)[19939]: authentication failure; rhost=1.2.3.4",
+    "Jun 14 16:02:44 combo su(pam_unix)[21416]: session opened for user cyrus",
+    "Jun 14 16:59:59 combo kernel: request timed out",
+    "Jun 15 04:06:18 combo logrotate: ALERT exited abnormally with [1]",
+]
+
+
+def _append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _parsed_ranges(monkeypatch):
+    ranges = []
+    real = log_checkpoint.aggregate_file
+
+    def recording(path, start=0, end=None, **kwargs):
+        ranges.append((start, end))
+        return real(path, start=start, end=end, **kwargs)
+
+    monkeypatch.setattr(log_checkpoint, "aggregate_file", recording)
+    return ranges
+
+
+def test_rerun_parses_only_appended_lines(tmp_path, monkeypatch):
+    log = tmp_path / "syslog.log"
+    store = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    ranges = _parsed_ranges(monkeypatch)
+
+    _append(log, "\n".join(LINES[:2]) + "\n")
+    first_end = log.stat().st_size
+    assert incremental_aggregate(str(log), store, workers=1).total == 2
+    _append(log, "\n".join(LINES[2:]) + "\n")
+    agg = incremental_aggregate(str(log), store, workers=1)
+
+    assert ranges == [(0, first_end), (first_end, log.stat().st_size)]
+    assert agg.to_dict() == aggregate_file(str(log), workers=1, year=agg.first.year).to_dict()
+
+
+def test_unterminated_line_is_counted_but_not_checkpointed(tmp_path):
+    log = tmp_path / "syslog.log"
+    store = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    _append(log, LINES[0] + "\n" + LINES[1])
+
+    assert incremental_aggregate(str(log), store, workers=1).total == 2
+    assert store.get(str(log))["offset"] == len(LINES[0]) + 1
+    _append(log, "\n")
+    assert incremental_aggregate(str(log), store, workers=1).total == 2
+    assert store.get(str(log))["offset"] == log.stat().st_size
+
+
+def test_rotated_or_truncated_file_starts_over(tmp_path):
+    log = tmp_path / "syslog.log"
+    store = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    _append(log, "\n".join(LINES) + "\n")
+    assert incremental_aggregate(str(log), store, workers=1).total == 4
+
+    os.remove(log)  # rotated: new inode
+    _append(log, "\n".join(LINES) + "\n")
+    assert incremental_aggregate(str(log), store, workers=1).total == 4
+
+    log.write_text(LINES[2] + "\n")  # truncated in place: same inode, shorter
+    assert incremental_aggregate(str(log), store, workers=1).total == 1
+
+    log.write_text(LINES[3] + "\n" + LINES[2] + "\n")  # rewritten in place, longer, different head
+    assert incremental_aggregate(str(log), store, workers=1).total == 2
+
+
+def test_checkpoints_survive_a_new_store(tmp_path, monkeypatch):
+    log = tmp_path / "syslog.log"
+    cp_path = str(tmp_path / "checkpoints.json")
+    _append(log, "\n".join(LINES) + "\n")
+    incremental_aggregate_files([str(log)], workers=1, store=CheckpointStore(cp_path))
+
+    ranges = _parsed_ranges(monkeypatch)
+    agg = incremental_aggregate_files([str(log)], workers=1, store=CheckpointStore(cp_path))
+    assert ranges == [] and agg.total == 4
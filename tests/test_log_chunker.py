@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from log_chunker import chunk_log_records, iter_log_chunks
+
+HEADER = "TimeGenerated\tEventID\tSource\tType\tCategory\tMessage\n"
+
+
+def _tsv(seconds):
+    return "".join(f"Sun Apr  6 04:22:{s:02d} 2025\t7036\tService Control Manager\t4\t0\t"
+                   f"The BITS service entered the running state ({s}).\n" for s in seconds)
+
+
+def test_newest_first_input_keeps_full_range():
+    # loge.py exports newest first
+    chunks = list(iter_log_chunks([HEADER + _tsv([32, 31, 30, 29, 28])], "windows_tsv"))
+    assert len(chunks) == 1
+    chunk = chunks[0]
+    assert chunk.records == 5
+    assert (chunk.start, chunk.end) == (datetime(2025, 4, 6, 4, 22, 28), datetime(2025, 4, 6, 4, 22, 32))
+    assert chunk.text.startswith("Apr 06 04:22:28 Service Control Manager [info]")
+    assert chunk.text.endswith("(x5, until Apr 06 04:22:32)")
+
+
+def test_order_does_not_change_the_chunk():
+    ascending = list(iter_log_chunks([HEADER + _tsv([28, 29, 30, 31, 32])], "windows_tsv"))
+    descending = list(iter_log_chunks([HEADER + _tsv([32, 31, 30, 29, 28])], "windows_tsv"))
+    assert [(c.start, c.end, c.records) for c in ascending] == [(c.start, c.end, c.records) for c in descending]
+    assert ascending[0].text.split(" [info] ")[0] == descending[0].text.split(" [info] ")[0]
+
+
+def test_unparsed_lines_are_kept_as_raw_records():
+    text = ("Jun 14 15:16:01 combo sshd(pam_unix)[1]: authentication failure; rhost=1.2.3.4\n"
+            "free text note 1\n"
+            "free text note 2\n")
+    chunks = list(iter_log_chunks([text], "syslog", year=2005))
+    assert sum(c.records for c in chunks) == 3
+    assert chunks[0].text.splitlines()[1] == "free text note 1 (x2)"
+
+
+def test_chunks_never_split_a_record():
+    text = "".join(f"Jun 14 15:16:{s:02d} combo app[{s}]: distinct event kind {chr(65 + s % 26) * 5}-{s % 7}\n"
+                   for s in range(60))
+    chunks = list(iter_log_chunks([text], "syslog", year=2005, chunk_size=200))
+    assert len(chunks) > 1
+    assert sum(c.records for c in chunks) == 60
+    lines = [line for c in chunks for line in c.text.splitlines()]
+    assert all(line.startswith("Jun 14 15:16:") for line in lines)
+    assert list(chunk_log_records([])) == []
@@ -0,0 +1,127 @@
+import os
+import threading
+
+import pytest
+
+import log_index
+from log_index import LogIndex
+
+LINES = [
+    "Jun 14 15:16:01 combo sshd(pam_unix)[19939]: authentication failure; rhost=1.2.3.4",
+    "Jun 14 15:16:02 combo sshd(pam_unix)[19940]: authentication failure; rhost=5.6.7.8",
+    "Jun 14 15:17:00 combo kernel: Out of memory: Killed process 42 (httpd).",
+    "Jun 14 15:18:00 combo su(pam_unix)[21416]: session opened for user cyrus",
+]
+
+
+def _write(path, lines, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.write("".join(line + "\n" for line in lines))
+
+
+@pytest.fixture
+def log_db(tmp_path):
+    idx = LogIndex(str(tmp_path / "index.sqlite"))
+    yield idx
+    idx.close()
+
+
+def _count(idx, path):
+    return idx._conn.execute("SELECT COUNT(*) FROM events WHERE file = ?", (os.path.abspath(path),)).fetchone()[0]
+
+
+def test_sync_parses_only_appended_lines(log_db, tmp_path):
+    log = tmp_path / "syslog.log"
+    _write(log, LINES[:2])
+    assert log_db.sync([log]) == 2
+    assert log_db.sync([log]) == 0
+
+    _write(log, LINES[2:], mode="a")
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("Jun 14 15:19:00 combo kernel: half a li")  # unterminated tail waits for its newline
+    assert log_db.sync([log]) == 2
+    assert _count(log_db, log) == 4
+
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("ne\n")
+    assert log_db.sync([log]) == 1
+    assert _count(log_db, log) == 5
+
+
+def test_rotated_file_is_reindexed(log_db, tmp_path):
+    log = tmp_path / "syslog.log"
+    _write(log, LINES)
+    log_db.sync([log])
+    os.remove(log)
+    _write(log, LINES[2:3])  # new inode, shorter, different head
+    assert log_db.sync([log]) == 1
+    assert log_db.query()["total"] == 1
+
+
+def test_query_filters(log_db, tmp_path):
+    log = tmp_path / "syslog.log"
+    _write(log, LINES)
+    log_db.sync([log])
+    year = log_db._conn.execute("SELECT year FROM files").fetchone()[0]
+
+    assert log_db.query()["total"] == 4
+    assert log_db.query(source="sshd(pam_unix)")["total"] == 2
+    assert log_db.query(source="kernel, su(pam_unix)")["total"] == 2
+    assert log_db.query(contains="OUT OF MEMORY")["lines"][0]["source"] == "kernel"
+    window = log_db.query(start=f"{year}-06-14 15:16:30", end=f"{year}-06-14 15:18:00")
+    assert [line["source"] for line in window["lines"]] == ["kernel"]
+    by_sev = log_db.query()["by_severity"]
+    assert log_db.query(severity=list(by_sev))["total"] == 4
+    top = log_db.query()["top_messages"][0]
+    assert top["count"] == 2 and top["message"].startswith("authentication failure")
+
+    page = log_db.query(page=2, page_size=3)
+    assert page["pages"] == 2 and [line["source"] for line in page["lines"]] == ["su(pam_unix)"]
+
+
+def test_concurrent_syncs_do_not_duplicate(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_index, "INSERT_BATCH", 7)
+    log = tmp_path / "syslog.log"
+    _write(log, LINES * 50)
+    db = str(tmp_path / "index.sqlite")
+    LogIndex(db).close()  # create the schema before the race
+    barrier = threading.Barrier(4)
+
+    def sync():
+        idx = LogIndex(db)  # one connection each, as every Log Query call opens its own
+        barrier.wait()
+        idx.sync([log])
+        idx.close()
+
+    threads = [threading.Thread(target=sync) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    idx = LogIndex(db)
+    assert _count(idx, log) == 200
+    idx.close()
+
+
+def test_interrupted_sync_leaves_nothing(log_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(log_index, "INSERT_BATCH", 1)
+    log = tmp_path / "syslog.log"
+    _write(log, LINES)
+    real_insert = LogIndex._insert
+    calls = []
+
+    def failing_insert(self, rows):
+        calls.append(rows)
+        if len(calls) == 3:
+            raise OSError("disk full")
+        return real_insert(self, rows)
+
+    monkeypatch.setattr(LogIndex, "_insert", failing_insert)
+    with pytest.raises(OSError):
+        log_db.sync([log])
+    assert _count(log_db, log) == 0
+    assert log_db._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] == 0
+
+    monkeypatch.setattr(LogIndex, "_insert", real_insert)
+    assert log_db.sync([log]) == 4
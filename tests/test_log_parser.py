@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+
+from log_parser import detect_format, iter_records, parse_lines
+
+# each sample mixes well-formed records with lines that only almost match
+SAMPLES = {
+    "syslog": [
+        "Jun 14 15:16:01 combo sshd(pam_unix)[19939]: authentication failure; rhost=1.2.3.4",
+        "Jun 14 15:16:02 combo broken line without a colon",
+        "Jun 14 15:16:03 combo sshd[1]:",
+        "garbage",
+        "",
+        "Jun 14 15:16:04 combo kernel: Out of memory: Killed process 42 (httpd).",
+    ],
+    "apache": [
+        "[Thu Jun 09 06:07:05 2005] [error] [client 1.2.3.4] File does not exist: /var/www/html/favicon.ico",
+        "[Thu Jun 09 06:07:05 2005] [error] [client 1.2.3.4 broken",
+        "[Thu Jun 09 06:07:06 2005] [notice] jk2_init() Found child 2337 in scoreboard slot 6",
+        "[Thu Jun 09 06:07:07 2005] [error] [client 5.6.7.8",
+        "[Thu Jun 09 06:07:08 2005] [warn] child process 1 still did not exit",
+    ],
+    "windows_tsv": [
+        "TimeGenerated\tEventID\tSource\tType\tCategory\tMessage",
+        "Sun Apr  6 04:22:43 2025\t1796\tMicrosoft-Windows-TPM-WMI\t1\t0\tThe Secure Boot update failed",
+        "continued message line",
+        "Sun Apr  6 04:22:44 2025\t41\tbroken source",
+        "Sun Apr  6 04:22:45 2025\t7036\tService Control Manager\t4\t0\tThe BITS service entered the running state.",
+    ],
+}
+
+
+@pytest.mark.parametrize("fmt", sorted(SAMPLES))
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_mmap_scan_matches_line_parser(tmp_path, fmt, newline):
+    lines = SAMPLES[fmt]
+    path = tmp_path / f"{fmt}.log"
+    path.write_bytes(newline.join(lines).encode() + newline.encode())
+
+    fast = list(iter_records(str(path), fmt=fmt, year=2005))
+    reference = list(parse_lines(lines, fmt, year=2005))
+    assert fast == reference
+    assert all("\n" not in r.host and "\n" not in r.source for r in fast)
+
+
+def test_unterminated_client_does_not_swallow_next_record(tmp_path):
+    path = tmp_path / "error.log"
+    path.write_text("\n".join(SAMPLES["apache"]) + "\n")
+    records = list(iter_records(str(path), fmt="apache"))
+    assert [r.host for r in records] == ["1.2.3.4", "", "", "", ""]
+    assert records[1].message == "[client 1.2.3.4 broken"
+
+
+def test_byte_range_parses_only_its_records(tmp_path):
+    path = tmp_path / "sys.log"
+    data = "\n".join(SAMPLES["syslog"]) + "\n"
+    path.write_text(data)
+    cut = data.index("Jun 14 15:16:04")
+    head = list(iter_records(str(path), fmt="syslog", year=2005, end=cut))
+    tail = list(iter_records(str(path), fmt="syslog", year=2005, start=cut))
+    assert head + tail == list(iter_records(str(path), fmt="syslog", year=2005))
+    assert [r.message for r in tail] == ["Out of memory: Killed process 42 (httpd)."]
+
+
+def test_grammars_build_records():
+    sshd, = parse_lines(SAMPLES["syslog"][:1], "syslog", year=2005)
+    assert (sshd.timestamp, sshd.host, sshd.source, sshd.pid, sshd.severity) == (
+        datetime(2005, 6, 14, 15, 16, 1), "combo", "sshd(pam_unix)", 19939, "error")
+    assert sshd.message == "authentication failure; rhost=1.2.3.4"
+
+    apache = list(parse_lines(SAMPLES["apache"], "apache"))
+    assert [(r.severity, r.host) for r in apache[:3]] == [("error", "1.2.3.4"), ("error", ""), ("notice", "")]
+    assert apache[0].timestamp == datetime(2005, 6, 9, 6, 7, 5)
+
+    tpm, bits = parse_lines(SAMPLES["windows_tsv"], "windows_tsv")
+    assert (tpm.event_id, tpm.source, tpm.severity) == (1796, "Microsoft-Windows-TPM-WMI", "error")
+    # the continuation and the line too short for the grammar both fold into the open record
+    assert tpm.message == ("The Secure Boot update failed\ncontinued message line\n"
+                           "Sun Apr  6 04:22:44 2025\t41\tbroken source")
+    assert (bits.event_id, bits.severity) == (7036, "info")
+
+
+@pytest.mark.parametrize("fmt", sorted(SAMPLES))
+def test_detect_format(fmt):
+    assert detect_format(SAMPLES[fmt]) == fmt
+
+
+def test_detect_format_rejects_unknown_text():
+    assert detect_format(["hello", "world"]) is None
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+class _RecordingPool:
+    """Stands in for the warm pool: a 'run' reports the service.log it was given."""
+
+    def __init__(self):
+        self.seen = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def run(self, cancelled=lambda: False):
+        self.gate.wait(10)
+        time.sleep(0.01)
+        with open("logs/service.log", "r", encoding="utf-8") as f:
+            content = f.read()
+        self.seen.append(content)
+        return content
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logs").mkdir()
+    pool = _RecordingPool()
+    monkeypatch.setattr(main, "warm_pool", pool)
+    yield TestClient(main.app), pool
+
+
+def _wait(client, job_ids, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        jobs = [client.get(f"/jobs/{i}").json() for i in job_ids]
+        if all(j["status"] not in ("queued", "running") for j in jobs):
+            return jobs
+        time.sleep(0.02)
+    raise AssertionError("jobs did not finish")
+
+
+def test_uploads_run_in_submission_order(client, tmp_path):
+    client, pool = client
+    n = 8
+    ids = [client.post("/upload", files={"file": ("service.log", f"upload {i}\n")}).json()["job_id"]
+           for i in range(n)]
+    jobs = _wait(client, ids)
+
+    assert [j["status"] for j in jobs] == ["succeeded"] * n
+    assert pool.seen == [f"upload {i}\n" for i in range(n)]
+    assert (tmp_path / "logs" / "service.log").read_text() == f"upload {n - 1}\n"
+    assert not list((tmp_path / "logs" / "incoming").iterdir())
+
+
+def test_cancelled_queued_upload_is_skipped_and_removed(client, tmp_path):
+    client, pool = client
+    incoming = tmp_path / "logs" / "incoming"
+    pool.gate.clear()  # hold the first run so the others stay queued
+    ids = [client.post("/upload", files={"file": ("service.log", "upload 0\n")}).json()["job_id"]]
+    deadline = time.time() + 5
+    while list(incoming.iterdir()) and time.time() < deadline:  # until upload 0 is swapped in
+        time.sleep(0.01)
+    ids += [client.post("/upload", files={"file": ("service.log", f"upload {i}\n")}).json()["job_id"]
+            for i in range(1, 4)]
+    assert client.delete(f"/jobs/{ids[2]}").json()["status"] == "cancelled"
+    assert len(list(incoming.iterdir())) == 2  # uploads 1 and 3
+    pool.gate.set()
+    jobs = _wait(client, ids)
+
+    assert [j["status"] for j in jobs] == ["succeeded", "succeeded", "cancelled", "succeeded"]
+    assert pool.seen == ["upload 0\n", "upload 1\n", "upload 3\n"]
+    assert not list(incoming.iterdir())
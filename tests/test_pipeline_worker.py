@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+import pipeline_worker
+from job_queue import JobCancelled
+from pipeline_worker import WarmWorkerPool, WorkerDied, WorkerSpawnError
+
+# workers import "app2"; these stand-ins go first on the path the spawned children inherit
+FAKE_APP2 = '''
+import os, signal, time
+
+def run_pipeline(inputs):
+    inputs = inputs or {}
+    if inputs.get("crash"):
+        os.kill(os.getpid(), signal.SIGKILL)
+    time.sleep(inputs.get("sleep", 0))
+    return f"ran in {os.getpid()}"
+'''
+BROKEN_APP2 = "raise ImportError('no crewai here')\n"
+
+
+def _pool(tmp_path, monkeypatch, source, **kwargs):
+    (tmp_path / "app2.py").write_text(source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return WarmWorkerPool(**kwargs)
+
+
+def test_dead_worker_is_replaced(tmp_path, monkeypatch):
+    pool = _pool(tmp_path, monkeypatch, FAKE_APP2, size=1)
+    try:
+        pool.wait_ready(60)
+        first = pool.run()
+        t = time.time()
+        with pytest.raises(WorkerDied):
+            pool.run({"crash": True})
+        assert time.time() - t < 5
+        second = pool.run()  # waits for the replacement
+        assert second != first
+        assert pool._live == 1
+    finally:
+        pool.close()
+
+
+def test_worker_recycled_after_max_jobs(tmp_path, monkeypatch):
+    pool = _pool(tmp_path, monkeypatch, FAKE_APP2, size=1, max_jobs=2)
+    try:
+        pids = [pool.run() for _ in range(3)]
+        assert pids[0] == pids[1] != pids[2]
+    finally:
+        pool.close()
+
+
+def test_cancel_kills_the_run(tmp_path, monkeypatch):
+    pool = _pool(tmp_path, monkeypatch, FAKE_APP2, size=1)
+    try:
+        pool.wait_ready(60)
+        deadline = time.time() + 0.5
+        with pytest.raises(JobCancelled):
+            pool.run({"sleep": 30}, cancelled=lambda: time.time() > deadline)
+        assert pool.run()
+    finally:
+        pool.close()
+
+
+def test_spawn_failure_raises_at_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_worker, "READY_TIMEOUT", 60.0)
+    pool = _pool(tmp_path, monkeypatch, BROKEN_APP2, size=1)
+    try:
+        with pytest.raises(WorkerSpawnError, match="exited with code 1"):
+            pool.run()
+    finally:
+        pool.close()
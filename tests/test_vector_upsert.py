@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from vector_upsert import upsert_records
+
+DIM = 8
+
+
+def _embed(texts):
+    return [np.full(DIM, float(t.split("-")[1]) + 1, dtype=np.float32).tolist() for t in texts]
+
+
+@pytest.fixture
+def index_dimension():
+    return DIM
+
+
+def test_batches_land_in_local_index(index):
+    records = ((f"id-{i}", f"text-{i}", {"text": f"text-{i}", "file_name": "a.log"}) for i in range(25))
+    stats = upsert_records(index, records, _embed, batch_size=10, max_in_flight=2)
+    assert (stats["upserted"], stats["batches"], stats["retries"]) == (25, 3, 0)
+    assert index.describe_index_stats()["total_vector_count"] == 25
+    assert index.fetch(["id-24"])["vectors"]["id-24"]["metadata"]["text"] == "text-24"
+
+
+def test_failed_batch_is_retried_without_duplicates(index):
+    calls = {"n": 0}
+    upsert = index.upsert
+
+    def flaky(vectors):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise ConnectionError("transient")
+        return upsert(vectors=vectors)
+
+    index.upsert = flaky
+    records = [(f"id-{i}", f"text-{i}", {"text": f"text-{i}"}) for i in range(5)]
+    stats = upsert_records(index, records, _embed, batch_size=5, backoff=0.0)
+    assert stats["retries"] == 1
+    assert index.describe_index_stats()["total_vector_count"] == 5
+
+
+def test_upsert_error_is_raised_after_retries(index):
+    def broken(vectors):
+        raise ConnectionError("down")
+
+    index.upsert = broken
+    with pytest.raises(ConnectionError):
+        upsert_records(index, [("id-0", "text-0", {})], _embed, retries=1, backoff=0.0)
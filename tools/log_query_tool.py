@@ -0,0 +1,63 @@
+from typing import Optional, Type
+
+from crewai_tools import BaseTool
+from pydantic import BaseModel, Field
+
+from instrumentation import timed
+from log_index import LogIndex
+
+MAX_MESSAGE_CHARS = 300
+
+
+class LogQueryInput(BaseModel):
+    log_paths: str = Field(..., description="Comma-separated log file paths to search")
+    start: Optional[str] = Field(None, description="Only events at or after this time, e.g. '2025-04-06 03:00'")
+    end: Optional[str] = Field(None, description="Only events before this time")
+    severity: Optional[str] = Field(None, description="Comma-separated severities, e.g. 'error,warning'")
+    source: Optional[str] = Field(None, description="Comma-separated sources, e.g. 'sshd(pam_unix)'")
+    contains: Optional[str] = Field(None, description="Case-insensitive text the message must contain")
+    top: int = Field(10, description="How many of the most frequent messages to list")
+    page: int = Field(1, description="Page of matching lines to return, starting at 1")
+    page_size: int = Field(20, description="Matching lines per page (max 200)")
+
+
+class LogQueryTool(BaseTool):
+    name: str = "Log Query"
+    description: str = (
+        "Query parsed log events instead of reading whole files. Filter by time range, severity, source or "
+        "text; returns the match count, severity breakdown, the most frequent messages with counts and time "
+        "span, and one page of matching lines."
+    )
+    args_schema: Type[BaseModel] = LogQueryInput
+
+    @timed("Log Query")
+    def _run(self, log_paths: str, start: Optional[str] = None, end: Optional[str] = None,
+             severity: Optional[str] = None, source: Optional[str] = None, contains: Optional[str] = None,
+             top: int = 10, page: int = 1, page_size: int = 20) -> str:
+        paths = [p.strip() for p in log_paths.split(",") if p.strip()]
+        if not paths:
+            return "'log_paths' must list at least one file."
+
+        index = LogIndex()
+        try:
+            index.sync(paths)
+            result = index.query(paths, start, end, severity, source, contains, top, page, page_size)
+        except (OSError, ValueError) as e:
+            return f"Log query failed: {e}"
+        finally:
+            index.close()
+
+        def clip(message):
+            message = message.replace("\n", " ")
+            return message if len(message) <= MAX_MESSAGE_CHARS else message[:MAX_MESSAGE_CHARS] + "..."
+
+        out = [
+            f"Matching events: {result['total']} between {result['first']} and {result['last']}",
+            f"By severity: {result['by_severity']}",
+            f"Top {len(result['top_messages'])} messages:",
+        ]
+        out += [f"- ({m['count']}x, {m['first']} .. {m['last']}) {clip(m['message'])}"
+                for m in result["top_messages"]]
+        out.append(f"Lines (page {result['page']} of {result['pages']}):")
+        out += [f"{l['ts']} [{l['severity']}] {l['source']}: {clip(l['message'])}" for l in result["lines"]]
+        return "\n".join(out)
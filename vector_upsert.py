@@ -0,0 +1,75 @@
+# vector_upsert.py
+"""
+Pipelined, concurrent upserts into a vector index.
+
+The caller's thread embeds batch N+1 while up to `max_in_flight` earlier
+batches are being upserted on a small thread pool. Once that many batches are
+outstanding, embedding waits for one to finish (backpressure, so a huge
+document never holds more than a few batches of vectors in memory). A failed
+upsert is retried with exponential backoff; upserts are keyed by id, so a
+retry cannot duplicate vectors. Works with a Pinecone Index or a
+local_index.LocalVectorIndex, which doubles as the offline stand-in.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Sequence
+
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))
+UPSERT_MAX_IN_FLIGHT = int(os.getenv("UPSERT_MAX_IN_FLIGHT", "4"))
+UPSERT_RETRIES = int(os.getenv("UPSERT_RETRIES", "3"))
+UPSERT_BACKOFF = 0.5
+
+
+def _upsert_with_retry(index, vectors: list, retries: int, backoff: float) -> int:
+    """Upsert one batch; returns how many retries it took."""
+    for attempt in range(retries + 1):
+        try:
+            index.upsert(vectors=vectors)
+            return attempt
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+
+def upsert_records(index, records: Iterable[tuple], embed: Callable[[Sequence[str]], list],
+                   batch_size: int = UPSERT_BATCH_SIZE, max_in_flight: int = UPSERT_MAX_IN_FLIGHT,
+                   retries: int = UPSERT_RETRIES, backoff: float = UPSERT_BACKOFF) -> dict:
+    """Embed and upsert (id, text, metadata) records batch by batch, overlapping the two.
+
+    `records` may be a lazy iterator; at most `max_in_flight` + 1 batches of it
+    are held at once.
+    """
+    slots = threading.BoundedSemaphore(max_in_flight)
+    futures = []
+    upserted = 0
+    t0 = time.perf_counter()
+    records = iter(records)
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="vector-upsert") as pool:
+        while True:
+            chunk = list(islice(records, batch_size))
+            if not chunk:
+                break
+            vectors = embed([text for _, text, _ in chunk])
+            slots.acquire()
+            if any(f.done() and f.exception() for f in futures):
+                slots.release()
+                break  # stop embedding; the error is raised below
+            batch = [(vid, vector, metadata) for (vid, _, metadata), vector in zip(chunk, vectors)]
+            future = pool.submit(_upsert_with_retry, index, batch, retries, backoff)
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+            upserted += len(batch)
+        retried = sum(f.result() for f in futures)  # waits for all and re-raises the first failure
+    return {"upserted": upserted, "batches": len(futures), "retries": retried,
+            "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def upsert_chunks(index, ids: Sequence[str], texts: Sequence[str], metadatas: Sequence[dict],
+                  embed: Callable[[Sequence[str]], list], **kwargs) -> dict:
+    """upsert_records over parallel id/text/metadata lists."""
+    return upsert_records(index, zip(ids, texts, metadatas), embed, **kwargs)